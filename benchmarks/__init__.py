@@ -0,0 +1,6 @@
+"""Headless benchmarks for the keypad input path.
+
+Run any of them from the repository root, e.g.::
+
+    python -m benchmarks.bench_hittest
+"""
@@ -0,0 +1,120 @@
+"""The per-cell hit path: id()-keyed dict + lock (old) vs the CellState table.
+
+"old" is HitDebouncer as it was: a dict from id(target) to the last press
+time, every access under a threading.Lock.  "table" is the current one:
+flat arrays indexed by target.cell_index, no lock (keypad.cellstate).
+
+  debounce       HitDebouncer.hit alone, forced and with a 30 ms threshold
+  engine hit     InputEngine.hit: debounce + dispatch into a RecordingBackend
+  two threads    the same hits split between a Tk-like and a touch-like thread
+  stale entries  state left behind after 50 layout rebuilds of a 20x20 grid
+                 where fingers slid over every cell (touch never released it)
+"""
+import threading
+import time
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad import InputEngine, Layout, RecordingBackend
+from keypad.debounce import HitDebouncer
+from keypad.replay import ReplayCell
+
+HITS = 20000
+ROWS = COLS = 20
+
+
+class OldDebouncer:
+    """The dict + lock HitDebouncer this replaces."""
+
+    def __init__(self, threshold_ms=0, clock=time.monotonic):
+        self.threshold_ms = threshold_ms
+        self.clock = clock
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def hit(self, cell, force=False):
+        now = self.clock()
+        with self._lock:
+            last = self._last.get(cell)
+            if last is not None and not force and self.threshold_ms > 0 \
+                    and (now - last) * 1000 < self.threshold_ms:
+                return False
+            self._last[cell] = now
+        return True
+
+    def release(self, cell):
+        with self._lock:
+            self._last.pop(cell, None)
+
+
+def make_engine():
+    engine = InputEngine(RecordingBackend(), threaded=False)
+    keys = "asdfghjklqwertyuiop"
+    layout = Layout([40] * ROWS, [40] * COLS, {(r, c): {'key': keys[(r + c) % len(keys)]}
+                                               for r in range(ROWS) for c in range(COLS)})
+    targets = {pos: ReplayCell(pos, cell['key'], engine.compile(cell['key'])) for pos, cell in layout.anchors()}
+    engine.set_targets(layout.hit_index(), targets)
+    return engine, list(targets.values())
+
+
+def old_hit(engine, old):
+    """InputEngine.hit as it was, on the old debouncer."""
+    def hit(target, force=False):
+        action = target.action
+        if action is None or not old.hit(id(target), force): return False
+        engine.send_action(action)
+        return True
+    return hit
+
+
+def threaded(fn, targets):
+    """Run fn over targets split across two threads; wall seconds."""
+    halves = targets[::2], targets[1::2]
+    threads = [threading.Thread(target=lambda h=h: [fn(t) for t in h]) for h in halves]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return time.perf_counter() - t0
+
+
+def main():
+    engine, cells = make_engine()
+    stream = [cells[(i * 7) % len(cells)] for i in range(HITS)]
+    ids = [id(t) for t in stream]
+    idx = [t.cell_index for t in stream]
+
+    rows = []
+    for threshold, force in ((0, True), (30, False)):
+        old, new = OldDebouncer(threshold), HitDebouncer(threshold)
+        new.reset(ROWS * COLS)
+        t_old = timeit(lambda: [old.hit(i, force) for i in ids], 5)
+        t_new = timeit(lambda: [new.hit(i, force) for i in idx], 5)
+        name = "debounce, forced" if force else f"debounce, {threshold} ms"
+        rows.append((name, f"old {fmt_ns(t_old, HITS):>7}   table {fmt_ns(t_new, HITS):>7}   ({t_old / t_new:.2f}x)"))
+
+    old_engine_hit = old_hit(engine, OldDebouncer())
+    t_old = timeit(lambda: [old_engine_hit(t, True) for t in stream], 5)
+    t_new = timeit(lambda: [engine.hit(t, True) for t in stream], 5)
+    rows.append(("engine hit", f"old {fmt_ns(t_old, HITS):>7}   table {fmt_ns(t_new, HITS):>7}   ({t_old / t_new:.2f}x)"
+                               f"   {HITS / t_new:,.0f} hits/s"))
+    # Two threads share the engine as the Tk and touch threads do; frames are per thread
+    t_old = min(threaded(lambda t: old_engine_hit(t, True), stream) for _ in range(5))
+    t_new = min(threaded(lambda t: engine.hit(t, True), stream) for _ in range(5))
+    rows.append(("two threads", f"old {fmt_ns(t_old, HITS):>7}   table {fmt_ns(t_new, HITS):>7}   ({t_old / t_new:.2f}x)"))
+    engine.releaser.release_all()
+    report(f"hit path, {HITS:,} hits over a {ROWS}x{COLS} grid", rows)
+
+    # Layout rebuilds: new widgets each time, as refresh_grid recreates them
+    old, new = OldDebouncer(), InputEngine(RecordingBackend(), threaded=False)
+    for n in range(50):
+        engine, cells = make_engine()
+        new.set_targets(engine.processor.snapshot[0], {c.grid_pos: c for c in cells})
+        for c in cells:
+            old.hit(id(c), True)
+            new.debouncer.hit(c.cell_index, True)
+    report("state after 50 layout rebuilds", [
+        ("old dict", f"{len(old._last):,} entries (ids of destroyed widgets included)"),
+        ("table", f"{new.cells.size:,} slots, {len(new.cells.held()):,} held")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Design-mode input: per-widget bindings and Tk hit-tests vs one bind tag and the layout geometry.
+
+"old" is design mode as it was: every cell button carried 8 bindings and
+every header 5, each a fresh lambda (plus the Tcl command Tk registers
+for it), and drag handlers found the widget under the pointer with
+winfo_containing + grid_info.  "new" gives every design widget the one
+KeypadDesign bind tag, whose handlers are bound once per app, and resolves
+the pointer with keypad.reconcile.design_widget_at on the GridHitIndex.
+
+  drag event     one pointer position -> widget id, over a sweep across
+                 cells and both header strips
+  next header    goto_next_editable: scan grid_frame's children for the
+                 next header vs the (axis, idx) widget index
+  handlers/cell  Python allocations for the bound lambdas alone, per cell
+                 (no Tk needed; the Tcl commands behind them come on top)
+  memory/cell    Python allocations per cell for a design rebuild (tracemalloc)
+  rebuild        creating and gridding every design widget
+Tk rows need a display and are skipped without one.
+"""
+import tracemalloc
+
+from benchmarks.common import timeit, try_tk, report, fmt_ns
+from keypad import GridModel
+from keypad.reconcile import HEADER_H, HEADER_W, build_grid_specs, design_widget_at
+
+BASE_UNIT = 10
+SIZES = ((20, 20), (50, 50), (100, 100))
+THEME = {"bg": "#f9f9f9", "btn_bg": "#ffffff", "btn_fg": "#000000", "btn_active": "#e0e0e0",
+         "header_bg": "#f9f9f9", "header_fg": "#000000", "accent": "#0078d7",
+         "relief": "flat", "border": 0, "gap": 1}
+CELL_EVENTS = ("<Enter>", "<Leave>", "<ButtonPress-1>", "<B1-Motion>", "<ButtonRelease-1>",
+               "<ButtonPress-3>", "<B3-Motion>", "<ButtonRelease-3>")
+HEADER_EVENTS = ("<ButtonPress-1>", "<B1-Motion>", "<ButtonRelease-1>", "<ButtonPress-3>", "<B3-Motion>")
+TAG = "KeypadDesignBench"
+ORIGIN = (HEADER_W + 100, HEADER_H + 100)
+
+
+def model(rows, cols):
+    return GridModel([40] * rows, [60] * cols, {(r, c): {'key': 'a'} for r in range(rows) for c in range(cols)})
+
+
+def sweep(grid, n=20000):
+    """Screen points across the headers and the cells, as a diagonal drag would produce."""
+    w, h = sum(grid.col_sizes), sum(grid.row_sizes)
+    ox, oy = ORIGIN
+    return [(ox - HEADER_W + (i * 37) % (w + HEADER_W), oy - HEADER_H + (i * 53) % (h + HEADER_H)) for i in range(n)]
+
+
+def closure_bytes(rows, cols):
+    """Allocations of the old per-widget handler lambdas, per cell (headers shared out)."""
+    tracemalloc.start()
+    held = [[lambda e, r=r, c=c: (r, c) for _ in CELL_EVENTS] for r in range(rows) for c in range(cols)]
+    held += [[lambda e, i=i: i for _ in HEADER_EVENTS] for i in range(rows + cols)]
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return mem / (rows * cols)
+
+
+def build(root, grid, delegated):
+    """All design widgets for the grid, bound either way; returns (frame, {id: widget})."""
+    import tkinter as tk
+    frame = tk.Frame(root)
+    specs, _ = build_grid_specs(grid.row_sizes, grid.col_sizes, grid, THEME, True, BASE_UNIT)
+    widgets = {}
+    for wid, spec in specs.items():
+        w = (tk.Button if spec.kind == 'cell' else tk.Label)(frame, **dict(spec.style))
+        if spec.kind != 'corner':
+            if delegated: w.bindtags((TAG,) + w.bindtags())
+            else:
+                for seq in (CELL_EVENTS if spec.kind == 'cell' else HEADER_EVENTS):
+                    w.bind(seq, lambda e, wid=wid: wid)
+        w.grid(sticky="nsew", **dict(spec.grid))
+        widgets[wid] = w
+    root.update_idletasks()
+    return frame, widgets
+
+
+def tk_rows(root, grid):
+    rows = []
+    for event in CELL_EVENTS: root.bind_class(TAG, event, lambda e: None)
+    cells = grid.shape[0] * grid.shape[1]
+    built = {}
+    for delegated in (False, True):
+        tracemalloc.start()
+        frame, widgets = build(root, grid, delegated)
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        frame.destroy()
+        t = timeit(lambda: build(root, grid, delegated)[0].destroy(), repeat=3)
+        built[delegated] = mem / cells, t
+    (m_old, t_old), (m_new, t_new) = built[False], built[True]
+    rows.append(("memory/cell", f"old {m_old:,.0f} B   new {m_new:,.0f} B"))
+    rows.append(("rebuild", f"old {t_old * 1e3:.0f} ms   new {t_new * 1e3:.0f} ms   ({t_old / t_new:.2f}x)"))
+
+    frame, widgets = build(root, grid, True)
+    frame.place(x=0, y=0)
+    root.deiconify()
+    root.update()
+    points = [(frame.winfo_rootx() + x, frame.winfo_rooty() + y) for x, y in sweep(grid, 2000)]
+
+    def containing():
+        for x, y in points:
+            w = root.winfo_containing(x, y)
+            if w is not None and w.master is frame: w.grid_info()
+    t = timeit(containing, repeat=3)
+    rows.append(("drag event, Tk", f"winfo_containing + grid_info {fmt_ns(t, len(points))}"))
+
+    children = frame.winfo_children
+
+    def scan():
+        for c in range(grid.shape[1]):
+            for w in children():
+                info = w.grid_info()
+                if int(info['row']) == 0 and int(info['column']) == c + 1: break
+    t_scan = timeit(scan, repeat=1)
+    t_dict = timeit(lambda: [widgets.get(('col', c)) for c in range(grid.shape[1])], repeat=3)
+    rows.append(("next header", f"scan {fmt_ns(t_scan, grid.shape[1])}   index {fmt_ns(t_dict, grid.shape[1])}"))
+    frame.destroy()
+    root.withdraw()
+    return rows
+
+
+def main():
+    root = try_tk()
+    for rows, cols in SIZES:
+        grid = model(rows, cols)
+        index = grid.hit_index(THEME['gap'], ORIGIN)
+        points = sweep(grid)
+        t = timeit(lambda: [design_widget_at(index, x, y) for x, y in points], 5)
+        out = [("drag event, geometry", f"design_widget_at {fmt_ns(t, len(points))}"),
+               ("handlers/cell", f"old {closure_bytes(rows, cols):,.0f} B   new 0 B (one bind tag, bound once)")]
+        if root is None: out.append(("Tk rows", "skipped (no display)"))
+        elif rows <= 50: out += tk_rows(root, grid)
+        report(f"design mode {rows}x{cols}", out)
+    if root is not None: root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Batched vs per-key output dispatch.
+
+Simulates WM_TOUCH frames with several fingers landing at once and counts
+backend calls (one per SendInput syscall) for per-key and per-frame sending.
+The SendInput path uses a stub so the ctypes marshalling cost is included.
+
+The threads check opens frames from three threads at once and checks that
+every thread's events reach the backend in the order it emitted them, with
+nothing left queued.
+"""
+import sys
+import threading
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad import KeyDispatcher, RecordingBackend
+from keypad.sendinput import SendInputBackend
+
+FRAMES = 5000
+FINGERS = 4
+CODES = [0x1E, 0x1F, 0x25, 0x26]  # a s k l
+ROUNDS = 200000  # per thread; the shared-frame races this guards against need this many to show up
+
+
+def run_frames(dispatcher, batched):
+    for _ in range(FRAMES):
+        if batched:
+            with dispatcher.frame():
+                for code in CODES[:FINGERS]: dispatcher.press(code)
+        else:
+            for code in CODES[:FINGERS]: dispatcher.press(code)
+
+
+def thread_check():
+    """(events expected, sent, per-thread order kept) with three threads in frames at once.
+
+    One thread nests a frame inside another, as the touch thread does for
+    a slide step inside a WM_TOUCH message; the other two send two events
+    per frame, as a timer thread would.
+    """
+    sink = RecordingBackend()
+    dispatcher = KeyDispatcher(sink)
+    # Each thread owns a range of scan codes, so its events can be picked out of the shared stream
+    touch = [(0x10 + i % 8, up) for i in range(ROUNDS) for up in (False, True)]
+    ups = [(0x20 + i % 8, True) for i in range(ROUNDS)]
+    pulses = [(0x30 + i % 8, up) for i in range(ROUNDS) for up in (False, True)]
+
+    def send(events):
+        for code, up in events:
+            if up: dispatcher.release(code)
+            else: dispatcher.press(code)
+
+    def touch_thread():
+        for i in range(0, len(touch), 2):
+            with dispatcher.frame():
+                send(touch[i:i + 1])
+                with dispatcher.frame(): send(touch[i + 1:i + 2])
+
+    def batches(events):
+        for i in range(0, len(events), 2):
+            with dispatcher.frame(): send(events[i:i + 2])
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=touch_thread), threading.Thread(target=batches, args=(ups,)),
+                   threading.Thread(target=batches, args=(pulses,))]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    finally:
+        sys.setswitchinterval(switch)
+    sent = sink.events
+    ordered = all([e for e in sent if e[0] & 0xF0 == want[0][0] & 0xF0] == want for want in (touch, ups, pulses))
+    return len(touch) + len(ups) + len(pulses), len(sent), ordered
+
+
+def main():
+    rows = []
+    for batched in (False, True):
+        sink = RecordingBackend()
+        run_frames(KeyDispatcher(sink), batched)
+        label = "per-frame" if batched else "per-key"
+        assert [c for c, _ in sink.events] == CODES * FRAMES, "event order changed"
+        rows.append((f"{label} backend calls", f"{len(sink.batches):,} for {FRAMES * FINGERS:,} events"))
+
+        calls = []
+        backend = SendInputBackend(send_input=lambda n, arr, size: calls.append(n))
+        t = timeit(lambda: run_frames(KeyDispatcher(backend), batched), repeat=3)
+        rows.append((f"{label} SendInput (stub) time/frame", fmt_ns(t, FRAMES)))
+    report(f"dispatch, {FINGERS} fingers per frame", rows)
+
+    expected, sent, ordered = thread_check()
+    assert sent == expected and ordered, "events lost or reordered across threads"
+    report("frames from 3 threads at once", [("events sent", f"{sent:,} of {expected:,}"),
+                                             ("each thread's order kept", "yes" if ordered else "NO")])
+
+
+if __name__ == "__main__":
+    main()
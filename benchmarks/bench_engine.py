@@ -0,0 +1,92 @@
+"""The headless input engine: import cost and per-event throughput, on any OS.
+
+Import time is measured in fresh interpreters (best of several), together
+with the heaviest modules from -X importtime and a check that no UI or
+Windows module came along.  Throughput drives an InputEngine with a
+RecordingBackend: raw touch records, slide-mode pointer moves and plain
+debounced hits.
+"""
+import subprocess
+import sys
+
+from benchmarks.common import timeit, report, fmt_ns
+from benchmarks.bench_touch_pipeline import make_frames, ring_records, ORIGIN
+from keypad import InputEngine, Layout, RecordingBackend
+
+RUNS = 7
+EVENTS = 20000
+FORBIDDEN = ("tkinter", "keyboard", "win32gui", "win32con", "winreg")
+
+PROBE = ("import sys, time; t = time.perf_counter(); import keypad.engine; t = time.perf_counter() - t; "
+         "print(t, len(sys.modules), ','.join(m for m in %r if m in sys.modules))" % (FORBIDDEN,))
+
+
+def import_cost():
+    best, modules, leaked = float('inf'), 0, ''
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout.split()
+        best = min(best, float(out[0]))
+        modules, leaked = int(out[1]), out[2] if len(out) > 2 else ''
+    trace = subprocess.run([sys.executable, "-X", "importtime", "-c", "import keypad.engine"],
+                           capture_output=True, text=True, check=True).stderr.splitlines()
+    rows = []
+    for line in trace[1:]:
+        self_us, _, name = line.split("|")
+        rows.append((int(self_us.split(":")[1]), name.strip()))
+    rows.sort(reverse=True)
+    return best, modules, leaked, rows[:5]
+
+
+class Cell:
+    __slots__ = ('action', 'repeat_ms', 'cell_index')
+
+    def __init__(self, action):
+        self.action = action
+        self.repeat_ms = None
+        self.cell_index = -1
+
+
+def make_engine():
+    engine = InputEngine(RecordingBackend(), threaded=False)
+    layout = Layout([200], [100] * 5, {(0, c): {'key': k, 'span_r': 1, 'span_c': 1} for c, k in enumerate("asdkl")})
+    targets = {pos: Cell(engine.compile(cell['key'])) for pos, cell in layout.anchors()}
+    index = layout.hit_index(gap=1, origin=ORIGIN)
+    engine.set_targets(index, targets)
+    return engine, index, targets
+
+
+def main():
+    best, modules, leaked, heaviest = import_cost()
+    report("import keypad.engine (fresh interpreter)", [
+        ("best wall time", f"{best * 1e3:.2f} ms"),
+        ("modules loaded in total", str(modules)),
+        ("UI/Windows modules loaded", leaked or "none")] +
+        [(f"  {name}", f"{us:,} us self") for us, name in heaviest])
+
+    engine, index, targets = make_engine()
+    frames = [ring_records(arr) for arr in make_frames()]
+    stream = [frames[i % len(frames)] for i in range(EVENTS // 4)]
+    t_touch = timeit(lambda: [engine.processor.process(r) for r in stream], repeat=3)
+
+    cells = [targets[(0, c)] for c in range(5)]
+    moves = [cells[i % 5] for i in range(EVENTS)]
+
+    def slide():
+        engine.pointer_down(cells[0])
+        for cell in moves: engine.pointer_move(cell)
+        engine.pointer_up()
+    t_slide = timeit(slide, repeat=3)
+    t_hit = timeit(lambda: [engine.hit(c, True) for c in moves], repeat=3)
+    t_lookup = timeit(lambda: [index.lookup(150 + (i % 450), 150) for i in range(EVENTS)], repeat=3)
+    engine.releaser.release_all()
+
+    report(f"InputEngine throughput, {EVENTS:,} events", [
+        ("touch record (process)", f"{fmt_ns(t_touch, EVENTS)}  ({EVENTS / t_touch:,.0f}/s)"),
+        ("pointer move, new cell", f"{fmt_ns(t_slide, EVENTS)}  ({EVENTS / t_slide:,.0f}/s)"),
+        ("hit (debounce + send)", f"{fmt_ns(t_hit, EVENTS)}  ({EVENTS / t_hit:,.0f}/s)"),
+        ("hit-test lookup", f"{fmt_ns(t_lookup, EVENTS)}  ({EVENTS / t_lookup:,.0f}/s)"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
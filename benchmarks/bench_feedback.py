@@ -0,0 +1,129 @@
+"""Press feedback under a synthetic 1000 hits/sec load: per-hit timers vs the frame compositor.
+
+Tk is replaced by a call counter on a simulated clock: cells count cget /
+config / winfo_exists, the scheduler counts after / after_cancel and runs
+callbacks in time order.  "per-hit" is the old show_hit_feedback (read bg,
+set flash color, arm an after(50) reset, cancel the previous one);
+"compositor" is keypad.feedback.FeedbackCompositor.  Two patterns: a slide
+sweeping along a 20-cell row and random hits over a 12x20 grid.
+"""
+import heapq
+import random
+from collections import Counter
+
+from benchmarks.common import report
+from keypad import ManualClock
+from keypad.feedback import FeedbackCompositor
+
+RATE = 1000
+SECONDS = 5.0
+FLASH_MS = 50
+
+
+class FakeTk:
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = Counter()
+        self._timers = []
+        self._seq = 0
+        self._cancelled = set()
+
+    def after(self, ms, fn):
+        self.calls['after'] += 1
+        self._seq += 1
+        heapq.heappush(self._timers, (self.clock() + ms / 1000.0, self._seq, fn))
+        return self._seq
+
+    def after_cancel(self, job):
+        self.calls['after_cancel'] += 1
+        self._cancelled.add(job)
+
+    def run_until(self, t):
+        while self._timers and self._timers[0][0] <= t:
+            due, seq, fn = heapq.heappop(self._timers)
+            if seq in self._cancelled: continue
+            if due > self.clock.now: self.clock.now = due
+            fn()
+        if t > self.clock.now: self.clock.now = t
+
+
+class FakeCell:
+    def __init__(self, tk):
+        self.tk = tk
+        self.bg = "#ffffff"
+
+    def cget(self, option):
+        self.tk.calls['cget'] += 1
+        return self.bg
+
+    def config(self, bg):
+        self.tk.calls['config'] += 1
+        self.bg = bg
+
+    def winfo_exists(self):
+        self.tk.calls['winfo_exists'] += 1
+        return True
+
+
+class PerHitFeedback:
+    """The old show_hit_feedback / _reset_widget_color_tracked pair."""
+
+    def __init__(self, tk):
+        self.tk = tk
+        self.states = {}
+
+    def flash(self, cell, ms):
+        if not cell.winfo_exists(): return
+        state = self.states.pop(id(cell), None)
+        if state:
+            self.tk.after_cancel(state[0])
+            orig = state[1]
+        else:
+            orig = cell.cget("bg")
+        cell.config(bg="#aaaaaa")
+        job = self.tk.after(ms, lambda: self._reset(cell, orig))
+        self.states[id(cell)] = (job, orig)
+
+    def _reset(self, cell, orig):
+        if cell.winfo_exists(): cell.config(bg=orig)
+        self.states.pop(id(cell), None)
+
+
+def slide_pattern(cells, n):
+    row = cells[:20]
+    return [row[i % len(row)] for i in range(n)]
+
+
+def random_pattern(cells, n):
+    rng = random.Random(1)
+    return [rng.choice(cells) for _ in range(n)]
+
+
+def run(model, pattern):
+    clock = ManualClock()
+    tk = FakeTk(clock)
+    cells = [FakeCell(tk) for _ in range(240)]
+    fb = PerHitFeedback(tk) if model == "per-hit" else FeedbackCompositor(tk.after, tk.after_cancel, clock)
+    n = int(RATE * SECONDS)
+    for i, cell in enumerate(pattern(cells, n)):
+        tk.run_until(i / RATE)
+        fb.flash(cell, FLASH_MS)
+    tk.run_until(SECONDS + 1)
+    stuck = sum(c.bg != "#ffffff" for c in cells)
+    return tk.calls, stuck
+
+
+def main():
+    for name, pattern in (("slide over 20 cells", slide_pattern), ("random over 240 cells", random_pattern)):
+        rows = []
+        for model in ("per-hit", "compositor"):
+            calls, stuck = run(model, pattern)
+            total = sum(calls.values())
+            detail = ", ".join(f"{k} {v / SECONDS:,.0f}" for k, v in sorted(calls.items()))
+            rows.append((f"{model} Tk calls/sec", f"{total / SECONDS:,.0f}  ({detail})"))
+            rows.append((f"{model} cells left flashed", str(stuck)))
+        report(f"feedback at {RATE} hits/sec, {name}", rows)
+
+
+if __name__ == "__main__":
+    main()
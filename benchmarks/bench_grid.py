@@ -0,0 +1,149 @@
+"""Grid model: the {(r, c): dict} layout vs keypad.grid.GridModel.
+
+Memory is what tracemalloc sees while building each representation.
+"dict" operations are the editor's old add/del row/col (rebuild the whole
+dict), merge (walk the rectangle) and the span-skip pass refresh_grid and
+the hit index ran over every cell; "model" is the same operation on a
+GridModel.  Insert/delete are measured as an insert followed by a delete
+of the same row/column so the grid keeps its size between repeats.
+"""
+import tracemalloc
+
+from benchmarks.common import timeit, report
+from keypad import GridHitIndex, GridModel
+from keypad.grid import iter_anchors
+
+SIZES = ((100, 100), (300, 300))
+
+
+def make_dict(rows, cols):
+    grid_data = {(r, c): {'key': 'a', 'span_r': 1, 'span_c': 1} for r in range(rows) for c in range(cols)}
+    for r in range(0, rows - 1, 4):
+        for c in range(0, cols - 1, 5):
+            grid_data[(r, c)].update({'span_r': 2, 'span_c': 2})
+    return [40] * rows, [60] * cols, grid_data
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+# --- the editor's old dict operations ---
+def dict_insert_row(row_sizes, grid_data, i, cols):
+    row_sizes.insert(i, 40)
+    new_data = {}
+    for (r, c), v in grid_data.items():
+        new_data[(r + 1, c) if r >= i else (r, c)] = v
+    for c in range(cols): new_data[(i, c)] = {'key': '', 'span_r': 1, 'span_c': 1}
+    return new_data
+
+
+def dict_delete_row(row_sizes, grid_data, i):
+    row_sizes.pop(i)
+    new_data = {}
+    for (r, c), v in grid_data.items():
+        span_r = v.get('span_r', 1)
+        if r == i: pass
+        elif r > i: new_data[(r - 1, c)] = v
+        else:
+            if r + span_r - 1 >= i: v['span_r'] = max(1, span_r - 1)
+            new_data[(r, c)] = v
+    return new_data
+
+
+def dict_insert_col(col_sizes, grid_data, j, rows):
+    col_sizes.insert(j, 60)
+    new_data = {}
+    for (r, c), v in grid_data.items():
+        new_data[(r, c + 1) if c >= j else (r, c)] = v
+    for r in range(rows): new_data[(r, j)] = {'key': '', 'span_r': 1, 'span_c': 1}
+    return new_data
+
+
+def dict_delete_col(col_sizes, grid_data, j):
+    col_sizes.pop(j)
+    new_data = {}
+    for (r, c), v in grid_data.items():
+        span_c = v.get('span_c', 1)
+        if c == j: pass
+        elif c > j: new_data[(r, c - 1)] = v
+        else:
+            if c + span_c - 1 >= j: v['span_c'] = max(1, span_c - 1)
+            new_data[(r, c)] = v
+    return new_data
+
+
+def dict_merge(grid_data, r0, c0, r1, c1):
+    grid_data[(r0, c0)].update({'span_r': r1 - r0 + 1, 'span_c': c1 - c0 + 1})
+    for r in range(r0, r1 + 1):
+        for c in range(c0, c1 + 1):
+            if (r, c) != (r0, c0): grid_data[(r, c)].update({'span_r': 1, 'span_c': 1})
+
+
+def bench(rows, cols):
+    (row_sizes, col_sizes, grid_data), dict_mem = measure(lambda: make_dict(rows, cols))
+    model, model_mem = measure(lambda: GridModel(row_sizes, col_sizes, grid_data))
+    mid_r, mid_c = rows // 2 + 1, cols // 2 + 1
+    state = {'d': grid_data}
+
+    def d_rows():
+        state['d'] = dict_insert_row(row_sizes, state['d'], mid_r, cols)
+        state['d'] = dict_delete_row(row_sizes, state['d'], mid_r)
+
+    def d_cols():
+        state['d'] = dict_insert_col(col_sizes, state['d'], mid_c, rows)
+        state['d'] = dict_delete_col(col_sizes, state['d'], mid_c)
+
+    def m_rows():
+        model.insert_row(mid_r); model.delete_row(mid_r)
+
+    def m_cols():
+        model.insert_col(mid_c); model.delete_col(mid_c)
+
+    def d_merge():
+        dict_merge(state['d'], 1, 1, 8, 8)
+        for r in range(1, 9):
+            for c in range(1, 9): state['d'][(r, c)].update({'span_r': 1, 'span_c': 1})
+
+    def m_merge():
+        model.merge(1, 1, 8, 8); model.split(1, 1)
+
+    def d_anchors():
+        for _ in iter_anchors(state['d'], rows, cols): pass
+
+    def m_anchors():
+        for _ in model.anchors(): pass
+
+    def d_owner():
+        index = GridHitIndex(row_sizes, col_sizes, state['d'])
+        for r in range(0, rows, 7):
+            for c in range(0, cols, 7): index.owner(r, c)
+
+    def m_owner():
+        for r in range(0, rows, 7):
+            for c in range(0, cols, 7): model.owner(r, c)
+
+    pairs = (("insert+delete row", d_rows, m_rows), ("insert+delete col", d_cols, m_cols),
+             ("merge+split 8x8", d_merge, m_merge), ("visible-cell pass", d_anchors, m_anchors),
+             ("owner lookups (index build for dict)", d_owner, m_owner),
+             ("hit index build", lambda: GridHitIndex(row_sizes, col_sizes, state['d']),
+              lambda: GridHitIndex(row_sizes, col_sizes, model)))
+    out = [("memory dict", f"{dict_mem / 1024:,.0f} KiB ({dict_mem / (rows * cols):.0f} B/cell)"),
+           ("memory model", f"{model_mem / 1024:,.0f} KiB ({model_mem / (rows * cols):.0f} B/cell)")]
+    repeat = 5 if rows <= 100 else 3
+    for name, d_fn, m_fn in pairs:
+        d, m = timeit(d_fn, repeat), timeit(m_fn, repeat)
+        out.append((name, f"dict {d * 1e3:8.2f} ms   model {m * 1e3:8.3f} ms   ({d / m:,.0f}x)"))
+    report(f"grid model {rows}x{cols}", out)
+
+
+def main():
+    for rows, cols in SIZES: bench(rows, cols)
+
+
+if __name__ == "__main__":
+    main()
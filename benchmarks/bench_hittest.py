@@ -0,0 +1,83 @@
+"""Hit-test cost: GridHitIndex vs winfo_containing + parent walk.
+
+The Tk path needs a display; without one only the index is measured.
+"""
+import random
+
+from benchmarks.common import timeit, try_tk, report, fmt_ns
+from keypad import GridHitIndex
+
+SAMPLES = 20000
+
+
+def make_layout(rows, cols, row_size=40, col_size=60):
+    grid_data = {(r, c): {'key': 'a', 'span_r': 1, 'span_c': 1} for r in range(rows) for c in range(cols)}
+    # Sprinkle some merged cells so the owner table is exercised
+    for r in range(0, rows - 1, 4):
+        for c in range(0, cols - 1, 5):
+            grid_data[(r, c)].update({'span_r': 2, 'span_c': 2})
+    return [row_size] * rows, [col_size] * cols, grid_data
+
+
+def bench_index(rows, cols):
+    row_sizes, col_sizes, grid_data = make_layout(rows, cols)
+    build = timeit(lambda: GridHitIndex(row_sizes, col_sizes, grid_data, gap=1, origin=(100, 100)))
+    index = GridHitIndex(row_sizes, col_sizes, grid_data, gap=1, origin=(100, 100))
+    rnd = random.Random(1)
+    w, h = sum(col_sizes), sum(row_sizes)
+    points = [(100 + rnd.randrange(w), 100 + rnd.randrange(h)) for _ in range(SAMPLES)]
+    lookup = index.lookup
+
+    def run():
+        for x, y in points: lookup(x, y)
+    return build, timeit(run)
+
+
+def bench_tk(root, rows, cols):
+    import tkinter as tk
+    size = 8 if rows > 20 else 30
+    top = tk.Toplevel(root)
+    top.geometry("+0+0")
+    frame = tk.Frame(top)
+    frame.pack()
+    for r in range(rows): frame.rowconfigure(r, minsize=size)
+    for c in range(cols): frame.columnconfigure(c, minsize=size)
+    for r in range(rows):
+        for c in range(cols):
+            b = tk.Button(frame, text='', bd=0, padx=0, pady=0, highlightthickness=0)
+            b.meta_key = 'a'
+            b.grid(row=r, column=c, sticky="nsew", padx=(0, 1), pady=(0, 1))
+    top.update()
+    x0, y0 = frame.winfo_rootx(), frame.winfo_rooty()
+    w, h = frame.winfo_width(), frame.winfo_height()
+    rnd = random.Random(1)
+    points = [(x0 + rnd.randrange(w), y0 + rnd.randrange(h)) for _ in range(SAMPLES // 10)]
+
+    def run():
+        for x, y in points:
+            wdg = top.winfo_containing(x, y)
+            while wdg and not (isinstance(wdg, tk.Button) and hasattr(wdg, "meta_key")):
+                wdg = wdg.master
+                if wdg == top: break
+    t = timeit(run, repeat=3)
+    top.destroy()
+    return t, len(points)
+
+
+def main():
+    root = try_tk()
+    for rows, cols in ((10, 10), (100, 100)):
+        build, lookups = bench_index(rows, cols)
+        rows_out = [("index build", f"{build * 1e3:.2f} ms"),
+                    ("index lookup", fmt_ns(lookups, SAMPLES))]
+        if root is not None:
+            t, n = bench_tk(root, rows, cols)
+            rows_out.append(("winfo_containing walk", fmt_ns(t, n)))
+        else:
+            rows_out.append(("winfo_containing walk", "skipped (no display)"))
+        report(f"hit-test {rows}x{cols}", rows_out)
+    if root is not None: root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Latency probes: cost when off, cost when on, and what the summary looks like.
+
+Runs the bench_touch_pipeline frames through a TouchProcessor with probes
+off (None, the default) and on, then replays them once more stamping each
+frame the way the wndproc does and prints the resulting histograms as the
+control panel shows them.
+"""
+from benchmarks.common import timeit, report, fmt_ns
+from benchmarks.bench_touch_pipeline import make_frames, make_processor, ring_records
+from keypad import Histogram, LatencyProbes, RecordingBackend
+
+FRAMES = 3000
+
+
+def describe(cell):
+    return cell.action.source, cell.action.codes
+
+
+def main():
+    frames = make_frames()
+    stream = [frames[i % len(frames)] for i in range(FRAMES)]
+    probes = LatencyProbes(describe)
+    for arr in frames: probes.stamp(arr, len(arr), 0)
+    records = [ring_records(arr) for arr in stream]
+
+    proc = make_processor(RecordingBackend())
+    t_off = timeit(lambda: [proc.process(r) for r in records], repeat=3)
+    proc.probes = probes
+    t_on = timeit(lambda: [proc.process(r) for r in records], repeat=3)
+
+    h = Histogram()
+    n = 100000
+    t_rec = timeit(lambda: [h.record(v) for v in range(1000, 1000 + n)], repeat=3)
+    t_stamp = timeit(lambda: [probes.stamp(arr, len(arr), 0) for arr in stream], repeat=3)
+
+    report(f"latency probes, {FRAMES} frames x 4 fingers", [
+        ("process/frame, probes off", fmt_ns(t_off, FRAMES)),
+        ("process/frame, probes on", fmt_ns(t_on, FRAMES)),
+        ("wndproc stamp/frame", fmt_ns(t_stamp, FRAMES)),
+        ("Histogram.record", fmt_ns(t_rec, n)),
+    ])
+
+    # A realistic pass: stamp at "wndproc entry", process, then release every key
+    probes.reset()
+    codes = [c for cell in proc.snapshot[1].values() for c in cell.action.codes]
+    for arr in stream:
+        probes.stamp(arr, len(arr), arr[0].dwTime + 1)
+        proc.process(ring_records(arr))
+        probes.released(codes)
+    print("\n" + probes.format_summary())
+    report("per-cell dispatch (us)", [(k, f"n={s['count']} p50={s['p50']:.1f} p99={s['p99']:.1f} max={s['max']:.1f}")
+                                      for k, s in probes.summary()['cells'].items()])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Layout load/save for a 10,000-cell (100x100) layout.
+
+"v0 eval" is the old load_layout: json.load the whole document, eval()
+every "(r, c)" key, then a second pass to compile the cell keys.  The
+others go through keypad.layoutfile, which validates, fills the
+GridModel and compiles keys in one pass: the same v0 file, the v1 JSON
+schema and the .kpl binary form.  Peak memory is tracemalloc's peak
+during the load.
+"""
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+
+from benchmarks.common import timeit, report
+from keypad import GridModel, InputEngine, RecordingBackend
+from keypad.layoutfile import load_layout, save_layout
+
+ROWS = COLS = 100
+KEYS = [''] * 10 + list("asdfjkl") + ["ctrl+c", "shift+tab", "f5", "space", "enter", "alt+f4"]
+
+
+def make_grid():
+    rng = random.Random(1)
+    grid = GridModel.blank(ROWS, COLS)
+    for cell in grid.cells: cell['key'] = rng.choice(KEYS)
+    for r in range(0, ROWS - 1, 4):
+        for c in range(0, COLS - 1, 5): grid.merge(r, c, r + 1, c + 1)
+    return grid
+
+
+def save_v0_file(path, grid):
+    """The saver this replaces."""
+    with open(path, 'w') as o:
+        json.dump({"row_sizes": grid.row_sizes, "col_sizes": grid.col_sizes,
+                   "cells": {str(k): dict(v) for k, v in grid.items()}}, o)
+
+
+def old_load(path):
+    """The loader this replaces."""
+    engine = InputEngine(RecordingBackend(), threaded=False)
+    with open(path, 'r') as i:
+        d = json.load(i)
+        cells = {eval(k): v for k, v in d["cells"].items()}
+    for cell in cells.values(): engine.compile(cell.get('key', ''))
+    return GridModel(d["row_sizes"], d["col_sizes"], cells)
+
+
+def new_load(path):
+    engine = InputEngine(RecordingBackend(), threaded=False)
+    return load_layout(path, engine.compile)[0]
+
+
+def peak(fn):
+    tracemalloc.start()
+    fn()
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top
+
+
+def main():
+    grid = make_grid()
+    with tempfile.TemporaryDirectory() as tmp:
+        v0, v1, kpl = (os.path.join(tmp, name) for name in ("v0.json", "v1.json", "layout.kpl"))
+        save_v0 = timeit(lambda: save_v0_file(v0, grid), 3)
+        save_v1 = timeit(lambda: save_layout(v1, grid), 3)
+        save_kpl = timeit(lambda: save_layout(kpl, grid, binary=True), 3)
+        for path in (v0, v1, kpl):
+            assert new_load(path).to_cells() == grid.to_cells(), path
+        assert old_load(v0).to_cells() == grid.to_cells()
+
+        rows = []
+        for name, fn, path, saved in (("v0 eval (old)", old_load, v0, save_v0), ("v0 file, new loader", new_load, v0, None),
+                                      ("v1 JSON", new_load, v1, save_v1), ("v1 binary .kpl", new_load, kpl, save_kpl)):
+            t = timeit(lambda: fn(path), 5)
+            mem = peak(lambda: fn(path))
+            size = os.path.getsize(path)
+            line = f"load {t * 1e3:6.1f} ms   peak {mem / 1024:6,.0f} KiB   file {size / 1024:6,.0f} KiB"
+            if saved is not None: line += f"   save {saved * 1e3:5.1f} ms"
+            rows.append((name, line))
+        report(f"layout load, {ROWS * COLS:,} cells", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Macro timing: how far emitted key events land from the requested schedule.
+
+One macro, (a, 8ms, s[20], 10ms)*40 (160 key events over 2 s), is played
+into a RecordingBackend stamped with time.monotonic, and every event's
+send time is compared with start + its offset in the compiled macro.
+
+  Tk after() chain  the macro stepped from the UI thread, each step
+                    scheduling the next with after(delay), as a Tk
+                    callback chain would
+  MacroRunner       InputEngine.send_action on the macro thread with
+                    absolute deadlines, with and without the final spin
+
+"busy UI" runs the app's 15 ms render job as 3 ms of Python on the UI
+thread throughout, which also competes for the GIL.
+
+  late p50/p99/max   send time - requested time, per event
+  drift              the same for the last event of the macro
+"""
+import heapq
+import time
+
+from benchmarks.common import report
+from keypad import InputEngine, RecordingBackend, compile_key
+
+MACRO = "macro: (a, 8ms, s[20], 10ms)*40"
+RENDER_MS, RENDER_EVERY_MS = 3, 15
+
+
+def burn(ms):
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end: pass
+
+
+class UILoop:
+    """A Tk-like loop on the calling thread: after() timers, optionally the render job."""
+
+    def __init__(self, busy):
+        self.timers = []
+        self.seq = 0
+        if busy: self.after(RENDER_EVERY_MS, self.render)
+
+    def after(self, ms, fn):
+        self.seq += 1
+        heapq.heappush(self.timers, (time.monotonic() + ms / 1000.0, self.seq, fn))
+
+    def render(self):
+        burn(RENDER_MS)
+        self.after(RENDER_EVERY_MS, self.render)
+
+    def run_until(self, done, limit=5.0):
+        end = time.monotonic() + limit
+        while not done() and time.monotonic() < end:
+            wait = self.timers[0][0] - time.monotonic() if self.timers else 0.001
+            if wait > 0: time.sleep(wait)
+            else: heapq.heappop(self.timers)[2]()
+
+
+def expected(macro):
+    return [offset for offset, events in macro.steps for _ in events]
+
+
+def deviations(sink, start, offsets):
+    sent = [t for t, batch in sink.batches for _ in batch]
+    return [(t - start - o) * 1000 for t, o in zip(sent, offsets)]
+
+
+def after_chain(macro, busy):
+    sink = RecordingBackend(time.monotonic)
+    loop = UILoop(busy)
+    steps = macro.steps
+    state = {'i': 0}
+
+    def step():
+        i = state['i']
+        sink.send(steps[i][1])
+        state['i'] = i + 1
+        if i + 1 < len(steps): loop.after(round((steps[i + 1][0] - steps[i][0]) * 1000), step)
+
+    start = time.monotonic()
+    step()
+    loop.run_until(lambda: state['i'] >= len(steps))
+    return sink, start
+
+
+def runner(action, busy, spin_ms):
+    sink = RecordingBackend(time.monotonic)
+    engine = InputEngine(sink)
+    engine.macros.spin = spin_ms / 1000.0
+    loop = UILoop(busy)
+    start = time.monotonic()
+    engine.send_action(action)
+    loop.run_until(lambda: not engine.macros.running(action.macro))
+    engine.stop()
+    return sink, start
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    action = compile_key(MACRO)
+    offsets = expected(action.macro)
+    for busy in (False, True):
+        rows = []
+        for name, run in (("Tk after() chain", lambda: after_chain(action.macro, busy)),
+                          ("MacroRunner, no spin", lambda: runner(action, busy, 0)),
+                          ("MacroRunner, 1 ms spin", lambda: runner(action, busy, 1.0))):
+            sink, start = run()
+            dev = deviations(sink, start, offsets)
+            missing = len(offsets) - len(dev)
+            rows.append((name, f"late p50/p99/max {pct(dev, 0.5):6.2f} / {pct(dev, 0.99):6.2f} / {max(dev):6.2f} ms"
+                               f"   drift {dev[-1]:6.2f} ms" + (f"   {missing} events missing" if missing else "")))
+        report(f"{len(offsets)} macro events over {action.macro.duration:.2f} s, {'busy' if busy else 'idle'} UI", rows)
+
+
+if __name__ == "__main__":
+    main()
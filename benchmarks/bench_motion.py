@@ -0,0 +1,263 @@
+"""Mouse slide motion handling: the old after(1) throttle vs MotionCoalescer.
+
+A synthetic 1000 Hz mouse (1 ms +- 0.3 ms apart) slides back and forth
+across a 12-cell row at 3000 px/s, into a simulated Tk event loop on a
+simulated clock: window events first, then due timers, then idle
+callbacks, as Tcl_DoOneEvent orders them.  "busy" adds the app's 15 ms
+render job at 3 ms a run, during which events queue up.  Handler calls
+run the real hit path (GridHitIndex.lookup_path + InputEngine.pointer_path)
+and the simulated clock advances by their measured wall time, plus
+TK_CALLBACK_US for every callback Tk dispatches.
+
+  calls/s        _process_motion runs (and all Tk callbacks) per second of input
+  stale          handler runs working on a sample older than one already handled
+  key latency    first sample inside a cell -> its key-down sent
+  sample         per sample, until a handler run that covers it (or a newer sample) returns
+  keys           key-downs against the cells the slides cross
+"""
+import random
+import time
+from collections import Counter
+
+from benchmarks.common import report
+from keypad import GridHitIndex, InputEngine, ManualClock, RecordingBackend, compile_key
+from keypad.latency import Histogram
+from keypad.motion import MotionCoalescer
+from keypad.replay import ReplayCell
+
+HZ = 1000
+SPEED = 3000
+SECONDS = 5
+TK_CALLBACK_US = 20  # Tk's own cost to dispatch one event or timer to Python
+RENDER_MS, RENDER_EVERY_MS = 3, 15
+KEYS = "abcdefghijkl"
+CELL_W = 40
+
+
+class SimLoop:
+    """Just enough of Tk's event loop: after(), after_cancel(), after_idle() and queued events."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.timers = []  # (due, seq, fn), kept sorted
+        self.idle = []
+        self.seq = 0
+        self.callbacks = 0
+
+    def after(self, ms, fn):
+        self.seq += 1
+        self.timers.append((self.clock.now + ms / 1000.0, self.seq, fn))
+        self.timers.sort()
+        return self.seq
+
+    def after_cancel(self, job):
+        self.timers = [t for t in self.timers if t[1] != job]
+
+    def after_idle(self, fn):
+        self.idle.append(fn)
+
+    def call(self, fn, *args):
+        self.callbacks += 1
+        self.clock.now += TK_CALLBACK_US / 1e6
+        t0 = time.perf_counter()
+        fn(*args)
+        self.clock.now += time.perf_counter() - t0
+
+    def run(self, events):
+        clock, i, n = self.clock, 0, len(events)
+        while i < n or self.timers or self.idle:
+            if i < n and events[i][0] <= clock.now:
+                while i < n and events[i][0] <= clock.now:
+                    self.call(events[i][1], events[i][2])
+                    i += 1
+            elif self.timers and self.timers[0][0] <= clock.now:
+                self.call(self.timers.pop(0)[2])
+            elif self.idle:
+                idle, self.idle = self.idle, []
+                for fn in idle: self.call(fn)
+            else:
+                clock.now = min(([events[i][0]] if i < n else []) + [t[0] for t in self.timers[:1]])
+
+
+class Event:
+    __slots__ = ('x_root', 'y_root', 'seq', 't')
+
+    def __init__(self, x, y, seq, t):
+        self.x_root, self.y_root, self.seq, self.t = x, y, seq, t
+
+
+class Harness:
+    """The slide path of the app on a simulated loop; subclasses are the two motion strategies."""
+
+    def __init__(self, busy):
+        self.clock = ManualClock()
+        self.loop = SimLoop(self.clock)
+        self.busy = busy
+        self.sink = RecordingBackend()
+        self.engine = InputEngine(self.sink, self.clock, threaded=False)
+        self.index = GridHitIndex([60], [CELL_W] * len(KEYS), {}, 1)
+        self.refs = {(0, c): ReplayCell((0, c), k, self.engine.compile(k)) for c, k in enumerate(KEYS)}
+        self.engine.set_targets(self.index, self.refs)
+        self.latency = Histogram()
+        self.key_latency = Histogram()
+        self.entered = {}  # cell -> time of the first sample inside it
+        self.cell = None
+        self.calls = self.stale = 0
+        self.handled_seq = -1
+        self.waiting = []  # (t, seq) of samples not covered yet
+
+    def fire(self, path, seq):
+        """What _process_motion does with a path, plus the bookkeeping."""
+        self.calls += 1
+        if seq < self.handled_seq: self.stale += 1
+        refs = self.refs
+        sent = self.engine.pointer_path([refs.get(cell) for cell in self.index.lookup_path(path)])
+        if seq > self.handled_seq: self.handled_seq = seq
+        now = self.clock.now
+        for target in sent:
+            t = self.entered.pop(target.grid_pos, None)
+            if t is not None: self.key_latency.record(int((now - t) * 1e9))
+        keep = []
+        for t, s in self.waiting:
+            if s <= self.handled_seq: self.latency.record(int((now - t) * 1e9))
+            else: keep.append((t, s))
+        self.waiting = keep
+
+    def render(self):
+        self.clock.now += RENDER_MS / 1000.0
+        if self.clock.now < self.end: self.loop.after(RENDER_EVERY_MS, self.render)
+
+    def run(self, slides):
+        events = []
+        for kind, t, x, y, seq in slides:
+            handler = {'down': self.on_press, 'move': self.on_motion, 'up': self.on_release}[kind]
+            events.append((t, handler, Event(x, y, seq, t)))
+        self.end = events[-1][0]
+        if self.busy: self.loop.after(RENDER_EVERY_MS, self.render)
+        self.loop.run(events)
+        return self.loop.callbacks
+
+    def sample(self, event):
+        """Bookkeeping for one motion sample, outside the strategy under test."""
+        self.waiting.append((event.t, event.seq))
+        cell = self.index.lookup(event.x_root, event.y_root)
+        if cell != self.cell:
+            self.cell = cell
+            if cell is not None: self.entered.setdefault(cell, event.t)
+
+    def on_press(self, event):
+        self.cell = self.index.lookup(event.x_root, event.y_root)
+        self.entered.clear()
+        self.engine.pointer_down(self.refs.get(self.cell))
+
+    def on_release(self, event):
+        self.engine.pointer_up()
+
+
+class OldThrottle(Harness):
+    """on_motion / _process_motion as they were, with the user-017 path from the last handled point."""
+
+    def __init__(self, busy):
+        super().__init__(busy)
+        self.last_motion_event = 0
+        self.motion_pending = False
+        self.pointer_xy = None
+
+    def on_press(self, event):
+        self.pointer_xy = (event.x_root, event.y_root)
+        super().on_press(event)
+
+    def on_release(self, event):
+        self.pointer_xy = None
+        super().on_release(event)
+
+    def on_motion(self, event):
+        self.sample(event)
+        current_time = self.clock.now * 1000
+        if current_time - self.last_motion_event < 2:
+            if not self.motion_pending:
+                self.motion_pending = True
+                self.loop.after(1, lambda: self._process_motion(event))
+            return
+        self.last_motion_event = current_time
+        self._process_motion(event)
+
+    def _process_motion(self, event):
+        self.motion_pending = False
+        x, y = event.x_root, event.y_root
+        start = self.pointer_xy or (x, y)
+        self.pointer_xy = (x, y)
+        self.fire([start, (x, y)], event.seq)
+
+
+class Coalesced(Harness):
+    def __init__(self, busy, tick_ms, by_cell):
+        super().__init__(busy)
+        self.motion = MotionCoalescer(self._process_motion, self.loop.after, self.loop.after_cancel,
+                                      self.index.lookup if by_cell else None, tick_ms, clock=self.clock)
+        self.seqs = {}
+
+    def on_press(self, event):
+        self.motion.begin(0, event.x_root, event.y_root)
+        super().on_press(event)
+
+    def on_release(self, event):
+        self.motion.end(0)
+        super().on_release(event)
+
+    def on_motion(self, event):
+        self.sample(event)
+        self.seqs[(event.x_root, event.y_root)] = event.seq
+        self.motion.add(0, event.x_root, event.y_root)
+
+    def _process_motion(self, pointer, path):
+        self.fire(path, self.seqs[path[-1]])
+
+
+def slide_events():
+    """(kind, t, x, y, seq) for back-and-forth slides, and the expected key codes."""
+    rng = random.Random(18)
+    width = CELL_W * len(KEYS)
+    out, expected = [], []
+    t, seq, i = 0.05, 0, 0
+    while t < SECONDS:
+        x0, x1 = (5, width - 15) if i % 2 == 0 else (width - 15, 5)
+        out.append(('down', t, x0, 30, seq))
+        x, step = float(x0), SPEED / HZ * (1 if x1 > x0 else -1)
+        while (x1 - x) * step > 0:
+            t += (1 + rng.uniform(-0.3, 0.3)) / 1000
+            x += step * (1 + rng.uniform(-0.3, 0.3))
+            seq += 1
+            # Distinct y per sample so the coalesced harness can map a point back to its sample
+            out.append(('move', t, round(x), 30 + seq % 20, seq))
+        out.append(('up', t + 0.001, out[-1][2], out[-1][3], seq))
+        order = KEYS if i % 2 == 0 else KEYS[::-1]
+        expected.extend(compile_key(k).codes[0] for k in order)
+        t += 0.05
+        i += 1
+    return out, expected
+
+
+def main():
+    events, expected = slide_events()
+    moves = sum(1 for e in events if e[0] == 'move')
+    duration = events[-1][1] - events[0][1]
+    for busy in (False, True):
+        rows = []
+        for name, make in (("after(1) throttle (old)", lambda: OldThrottle(busy)),
+                           ("coalescer, tick 2 ms", lambda: Coalesced(busy, 2, False)),
+                           ("coalescer, tick 16 ms + cell", lambda: Coalesced(busy, 16, True))):
+            h = make()
+            callbacks = h.run(events)
+            downs = [code for code, up in h.sink.events if not up]
+            got, want = Counter(downs), Counter(expected)
+            lat, key = h.latency.summary(), h.key_latency.summary()
+            rows.append((name, f"calls/s {h.calls / duration:4,.0f} (Tk {callbacks / duration:5,.0f})   stale {h.stale:3}"
+                               f"   key latency p50/p99 {key['p50'] / 1000:.2f} / {key['p99'] / 1000:.2f} ms"
+                               f"   sample p99/max {lat['p99'] / 1000:.2f} / {lat['max'] / 1000:5.2f} ms"
+                               f"   keys dropped {sum((want - got).values())} dup {sum((got - want).values())}"))
+        report(f"{HZ} Hz mouse, {moves:,} samples over {duration:.1f} s, {'busy' if busy else 'idle'} loop", rows)
+
+
+if __name__ == "__main__":
+    main()
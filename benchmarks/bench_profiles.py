@@ -0,0 +1,98 @@
+"""Profile switching: reloading a layout file vs the hot profile cache.
+
+"cold" is what Load did on every switch (parse, compile, build the hit
+index, plan the widgets); "hot" is ProfileCache.activate on a cached
+profile, the copy of its grid the editor works on, and the same widget
+plan, diffed against the previous profile's widgets the way refresh_grid
+applies it.  The plan size is the number of
+widget create/destroy/regrid/restyle steps Tk then has to carry out (the
+Tk time itself needs a display and is not measured here).
+
+Also checks profiles.CELL_BYTES against tracemalloc and shows LRU
+eviction under a small memory cap.
+"""
+import os
+import random
+import tempfile
+import tracemalloc
+
+from benchmarks.common import timeit, report
+from keypad import GridModel, InputEngine, RecordingBackend
+from keypad.layoutfile import load_layout, save_layout
+from keypad.profiles import CELL_BYTES, ProfileCache
+from keypad.reconcile import build_grid_specs, diff_specs
+
+BASE_UNIT = 10
+THEME = {"bg": "#f9f9f9", "btn_bg": "#ffffff", "btn_fg": "#000000", "btn_active": "#e0e0e0",
+         "header_bg": "#f9f9f9", "header_fg": "#000000", "accent": "#0078d7",
+         "relief": "flat", "border": 0, "gap": 1}
+SHAPES = {"rhythm 1x5": (1, 5), "fps 4x6": (4, 6), "mmo 8x12": (8, 12), "daw 20x20": (20, 20)}
+KEYS = list("asdfjklqwerzxcv") + ["ctrl+c", "shift+tab", "f5", "space", "enter", ""]
+
+
+def write_profiles(tmp):
+    rng = random.Random(1)
+    paths = {}
+    for name, (rows, cols) in SHAPES.items():
+        grid = GridModel.blank(rows, cols)
+        for cell in grid.cells: cell['key'] = rng.choice(KEYS)
+        if rows > 2: grid.merge(0, 0, 1, 1)
+        paths[name] = os.path.join(tmp, name + ".json")
+        save_layout(paths[name], grid, {"renderer": "buttons"})
+    return paths
+
+
+def plan(grid, current):
+    specs, _ = build_grid_specs(grid.row_sizes, grid.col_sizes, grid, THEME, False, BASE_UNIT)
+    p = diff_specs(current, specs)
+    return specs, len(p.create) + len(p.destroy) + len(p.regrid) + len(p.restyle)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_profiles(tmp)
+        engine = InputEngine(RecordingBackend(), threaded=False)
+        cache = ProfileCache(engine.compile, gap=THEME['gap'])
+        for path in paths.values(): cache.add(path)
+        order = list(paths)
+
+        rows = []
+        for i, name in enumerate(order):
+            prev = cache.get(paths[order[i - 1]]).grid
+            prev_specs, _ = plan(prev, {})
+            path = paths[name]
+
+            def cold():
+                grid, _ = load_layout(path, engine.compile)
+                grid.hit_index(THEME['gap'], (100, 100))
+                plan(grid, prev_specs)
+
+            def hot():
+                grid = cache.activate(path).grid.copy()
+                grid.hit_index(THEME['gap'], (100, 100))
+                plan(grid, prev_specs)
+            _, steps = plan(cache.get(path).grid, prev_specs)
+            c, h = timeit(cold, 20), timeit(hot, 20)
+            rows.append((f"{order[i - 1]} -> {name}",
+                         f"cold {c * 1e3:6.2f} ms   hot {h * 1e3:6.3f} ms   ({c / h:4.0f}x)   plan {steps} steps"))
+        report("profile switch (file reload vs cache)", rows)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        cold_cache = ProfileCache(engine.compile, gap=THEME['gap'])
+        for path in paths.values(): cold_cache.add(path)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        cells = sum(r * c for r, c in SHAPES.values())
+        mem_rows = [("measured", f"{used / 1024:,.0f} KiB for {cells} cells ({used / cells:.0f} B/cell)"),
+                    ("estimate", f"{cold_cache.nbytes / 1024:,.0f} KiB (CELL_BYTES = {CELL_BYTES})")]
+
+        small = ProfileCache(engine.compile, max_bytes=500 * CELL_BYTES, gap=THEME['gap'])
+        for name in order: small.add(paths[name])
+        for name in order: small.activate(paths[name])
+        mem_rows.append(("LRU, cap 500 cells", small.summary().replace("\n", ", ")))
+        report("profile cache memory", mem_rows)
+
+
+if __name__ == "__main__":
+    main()
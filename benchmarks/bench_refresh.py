@@ -0,0 +1,114 @@
+"""refresh_grid cost for typical design edits: full rebuild vs reconciliation.
+
+Tk calls are counted from the plan: a full rebuild destroys and recreates
+every widget (create + grid + one call per binding), the reconciler only
+issues the steps in its Plan.  Planning wall time is measured directly;
+real Tk wall time is added when a display is available.
+"""
+import copy
+
+from benchmarks.common import timeit, try_tk, report
+from keypad.reconcile import build_grid_specs, diff_specs, diff_tracks
+
+BASE_UNIT = 10
+THEME = {"bg": "#f9f9f9", "btn_bg": "#ffffff", "btn_fg": "#000000", "btn_active": "#e0e0e0",
+         "header_bg": "#f9f9f9", "header_fg": "#000000", "accent": "#0078d7",
+         "relief": "flat", "border": 0, "gap": 1}
+DARK = dict(THEME, bg="#202020", btn_bg="#2d2d2d", btn_fg="#ffffff", header_bg="#202020", accent="#007acc")
+BINDS = {'cell': 1, 'header': 1, 'corner': 0}  # one bindtags call: design handlers are bound once per app
+
+
+class State:
+    def __init__(self, rows, cols):
+        self.row_sizes, self.col_sizes = [40] * rows, [60] * cols
+        self.grid_data = {(r, c): {'key': 'a', 'span_r': 1, 'span_c': 1} for r in range(rows) for c in range(cols)}
+        self.theme = THEME
+        self.sel_cols = set()
+
+    def specs(self):
+        return build_grid_specs(self.row_sizes, self.col_sizes, self.grid_data, self.theme, True, BASE_UNIT,
+                                selected_cols=self.sel_cols)
+
+
+def edit_select_col(s): s.sel_cols.add(len(s.col_sizes) // 2)
+def edit_resize_col(s): s.col_sizes[1] = 90
+def edit_merge(s): s.grid_data[(0, 0)].update({'span_r': 2, 'span_c': 2})
+def edit_theme(s): s.theme = DARK
+def edit_add_row(s):
+    s.row_sizes.append(40)
+    for c in range(len(s.col_sizes)): s.grid_data[(len(s.row_sizes) - 1, c)] = {'key': '', 'span_r': 1, 'span_c': 1}
+
+EDITS = [("header select", edit_select_col), ("resize column", edit_resize_col),
+         ("merge 2x2", edit_merge), ("theme change", edit_theme), ("add row", edit_add_row)]
+
+
+def full_rebuild_calls(specs, tracks):
+    return sum(2 + 1 + BINDS[s.kind] for s in specs.values()) + len(tracks)  # destroy+create, grid, binds
+
+
+def reconcile_calls(plan, track_changes, specs):
+    return (len(plan.destroy) + len(plan.regrid) + len(plan.restyle) + len(track_changes)
+            + sum(2 + BINDS[specs[w].kind] for w in plan.create))
+
+
+def tk_time(root, state, edit):
+    """Wall time of applying one edit through real widgets, rebuild vs reconcile."""
+    import tkinter as tk
+    frame = tk.Frame(root)
+
+    def apply(specs, widgets, plan):
+        for wid in plan.destroy: widgets.pop(wid).destroy()
+        for wid in plan.create:
+            kind = specs[wid].kind
+            w = (tk.Button if kind == 'cell' else tk.Label)(frame, **dict(specs[wid].style))
+            w.grid(sticky="nsew", **dict(specs[wid].grid))
+            widgets[wid] = w
+        for wid in plan.regrid: widgets[wid].grid(**dict(specs[wid].grid))
+        for wid, ch in plan.restyle: widgets[wid].configure(**ch)
+        root.update_idletasks()
+
+    results = []
+    for incremental in (False, True):
+        s = copy.deepcopy(state)
+        before, _ = s.specs()
+        widgets = {}
+        apply(before, widgets, diff_specs({}, before))
+        edit(s)
+        after, _ = s.specs()
+        plan = diff_specs(before if incremental else {}, after)
+        if not incremental:
+            for w in widgets.values(): w.destroy()
+            widgets.clear()
+        results.append(timeit(lambda: apply(after, widgets, plan), repeat=1))
+        for w in widgets.values(): w.destroy()
+    frame.destroy()
+    return results
+
+
+def main():
+    root = try_tk()
+    for rows, cols in ((4, 5), (12, 20), (50, 50)):
+        out = []
+        for name, edit in EDITS:
+            state = State(rows, cols)
+            old_specs, old_tracks = state.specs()
+            edit(state)
+
+            def plan_once():
+                specs, tracks = state.specs()
+                return specs, tracks, diff_specs(old_specs, specs), diff_tracks(old_tracks, tracks)
+            specs, tracks, plan, track_changes = plan_once()
+            t = timeit(plan_once, repeat=3)
+            line = (f"{full_rebuild_calls(specs, tracks):>6} -> {reconcile_calls(plan, track_changes, specs):>5} Tk calls,"
+                    f" plan {t * 1e3:.2f} ms")
+            if root is not None and rows <= 12:
+                full, inc = tk_time(root, State(rows, cols), edit)
+                line += f", Tk {full * 1e3:.1f} -> {inc * 1e3:.1f} ms"
+            out.append((name, line))
+        report(f"refresh_grid {rows}x{cols} (full rebuild -> reconcile)", out)
+    if root is None: print("\n(Tk wall time skipped: no display)")
+    else: root.destroy()
+
+
+if __name__ == "__main__":
+    main()
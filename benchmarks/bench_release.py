@@ -0,0 +1,91 @@
+"""Key-release scheduling: one timer thread vs a thread per release.
+
+Jitter is how late each release fires relative to its intended deadline
+(press time + KEY_PRESS_DELAY); throughput is how fast presses can be
+scheduled.
+"""
+import threading
+import time
+
+from benchmarks.common import report
+from keypad import ReleaseScheduler
+
+DELAY_MS = 12
+PRESSES = 500
+SPACING_S = 0.002  # 500 presses/sec, a dense slide
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def jitter_rows(label, late):
+    ms = [v * 1e3 for v in late]
+    return [(f"{label} p50 late", f"{percentile(ms, 0.5):.3f} ms"),
+            (f"{label} p99 late", f"{percentile(ms, 0.99):.3f} ms"),
+            (f"{label} max late", f"{max(ms):.3f} ms")]
+
+
+def jitter_scheduler():
+    expected, late = {}, []
+    done = threading.Event()
+
+    def on_release(codes):
+        now = time.monotonic()
+        for code in codes: late.append(now - expected[code])
+        if len(late) == PRESSES: done.set()
+    sched = ReleaseScheduler(on_release)
+    for i in range(PRESSES):
+        expected[i] = time.monotonic() + DELAY_MS / 1000.0
+        sched.schedule(i, DELAY_MS)
+        time.sleep(SPACING_S)
+    done.wait(5)
+    sched.stop()
+    return late
+
+
+def jitter_threads():
+    late, lock = [], threading.Lock()
+
+    def release(deadline):
+        time.sleep(DELAY_MS / 1000.0)
+        with lock: late.append(time.monotonic() - deadline)
+    threads = []
+    for _ in range(PRESSES):
+        deadline = time.monotonic() + DELAY_MS / 1000.0
+        t = threading.Thread(target=release, args=(deadline,), daemon=True)
+        t.start()
+        threads.append(t)
+        time.sleep(SPACING_S)
+    for t in threads: t.join()
+    return late
+
+
+def throughput_scheduler(n):
+    sched = ReleaseScheduler(lambda codes: None)
+    t0 = time.perf_counter()
+    for i in range(n): sched.schedule(i % 64, DELAY_MS)
+    elapsed = time.perf_counter() - t0
+    sched.stop()
+    return n / elapsed
+
+
+def throughput_threads(n):
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=time.sleep, args=(DELAY_MS / 1000.0,), daemon=True) for _ in range(n)]
+    for t in threads: t.start()
+    elapsed = time.perf_counter() - t0
+    for t in threads: t.join()
+    return n / elapsed
+
+
+def main():
+    rows = jitter_rows("scheduler", jitter_scheduler()) + jitter_rows("thread/release", jitter_threads())
+    rows.append(("scheduler presses/sec", f"{throughput_scheduler(50000):,.0f}"))
+    rows.append(("thread/release presses/sec", f"{throughput_threads(2000):,.0f}"))
+    report(f"release scheduling, {PRESSES} presses at {1 / SPACING_S:.0f}/s", rows)
+
+
+if __name__ == "__main__":
+    main()
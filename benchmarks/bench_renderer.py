@@ -0,0 +1,88 @@
+"""Play-mode renderers: one Button per cell vs a single Canvas.
+
+Measures build time (widgets created and laid out), Python-side memory,
+Tk window count and the cost of one press-feedback flash (set + reset bg).
+Needs a display; prints a notice and exits otherwise.
+"""
+import tracemalloc
+
+from benchmarks.common import timeit, try_tk, report, fmt_ns
+from keypad import GridHitIndex, compile_key
+
+FLASHES = 2000
+THEME = {"grid_bg": "#d0d0d0", "btn_bg": "#ffffff", "btn_fg": "#000000", "separator": "#e0e0e0",
+         "border": 0, "gap": 1, "relief": "flat"}
+
+
+def layout(rows, cols):
+    keys = "asdfjkl;"
+    grid_data = {(r, c): {'key': keys[(r + c) % len(keys)], 'span_r': 1, 'span_c': 1}
+                 for r in range(rows) for c in range(cols)}
+    return [30] * rows, [30] * cols, grid_data
+
+
+def build_buttons(root, row_sizes, col_sizes, grid_data):
+    import tkinter as tk
+    frame = tk.Frame(root)
+    frame.pack()
+    for r, s in enumerate(row_sizes): frame.rowconfigure(r, minsize=s)
+    for c, s in enumerate(col_sizes): frame.columnconfigure(c, minsize=s)
+    cells = {}
+    for (r, c), cell in grid_data.items():
+        b = tk.Button(frame, text=cell['key'], bg=THEME['btn_bg'], fg=THEME['btn_fg'],
+                      relief=THEME['relief'], bd=0, highlightthickness=0)
+        b.grid(row=r, column=c, sticky="nsew", padx=(0, 1), pady=(0, 1))
+        cells[(r, c)] = b
+    root.update_idletasks()
+    return frame, cells
+
+
+def build_canvas(root, row_sizes, col_sizes, grid_data):
+    from keypad.tkcanvas import CanvasGrid
+    grid = CanvasGrid(root)
+    grid.canvas.pack()
+    index = GridHitIndex(row_sizes, col_sizes, grid_data, THEME['gap'])
+    actions = {cell['key']: compile_key(cell['key']) for cell in grid_data.values()}
+    cells = grid.render(index, grid_data, THEME, actions)
+    root.update_idletasks()
+    return grid.canvas, cells
+
+
+def measure(root, builder, rows, cols):
+    data = layout(rows, cols)
+    tracemalloc.start()
+    container, cells = builder(root, *data)
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    windows = len(container.winfo_children()) + 1
+    container.destroy()
+
+    build = timeit(lambda: builder(root, *data)[0].destroy(), repeat=3)
+    container, cells = builder(root, *data)
+    cell = cells[(rows // 2, cols // 2)]
+
+    def flash():
+        for _ in range(FLASHES):
+            orig = cell.cget('bg')
+            cell.config(bg="#aaaaaa")
+            cell.config(bg=orig)
+        root.update_idletasks()
+    t = timeit(flash, repeat=3)
+    container.destroy()
+    return [("build", f"{build * 1e3:.1f} ms"), ("python memory", f"{mem / 1024:.0f} KiB"),
+            ("Tk windows", str(windows)), ("feedback flash", fmt_ns(t, FLASHES))]
+
+
+def main():
+    root = try_tk()
+    if root is None:
+        print("bench_renderer: no display available, skipped")
+        return
+    for rows, cols in ((12, 20), (40, 40)):
+        for name, builder in (("buttons", build_buttons), ("canvas", build_canvas)):
+            report(f"{name} renderer {rows}x{cols}", measure(root, builder, rows, cols))
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
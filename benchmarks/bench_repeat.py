@@ -0,0 +1,92 @@
+"""Touch repeat with 10 held fingers: per-finger after() chains vs RepeatScheduler.
+
+Both models run on a simulated clock for DURATION seconds.  "after chains"
+mimics the old Tk code: every finger reschedules itself `interval` after
+its callback ran, callbacks share the Tk thread and each one is late by a
+random amount.  "scheduler" is one RepeatScheduler ticked by a thread that
+wakes at the next deadline with its own (smaller) wake-up lateness.
+Reports drift (repeats lost vs the ideal count), interval jitter, fairness
+across fingers and the real Python cost of one tick.
+"""
+import heapq
+import random
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad import ManualClock, RepeatScheduler
+
+FINGERS = 10
+INTERVAL_MS = 50
+DURATION = 10.0
+WORK = 0.0003          # send + feedback per fire
+TK_LATE = 0.004        # Tk event loop lateness, uniform 0..TK_LATE
+WAKE_LATE = 0.001      # Thread wake-up lateness, uniform 0..WAKE_LATE
+
+
+def after_chains(rng):
+    interval = INTERVAL_MS / 1000.0
+    fires = {f: [] for f in range(FINGERS)}
+    queue = [(interval, f) for f in range(FINGERS)]
+    heapq.heapify(queue)
+    busy = 0.0
+    while queue:
+        due, f = heapq.heappop(queue)
+        start = max(due, busy) + rng.uniform(0, TK_LATE)
+        if start > DURATION: continue
+        fires[f].append(start)
+        busy = start + WORK
+        heapq.heappush(queue, (busy + interval, f))  # after() counts from now
+    return fires
+
+
+def scheduler(rng):
+    clock = ManualClock()
+    fires = {f: [] for f in range(FINGERS)}
+
+    def fire(f):
+        fires[f].append(clock())
+        clock.advance(WORK)
+    rep = RepeatScheduler(fire, INTERVAL_MS, clock)
+    for f in range(FINGERS): rep.hold(f, f)
+    while True:
+        wake = max(rep.next_deadline(), clock()) + rng.uniform(0, WAKE_LATE)
+        if wake > DURATION: break
+        clock.now = wake
+        rep.tick()
+    return fires
+
+
+def summarize(fires):
+    interval = INTERVAL_MS / 1000.0
+    expected = int(DURATION / interval)
+    counts = [len(v) for v in fires.values()]
+    deviations = sorted(abs((b - a) - interval) for v in fires.values() for a, b in zip(v, v[1:]))
+    p99 = deviations[int(len(deviations) * 0.99)]
+    lost = 1 - sum(counts) / (expected * FINGERS)
+    return [("repeats/finger (ideal)", f"{sum(counts) / FINGERS:.1f} ({expected})"),
+            ("drift (repeats lost)", f"{lost * 100:.1f} %"),
+            ("interval jitter mean/p99", f"{sum(deviations) / len(deviations) * 1e3:.2f} / {p99 * 1e3:.2f} ms"),
+            ("fairness (max-min count)", str(max(counts) - min(counts)))]
+
+
+def main():
+    report(f"after chains, {FINGERS} fingers @ {INTERVAL_MS} ms for {DURATION:.0f} s",
+           summarize(after_chains(random.Random(1))))
+    report(f"RepeatScheduler, {FINGERS} fingers @ {INTERVAL_MS} ms for {DURATION:.0f} s",
+           summarize(scheduler(random.Random(1))))
+
+    clock = ManualClock()
+    rep = RepeatScheduler(lambda target: None, INTERVAL_MS, clock)
+    for f in range(FINGERS): rep.hold(f, f)
+    ticks = 10000
+
+    def run():
+        for _ in range(ticks):
+            clock.advance(INTERVAL_MS / 1000.0)
+            rep.tick()
+    t = timeit(run, repeat=3)
+    report("RepeatScheduler cost", [(f"tick, {FINGERS} fingers due", fmt_ns(t, ticks)),
+                                    ("per finger", fmt_ns(t, ticks * FINGERS))])
+
+
+if __name__ == "__main__":
+    main()
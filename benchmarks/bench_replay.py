@@ -0,0 +1,192 @@
+"""Replay recorded or canned input streams headlessly and check the keys that come out.
+
+Canned streams (written to a temporary trace and read back):
+  rhythm   4-key chart on the bundled 4k example layout, 16th notes at 180 BPM
+  mash     10 fingers tapping random cells of a 4x5 grid
+  slide    mouse slides across a 12-cell row at 3000 px/s, 60 Hz motion
+  holds    long notes (0.1-1 s) on the 4k layout, a second finger joining
+           the same lane on some of them
+
+For each stream: records, replay speed, keys emitted, dropped and duplicated
+key-downs against what the stream should produce, keys left stuck down and
+the wall cost per replayed record.  "HOLD mode" replays the same stream
+with every cell a HOLD cell and compares the injected events (key-downs
+plus key-ups) with the pulsed run.  Pass .ktrace files recorded from the
+app (Record Input in the control panel) to replay those instead:
+
+    python -m benchmarks.bench_replay session.ktrace
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+
+from benchmarks.common import report
+from keypad import compile_key
+from keypad.replay import (TOUCH, MOUSE_DOWN, MOUSE_MOVE, MOUSE_UP, Replayer, layout_from_grid,
+                           read_trace, write_trace)
+from keypad.touch import TOUCHEVENTF_DOWN, TOUCHEVENTF_MOVE, TOUCHEVENTF_UP
+
+ORIGIN = (100, 100)
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "4k rhythm game example.json")
+
+
+def load_example():
+    with open(EXAMPLE) as f: d = json.load(f)
+    grid_data = {tuple(int(v) for v in k.strip("()").split(",")): cell for k, cell in d["cells"].items()}
+    return d["row_sizes"], d["col_sizes"], grid_data
+
+
+def center(row_sizes, col_sizes, r, c):
+    return ORIGIN[0] + sum(col_sizes[:c]) + col_sizes[c] // 2, ORIGIN[1] + sum(row_sizes[:r]) + row_sizes[r] // 2
+
+
+def touch(t, x, y, tid, flags):
+    return (TOUCH, t, x * 100, y * 100, tid, flags, int(t * 1000))
+
+
+def codes(grid_data, pos):
+    action = compile_key(grid_data[pos]['key'])
+    return action.codes if action else ()
+
+
+def rhythm_stream(notes=2000, bpm=180):
+    """Taps of 30 ms on the four lanes of the example layout, sometimes two at once."""
+    rows, cols, grid = load_example()
+    lanes = [pos for pos, cell in sorted(grid.items()) if cell['key']]
+    rng = random.Random(4)
+    step = 60.0 / bpm / 4
+    events, expected = [], []
+    for i in range(notes):
+        t = 0.5 + i * step
+        chord = rng.sample(lanes, 2 if rng.random() < 0.15 else 1)
+        for tid, pos in enumerate(chord):
+            x, y = center(rows, cols, *pos)
+            events.append(touch(t, x, y, tid, TOUCHEVENTF_DOWN))
+            expected.extend(codes(grid, pos))
+        for tid, pos in enumerate(chord):
+            x, y = center(rows, cols, *pos)
+            events.append(touch(t + 0.030, x + 1, y, tid, TOUCHEVENTF_UP))
+    events.sort(key=lambda e: e[1])
+    return rows, cols, grid, events, expected
+
+
+def mash_stream(taps=4000, fingers=10):
+    """Ten fingers tapping random cells for 20-45 ms each, jittering while down."""
+    keys = "qwertasdfgzxcvb12345"
+    rows, cols = [60] * 4, [60] * 5
+    grid = {(r, c): {'key': keys[r * 5 + c], 'span_r': 1, 'span_c': 1} for r in range(4) for c in range(5)}
+    rng = random.Random(10)
+    free_at = [0.0] * fingers
+    events, expected = [], []
+    for _ in range(taps):
+        f = min(range(fingers), key=free_at.__getitem__)
+        t = free_at[f] + rng.uniform(0.005, 0.040)
+        pos = (rng.randrange(4), rng.randrange(5))
+        x, y = center(rows, cols, *pos)
+        hold = rng.uniform(0.020, 0.045)
+        events.append(touch(t, x, y, f, TOUCHEVENTF_DOWN))
+        events.append(touch(t + hold / 2, x + rng.randint(-5, 5), y + rng.randint(-5, 5), f, TOUCHEVENTF_MOVE))
+        events.append(touch(t + hold, x, y, f, TOUCHEVENTF_UP))
+        expected.extend(codes(grid, pos))
+        free_at[f] = t + hold
+    events.sort(key=lambda e: e[1])
+    return rows, cols, grid, events, expected
+
+
+def slide_stream(slides=300, speed=3000, hz=60):
+    """Mouse slides left and right across a row of narrow cells."""
+    keys = "abcdefghijkl"
+    rows, cols = [60], [40] * len(keys)
+    grid = {(0, c): {'key': k, 'span_r': 1, 'span_c': 1} for c, k in enumerate(keys)}
+    width = sum(cols)
+    y = ORIGIN[1] + 30
+    events, expected = [], []
+    t = 0.5
+    for i in range(slides):
+        xs = [ORIGIN[0] + 5 + d for d in range(0, width - 10, max(1, speed // hz))]
+        if i % 2: xs.reverse()
+        events.append((MOUSE_DOWN, t, xs[0], y, 0, 0, 0))
+        for x in xs[1:]:
+            t += 1.0 / hz
+            events.append((MOUSE_MOVE, t, x, y, 0, 0, 0))
+        events.append((MOUSE_UP, t, xs[-1], y, 0, 0, 0))
+        order = range(len(keys)) if i % 2 == 0 else reversed(range(len(keys)))
+        for c in order: expected.extend(codes(grid, (0, c)))
+        t += 0.1
+    return rows, cols, grid, events, expected
+
+
+def holds_stream(notes=500):
+    """Long notes, one lane at a time; every fifth gets a second finger on the same cell for a while."""
+    rows, cols, grid = load_example()
+    lanes = [pos for pos, cell in sorted(grid.items()) if cell['key']]
+    rng = random.Random(20)
+    events, expected = [], []
+    t = 0.5
+    for i in range(notes):
+        pos = rng.choice(lanes)
+        x, y = center(rows, cols, *pos)
+        hold = rng.uniform(0.1, 1.0)
+        events.append(touch(t, x, y, 0, TOUCHEVENTF_DOWN))
+        if i % 5 == 0:
+            events.append(touch(t + hold / 4, x + 3, y, 1, TOUCHEVENTF_DOWN))
+            events.append(touch(t + hold / 2, x + 3, y, 1, TOUCHEVENTF_UP))
+        events.append(touch(t + hold, x, y, 0, TOUCHEVENTF_UP))
+        expected.extend(codes(grid, pos))
+        t += hold + rng.uniform(0.05, 0.2)
+    events.sort(key=lambda e: e[1])
+    return rows, cols, grid, events, expected
+
+
+def check(rp, expected):
+    got, want = Counter(rp.key_downs()), Counter(expected)
+    return sum((want - got).values()), sum((got - want).values())
+
+
+def replay(layout, events, expected=None):
+    rp = Replayer(layout)
+    wall = rp.run(events)
+    downs = rp.key_downs()
+    span = events[-1][1] - events[0][1] if events else 0.0
+    cost = rp.event_cost.summary()
+    rows = [("records", f"{len(events):,} over {span:.1f} s"),
+            ("replay records/sec", f"{len(events) / wall:,.0f} ({span / wall:,.0f}x real time)"),
+            ("keys emitted", f"{len(downs):,} down, {len(rp.sink.events) - len(downs):,} up")]
+    if expected is not None:
+        dropped, duplicated = check(rp, expected)
+        rows.append(("dropped key-downs", str(dropped)))
+        rows.append(("duplicated key-downs", str(duplicated)))
+    rows.append(("keys stuck down", str(len(rp.stuck_keys()))))
+    rows.append(("cost/record p50/p99/max", f"{cost['p50']:.1f} / {cost['p99']:.1f} / {cost['max']:.1f} us"))
+    if not layout.get("hold"):
+        held = Replayer(dict(layout, hold=True), measure=False)
+        held.run(events)
+        pulsed, sent = len(rp.sink.events), len(held.sink.events)
+        line = f"{sent:,} events vs {pulsed:,} pulsed, {pulsed - sent:,} saved ({(pulsed - sent) / max(pulsed, 1):.0%})"
+        # A finger landing on a cell another finger already holds sends nothing, so "short" counts those
+        if expected is not None: line += "   key-downs short %d dup %d" % check(held, expected)
+        rows.append(("HOLD mode", line + f"   stuck {len(held.stuck_keys())}"))
+    return rows
+
+
+def main():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            layout, events = read_trace(path)
+            report(f"replay {os.path.basename(path)}", replay(layout, events))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in (("rhythm", rhythm_stream), ("mash", mash_stream), ("slide", slide_stream),
+                           ("holds", holds_stream)):
+            rows, cols, grid, events, expected = make()
+            path = os.path.join(tmp, name + ".ktrace")
+            write_trace(path, layout_from_grid(rows, cols, grid, 1, ORIGIN), events)
+            layout, events = read_trace(path)
+            report(f"replay {name} ({os.path.getsize(path) / 1024:.0f} KiB trace)", replay(layout, events, expected))
+
+
+if __name__ == "__main__":
+    main()
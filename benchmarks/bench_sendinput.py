@@ -0,0 +1,60 @@
+"""Per-call cost of building SendInput arguments.
+
+"legacy" rebuilds the structs on every call the way PressKey/ReleaseKey
+did; "prebuilt" goes through SendInputBackend and its InputTable.
+SendInput itself is a stub, so only the Python/ctypes side is measured.
+Transient allocation is the tracemalloc peak above baseline for one call.
+"""
+import ctypes
+import tracemalloc
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad.keys import SCAN_CODES
+from keypad.sendinput import Input, Input_I, KeyBdInput, SendInputBackend
+
+CALLS = 20000
+
+
+def stub_send_input(n, ptr, size):
+    return n
+
+
+def legacy_press(code):
+    extra = ctypes.c_ulong(0)
+    ii_ = Input_I()
+    ii_.ki = KeyBdInput(0, code, 0x0008, 0, ctypes.pointer(extra))
+    x = Input(ctypes.c_ulong(1), ii_)
+    stub_send_input(1, ctypes.pointer(x), ctypes.sizeof(x))
+
+
+def transient_bytes(fn):
+    fn()  # warm caches
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def main():
+    backend = SendInputBackend(stub_send_input, codes=SCAN_CODES.values())
+    down = (SCAN_CODES['a'], False)
+    chord = [(SCAN_CODES[k], False) for k in 'asdf']
+    cases = [
+        ("legacy single", lambda: legacy_press(SCAN_CODES['a'])),
+        ("prebuilt single", lambda: backend.send((down,))),
+        ("legacy 4-key frame", lambda: [legacy_press(c) for c, _ in chord]),
+        ("prebuilt 4-key frame", lambda: backend.send(chord)),
+    ]
+    rows = []
+    for name, fn in cases:
+        t = timeit(lambda: [fn() for _ in range(CALLS)], repeat=3)
+        rows.append((f"{name} per call", fmt_ns(t, CALLS)))
+        rows.append((f"{name} transient alloc", f"{transient_bytes(fn)} B"))
+    report("SendInput argument construction", rows)
+
+
+if __name__ == "__main__":
+    main()
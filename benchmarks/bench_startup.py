@@ -0,0 +1,102 @@
+"""Cold start of the app: module import cost and time to the first frame.
+
+  import    `python -X importtime -c "import virtual_keypad"` in a fresh
+            interpreter: total, the heaviest modules (self time), and
+            that keyboard, pywin32, winreg and the Tk dialogs are not
+            among them (they load on first use)
+  launch    a fresh interpreter that builds VirtualKeyboardApp and runs
+            the event loop until the keypad is drawn, then until the
+            control panel is built; times from interpreter start.  Needs
+            Windows and a display, skipped otherwise
+
+Each figure is the median of RUNS fresh processes.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+RUNS = 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("keyboard", "win32gui", "win32con", "winreg", "tkinter.filedialog", "tkinter.colorchooser")
+BUDGET_MS = 200
+
+LAUNCH = r"""
+import sys, time
+t0 = float(sys.argv[1])
+ms = lambda: (time.perf_counter() - t0) * 1000
+import virtual_keypad
+t_import = ms()
+app = virtual_keypad.VirtualKeyboardApp()
+t_init = ms()
+app.update()  # pending geometry and redraws: the keypad is on screen and takes input
+t_frame = ms()
+while app._panel is None: app.update()
+print(t_import, t_init, t_frame, ms(), flush=True)
+import os; os._exit(0)
+"""
+
+
+def run(args):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True)
+
+
+def import_times():
+    """(total us, {module: self us}, loaded deferred modules) for one fresh import."""
+    code = "import sys, virtual_keypad; print(' '.join(m for m in %r if m in sys.modules))" % (DEFERRED,)
+    proc = run(["-X", "importtime", "-c", code])
+    if proc.returncode: raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    own, total = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        own[name.strip()] = int(self_us)
+        if name == " virtual_keypad": total = int(cumulative)
+    return total, own, proc.stdout.split()
+
+
+def launch_times():
+    """(import, __init__, first frame, panel) ms from interpreter start, or None with the reason."""
+    script = "import time, subprocess, sys; t0 = time.perf_counter(); " \
+             "p = subprocess.run([sys.executable, '-c', sys.argv[1], repr(t0)], capture_output=True, text=True); " \
+             "print(p.stdout if p.returncode == 0 else 'ERR ' + (p.stderr.strip().splitlines() or ['?'])[-1])"
+    proc = run(["-c", script, LAUNCH])
+    out = proc.stdout.strip()
+    if not out or out.startswith("ERR"): return None, out[4:] or proc.stderr.strip()
+    return [float(v) for v in out.split()], None
+
+
+def main():
+    try:
+        samples = [import_times() for _ in range(RUNS)]
+    except RuntimeError as e:
+        report("import virtual_keypad", [("skipped", str(e))])
+        return
+    totals = [s[0] for s in samples]
+    own = {name: statistics.median(s[1].get(name, 0) for s in samples) for name in samples[0][1]}
+    heavy = sorted(own.items(), key=lambda kv: -kv[1])[:6]
+    loaded = sorted(set(m for s in samples for m in s[2]))
+    rows = [("total", f"{statistics.median(totals) / 1000:.1f} ms (min {min(totals) / 1000:.1f})")]
+    rows += [(f"  {name}", f"{us / 1000:.1f} ms self") for name, us in heavy]
+    rows.append(("deferred modules loaded", ", ".join(loaded) if loaded else "none"))
+    report(f"import virtual_keypad, median of {RUNS}", rows)
+
+    runs = []
+    for _ in range(RUNS):
+        times, reason = launch_times()
+        if times is None:
+            report("launch", [("skipped", reason)])
+            return
+        runs.append(times)
+    med = [statistics.median(t[i] for t in runs) for i in range(4)]
+    report(f"launch, ms from interpreter start, median of {RUNS}", [
+        ("imports done", f"{med[0]:.0f}"),
+        ("app built", f"{med[1]:.0f}"),
+        ("first frame", f"{med[2]:.0f}" + ("" if med[2] <= BUDGET_MS else f"   over the {BUDGET_MS} ms budget")),
+        ("control panel", f"{med[3]:.0f}")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Theme switch on a 20x20 grid: rebuild vs in-place restyle from style records.
+
+  records       keypad.theme: building a theme's records vs the cached
+                theme_styles lookup every later call costs
+  plan          build_grid_specs + diff_specs for the switch, and how many
+                widgets it configures (rebuild: every widget recreated)
+  Tk            the switch applied to real design-mode widgets, rebuilt
+                vs reconfigured in place; canvas renderer redrawn vs
+                recolored by item tag.  Needs a display
+  poll          one Follow System poll (two cached registry reads).
+                Windows only
+
+Switches: Light -> Dark, a new accent color only, and re-applying the same
+theme (nothing to do).
+"""
+import sys
+
+from benchmarks.common import timeit, try_tk, report, fmt_ns
+from keypad import GridModel
+from keypad.reconcile import build_grid_specs, diff_specs
+from keypad.theme import theme_styles
+import keypad.theme
+
+ROWS = COLS = 20
+BASE_UNIT = 10
+LIGHT = {"bg": "#f9f9f9", "fg": "#000000", "grid_bg": "#d0d0d0", "btn_bg": "#ffffff", "btn_fg": "#000000",
+         "btn_hover": "#0078d7", "btn_active": "#e0e0e0", "header_bg": "#f9f9f9", "header_fg": "#000000",
+         "accent": "#0078d7", "relief": "flat", "border": 0, "gap": 1, "separator": "#e0e0e0",
+         "slider_bg": "#f9f9f9", "slider_trough": "#e0e0e0", "slider_active": "#0078d7"}
+DARK = dict(LIGHT, bg="#202020", fg="#ffffff", grid_bg="#3a3a3a", btn_bg="#2d2d2d", btn_fg="#ffffff",
+            btn_hover="#007acc", btn_active="#404040", header_bg="#202020", header_fg="#aaaaaa", accent="#007acc",
+            separator="#3a3a3a", slider_bg="#202020", slider_trough="#404040", slider_active="#007acc")
+ACCENT = dict(LIGHT, accent="#e81123", btn_hover="#e81123", slider_active="#e81123")
+SWITCHES = (("Light -> Dark", LIGHT, DARK), ("accent only", LIGHT, ACCENT), ("same theme", LIGHT, dict(LIGHT)))
+
+
+def grid():
+    return GridModel([40] * ROWS, [60] * COLS, {(r, c): {'key': 'asdf'[(r + c) % 4]} for r in range(ROWS) for c in range(COLS)})
+
+
+def specs(g, theme, selected=((0, 0), (1, 1))):
+    return build_grid_specs(g.row_sizes, g.col_sizes, g, theme, True, BASE_UNIT, selected)[0]
+
+
+def tk_switch(root, g, before, after):
+    """(rebuild, in place) seconds for one switch on real widgets."""
+    import tkinter as tk
+    frame = tk.Frame(root)
+
+    def apply(plan, desired, widgets):
+        for wid in plan.destroy: widgets.pop(wid).destroy()
+        for wid in plan.create:
+            spec = desired[wid]
+            w = (tk.Button if spec.kind == 'cell' else tk.Label)(frame, **dict(spec.style))
+            w.grid(sticky="nsew", **dict(spec.grid))
+            widgets[wid] = w
+        for wid, ch in plan.restyle: widgets[wid].configure(**ch)
+        root.update_idletasks()
+
+    old, new = specs(g, before), specs(g, after)
+    times = []
+    for in_place in (False, True):
+        widgets = {}
+        apply(diff_specs({}, old), old, widgets)
+        if not in_place:
+            for w in widgets.values(): w.destroy()
+            widgets.clear()
+        plan = diff_specs(old if in_place else {}, new)
+        times.append(timeit(lambda: apply(plan, new, widgets), repeat=1))
+        for w in widgets.values(): w.destroy()
+    frame.destroy()
+    return times
+
+
+def canvas_switch(root, g, before, after):
+    """(redraw, recolor) seconds for the canvas renderer."""
+    from keypad.tkcanvas import CanvasGrid
+    cg = CanvasGrid(root)
+    index = g.hit_index(before['gap'])
+    cg.render(index, g, before, {})
+    t_draw = timeit(lambda: (cg.render(index, g, after, {}), root.update_idletasks()), repeat=3)
+
+    def recolor():
+        cg.render(index, g, before, {})
+        root.update_idletasks()
+        t0 = timeit(lambda: (cg.restyle(after), root.update_idletasks()), repeat=1)
+        return t0
+    t_restyle = min(recolor() for _ in range(3))
+    cg.canvas.destroy()
+    return t_draw, t_restyle
+
+
+def main():
+    g = grid()
+    t_build = timeit(lambda: keypad.theme._build(DARK), 20)
+    t_hit = timeit(lambda: theme_styles(DARK), 20)
+    report("style records", [("build", fmt_ns(t_build)), ("cached lookup", fmt_ns(t_hit))])
+
+    root = try_tk()
+    for name, before, after in SWITCHES:
+        old = specs(g, before)
+        plan = diff_specs(old, specs(g, after))
+        t_plan = timeit(lambda: diff_specs(old, specs(g, after)), 5)
+        rows = [("plan", f"{t_plan * 1e3:.2f} ms   configures {len(plan.restyle)} of {len(old)} widgets"
+                         f"   (rebuild: {len(old)} recreated)")]
+        if root is None: rows.append(("Tk", "skipped (no display)"))
+        else:
+            full, in_place = tk_switch(root, g, before, after)
+            rows.append(("Tk buttons", f"rebuild {full * 1e3:.1f} ms   in place {in_place * 1e3:.1f} ms"))
+            draw, recolor = canvas_switch(root, g, before, after)
+            rows.append(("Tk canvas", f"redraw {draw * 1e3:.1f} ms   recolor {recolor * 1e3:.2f} ms"))
+        report(f"theme switch {ROWS}x{COLS}, {name}", rows)
+    if root is not None: root.destroy()
+
+    if sys.platform != "win32":
+        report("Follow System poll", [("skipped", "needs the Windows registry")])
+        return
+    import virtual_keypad
+    virtual_keypad.get_system_mode(), virtual_keypad.get_system_accent()
+    t = timeit(lambda: (virtual_keypad.get_system_mode(), virtual_keypad.get_system_accent()), 50)
+    report("Follow System poll", [("registry reads", f"{fmt_ns(t)} per poll, "
+                                   f"every {virtual_keypad.SYSTEM_THEME_POLL_MS} ms")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Touch pipeline: time spent inside the window procedure, inline vs ring + input thread.
+
+Synthetic TOUCHINPUT frames (four fingers down, moving, up) are pushed
+through both paths.  "inline" decodes, hit-tests and sends inside the
+wndproc like the old _handle_wm_touch; "ring" only copies the records and
+lets the input thread do the rest.  Also checks that both paths emit the
+same keys in the same order.
+"""
+import time
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad import GridHitIndex, KeyDispatcher, RecordingBackend, compile_key
+from keypad.touch import (TOUCHEVENTF_DOWN, TOUCHEVENTF_MOVE, TOUCHEVENTF_UP,
+                          TouchRing, TouchProcessor, TouchInputThread, make_touch_inputs)
+
+FRAMES = 3000
+ORIGIN = (100, 100)
+
+
+class Cell:
+    def __init__(self, key):
+        self.action = compile_key(key)
+
+
+def make_frames():
+    """Four fingers on the 4k row: down, 8 small moves, up."""
+    xs = [130, 230, 330, 430]
+    frames = [make_touch_inputs([(x, 150, i, TOUCHEVENTF_DOWN, 0) for i, x in enumerate(xs)])]
+    for step in range(8):
+        frames.append(make_touch_inputs([(x + step, 150 + step, i, TOUCHEVENTF_MOVE, 0) for i, x in enumerate(xs)]))
+    frames.append(make_touch_inputs([(x, 150, i, TOUCHEVENTF_UP, 0) for i, x in enumerate(xs)]))
+    return frames
+
+
+def make_processor(sink):
+    grid_data = {(0, c): {'key': k, 'span_r': 1, 'span_c': 1} for c, k in enumerate("asdkl")}
+    index = GridHitIndex([200], [100] * 5, grid_data, gap=1, origin=ORIGIN)
+    targets = {(0, c): Cell(k) for c, k in enumerate("asdkl")}
+    dispatcher = KeyDispatcher(sink)
+
+    def hit(cell):
+        for code, _ in cell.action.down: dispatcher.press(code)
+    proc = TouchProcessor(hit, lambda finger, cell: None, dispatcher)
+    proc.snapshot = (index, targets)
+    return proc
+
+
+def ring_records(arr):
+    return [(ti.x, ti.y, ti.dwID, ti.dwFlags, ti.dwTime, ti.dwExtraInfo) for ti in arr]
+
+
+def main():
+    frames = make_frames()
+    stream = [frames[i % len(frames)] for i in range(FRAMES)]
+
+    inline_sink = RecordingBackend()
+    proc = make_processor(inline_sink)
+
+    def inline():
+        for arr in stream: proc.process(ring_records(arr))
+    t_inline = timeit(inline, repeat=1)
+
+    thread_sink = RecordingBackend()
+    ring = TouchRing(capacity=FRAMES * 4)  # Room for the whole burst: measure cost, not overflow
+    worker = TouchInputThread(ring, make_processor(thread_sink))
+    # Producer cost alone: what the wndproc pays before returning to Windows
+    t0 = time.perf_counter()
+    for arr in stream: ring.push(arr, len(arr))
+    t_push = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    worker.start()
+    while len(ring): time.sleep(0.001)
+    worker.stop()
+    t_total = time.perf_counter() - t0
+
+    assert inline_sink.events == thread_sink.events, "ring path changed key order"
+    report(f"touch pipeline, {FRAMES} WM_TOUCH frames x 4 fingers", [
+        ("inline wndproc time/frame", fmt_ns(t_inline, FRAMES)),
+        ("ring wndproc time/frame", fmt_ns(t_push, FRAMES)),
+        ("input thread frames/sec", f"{FRAMES / t_total:,.0f}"),
+        ("keys emitted", f"{len(thread_sink.events):,}"),
+        ("records dropped", str(ring.dropped)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Always-on event trace (keypad.eventtrace): hot-path cost, flushing and reading.
+
+  log           one EventTrace.log call, next to an empty Python call of
+                the same arity and the `trace is not None` test a call site
+                pays with tracing off
+  engine        InputEngine hits, slide-mode moves and raw touch records
+                with and without a trace attached (RecordingBackend)
+  threads       4 writer threads into one small ring: every record the
+                flusher wrote is present exactly once, seqs in order
+  stale         a slot whose writer has not filled it yet stops the flush
+                there, even behind many finished writes; finger ids >= 2**31
+  flush         ring -> rotating files, and what a too-small ring loses
+  read          decoding the files back, cell filtering and the summary
+"""
+import os
+import tempfile
+import threading
+
+from benchmarks.common import timeit, report, fmt_ns
+from benchmarks.bench_engine import EVENTS, make_engine
+from benchmarks.bench_touch_pipeline import make_frames, ring_records
+from keypad.eventtrace import (EventTrace, HIT, HIT_SENT, KEY_DOWN, KEY_UP, LOST, NO_FINGER, RECORD, SEQ_MASK, SIZE,
+                               TOUCH_MOVE, load, trace_paths)
+from keypad.readtrace import cell_names, summarize
+
+N = 200000
+THREADS = 4
+
+
+def log_cost():
+    trace = EventTrace()
+    log = trace.log
+    empty = lambda kind, cell=-1, finger=NO_FINGER, code=0, flag=0, x=0, y=0: None
+    off = None
+    rng = range(N)
+
+    def loop():
+        for i in rng: pass
+
+    def logged():
+        for i in rng: log(TOUCH_MOVE, 12, 3, 0, 0, 640, 480)
+
+    def called():
+        for i in rng: empty(TOUCH_MOVE, 12, 3, 0, 0, 640, 480)
+
+    def checked():
+        for i in rng:
+            if off is not None: off(TOUCH_MOVE)
+    t_loop = timeit(loop, 3)
+    t_log = timeit(logged, 3) - t_loop
+    t_call = timeit(called, 3) - t_loop
+    t_off = max(0, timeit(checked, 3) - t_loop)
+    return [("log", f"{fmt_ns(t_log, N)}   ({t_log / t_call:.1f}x an empty call, {fmt_ns(t_call, N)})"),
+            ("tracing off", f"{fmt_ns(t_off, N)} per call site")]
+
+
+def engine_cost():
+    rows = []
+    frames = [ring_records(arr) for arr in make_frames()]
+    stream = [frames[i % len(frames)] for i in range(EVENTS // 4)]
+    for traced in (False, True):
+        engine, index, targets = make_engine()
+        trace = EventTrace() if traced else None
+        engine.set_trace(trace)
+        cells = [targets[(0, c)] for c in range(5)]
+        moves = [cells[i % 5] for i in range(EVENTS)]
+
+        def slide():
+            engine.pointer_down(cells[0])
+            for cell in moves: engine.pointer_move(cell)
+            engine.pointer_up()
+        t_hit = timeit(lambda: [engine.hit(c, True) for c in moves], 3)
+        t_slide = timeit(slide, 3)
+        t_touch = timeit(lambda: [engine.processor.process(r) for r in stream], 3)
+        n = 0 if trace is None else len(trace.records())
+        rows.append(("traced" if traced else "untraced",
+                     f"hit {fmt_ns(t_hit, EVENTS)}   slide move {fmt_ns(t_slide, EVENTS)}   "
+                     f"touch record {fmt_ns(t_touch, len(stream))}" + (f"   ({n:,} events in ring)" if traced else "")))
+        engine.stop()
+    return rows
+
+
+def thread_check(directory):
+    trace = EventTrace(directory, capacity=1 << 12, flush_ms=1)
+
+    def writer(finger):
+        log = trace.log
+        for i in range(N // THREADS): log(TOUCH_MOVE, i & 0xFFFF, finger)
+    threads = [threading.Thread(target=writer, args=(f,)) for f in range(THREADS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    trace.close()
+    events = load([directory])
+    seqs = [e.seq for e in events if e.kind != LOST]
+    lost = sum(e.x for e in events if e.kind == LOST)
+    ordered = all(a < b for a, b in zip(seqs, seqs[1:]))
+    # Per finger, the writes that survived are that thread's loop counter, strictly rising
+    per_finger = {}
+    for e in events:
+        if e.kind == TOUCH_MOVE: per_finger.setdefault(e.finger, []).append(e.cell)
+    rising = all(all(a < b for a, b in zip(v, v[1:])) for v in per_finger.values())
+    return [("records", f"{len(seqs):,} written + {lost:,} lost = {len(seqs) + lost:,} of {N:,}"),
+            ("seqs unique and in order", "yes" if ordered and len(set(seqs)) == len(seqs) else "NO"),
+            ("each thread's records in order", "yes" if rising else "NO")]
+
+
+def stale_check(directory):
+    trace = EventTrace(directory, capacity=1 << 10, flush_ms=60000)
+    for i in range(100): trace.log(TOUCH_MOVE, i, 0xFFFFFFF0 + i % 8)
+    slot = bytes(trace.buf[10 * SIZE:11 * SIZE])
+    RECORD.pack_into(trace.buf, 10 * SIZE, 0, (10 - trace.capacity) & SEQ_MASK, 0, 0, 0, 0, 0, 0, 0)
+    first = trace.flush()
+    trace.buf[10 * SIZE:11 * SIZE] = slot
+    second = trace.flush()
+    trace.close()
+    events = load([directory])
+    fingers = {e.finger for e in events if e.kind == TOUCH_MOVE}
+    return [("flushed", f"{first} before the slot is filled, {second} after"),
+            ("records read back", f"{len(events)} in order" if [e.cell for e in events] == list(range(100)) else "NO"),
+            ("finger ids >= 2**31", "kept" if fingers == {0xFFFFFFF0 + k for k in range(8)} else "NO")]
+
+
+def flush_cost(directory):
+    trace = EventTrace(directory, capacity=1 << 16, flush_ms=60000, max_bytes=1 << 20, keep=3)
+    log = trace.log
+    for i in range(N):
+        log(HIT, i % 400, NO_FINGER, 0, HIT_SENT)
+        if i % 60000 == 59999: trace.flush()
+    trace.flush()
+    for i in range(N // 4): log(KEY_DOWN if i & 1 == 0 else KEY_UP, -1, NO_FINGER, 0x1e)
+    t = timeit(lambda: trace.flush(), 1)
+    trace.close()
+    files = trace_paths(directory)
+    size = sum(os.path.getsize(p) for p in files)
+    small = EventTrace(directory + "-small", capacity=1 << 10, flush_ms=60000)
+    for i in range(N // 10): small.log(HIT, i % 400, NO_FINGER, 0, HIT_SENT)
+    small.close()
+    return [("flush", f"{fmt_ns(t, N // 4)} per record ({N // 4:,} records)"),
+            ("files", f"{len(files)} kept, {size / (1 << 20):.1f} MiB (1 MiB cap each, {N + N // 4:,} records logged)"),
+            ("ring of 1,024, no flush", f"{small.lost:,} of {N // 10:,} lost, counted in a LOST record")]
+
+
+def read_cost(directory):
+    t_load = timeit(lambda: load([directory]), 3)
+    events = load([directory])
+    t_names = timeit(lambda: cell_names(events), 3)
+    names = cell_names(events)
+    t_sum = timeit(lambda: summarize(events, names), 3)
+    t_cell = timeit(lambda: [e for e in events if e.cell == 12], 3)
+    return [("decode", f"{fmt_ns(t_load, len(events))} per event ({len(events):,})"),
+            ("cell names", fmt_ns(t_names, len(events))),
+            ("filter by cell", fmt_ns(t_cell, len(events))),
+            ("summary", f"{t_sum * 1e3:.0f} ms")]
+
+
+def main():
+    report(f"log, {N:,} events", log_cost())
+    report(f"InputEngine, {EVENTS:,} events", engine_cost())
+    with tempfile.TemporaryDirectory() as tmp:
+        report(f"{THREADS} threads, ring of 4,096, flushed every 1 ms", thread_check(os.path.join(tmp, "threads")))
+        report("a slot claimed but not yet filled", stale_check(os.path.join(tmp, "stale")))
+        report("flush to rotating files", flush_cost(os.path.join(tmp, "flush")))
+        report("reader", read_cost(os.path.join(tmp, "flush")))
+
+
+if __name__ == "__main__":
+    main()
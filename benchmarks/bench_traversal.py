@@ -0,0 +1,144 @@
+"""Slide-mode path traversal: fast swipes must fire every cell they cross.
+
+Synthetic straight swipes at 3000 px/s in random directions over a grid
+with uneven track sizes, merged cells and a gap, sampled at the rates a
+mouse or touch screen delivers.  Each swipe is replayed through the
+engine twice, as WM_TOUCH moves and as a mouse slide, and the cells that
+fired (in order, repeats of the held cell folded) are checked against the
+cells the swipe really crosses, found by sampling the line every 0.1 px.
+"endpoint only" is what firing the cell under each sample did before.
+
+Then the cost of one GridHitIndex.segment call per sample against the
+single lookup it replaces.
+"""
+import math
+import random
+
+from benchmarks.common import timeit, report, fmt_ns
+from keypad.hittest import GridHitIndex
+from keypad.replay import MOUSE_DOWN, MOUSE_MOVE, MOUSE_UP, TOUCH, Replayer, layout_from_grid
+from keypad.touch import TOUCHEVENTF_DOWN, TOUCHEVENTF_MOVE, TOUCHEVENTF_UP
+
+ORIGIN = (100, 100)
+GAP = 2
+SPEED = 3000  # px/s
+KEYS = list("abcdefghijklmnopqrstuvwxyz0123456789") + [f"f{i}" for i in range(1, 13)]
+
+
+def make_layout():
+    rng = random.Random(17)
+    rows, cols = [rng.choice((24, 40, 56)) for _ in range(6)], [rng.choice((20, 32, 48, 64)) for _ in range(8)]
+    grid = {(r, c): {'key': KEYS[r * 8 + c], 'span_r': 1, 'span_c': 1} for r in range(6) for c in range(8)}
+    for r, c in ((1, 1), (3, 4), (4, 0)): grid[(r, c)].update(span_r=2, span_c=2)
+    return rows, cols, grid
+
+
+def swipes(index, count, rng):
+    """Straight swipes as (x0, y0, x1, y1) in screen px, long enough to cross several cells."""
+    w, h = index.col_offsets[-1], index.row_offsets[-1]
+    out = []
+    while len(out) < count:
+        x0, y0, x1, y1 = rng.uniform(0, w), rng.uniform(0, h), rng.uniform(0, w), rng.uniform(0, h)
+        if math.hypot(x1 - x0, y1 - y0) > 120 and index.cell_at(x0, y0):
+            out.append((x0 + ORIGIN[0], y0 + ORIGIN[1], x1 + ORIGIN[0], y1 + ORIGIN[1]))
+    return out
+
+
+def samples(swipe, hz):
+    """Integer sample points of one swipe at SPEED, first and last included."""
+    x0, y0, x1, y1 = swipe
+    n = max(1, math.ceil(math.hypot(x1 - x0, y1 - y0) / (SPEED / hz)))
+    return [(round(x0 + (x1 - x0) * i / n), round(y0 + (y1 - y0) * i / n)) for i in range(n + 1)]
+
+
+def fold(seq):
+    out = []
+    for v in seq:
+        if not out or out[-1] != v: out.append(v)
+    return out
+
+
+def crossed(index, points):
+    """Cells under the sampled polyline, densely: the reference."""
+    out = []
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        n = max(1, int(math.hypot(x1 - x0, y1 - y0) * 10))
+        out.extend(index.lookup(x0 + (x1 - x0) * i / n, y0 + (y1 - y0) * i / n) for i in range(n + 1))
+    return fold(a for a in out if a)
+
+
+def is_subsequence(want, got):
+    it = iter(got)
+    return all(v in it for v in want)
+
+
+def replay_swipe(layout, points, dt, as_touch):
+    events, t = [], 0.1
+    for i, (x, y) in enumerate(points):
+        if as_touch:
+            flags = TOUCHEVENTF_DOWN if i == 0 else TOUCHEVENTF_MOVE
+            events.append((TOUCH, t, x * 100, y * 100, 1, flags, 0))
+        else:
+            events.append((MOUSE_MOVE if i else MOUSE_DOWN, t, x, y, 0, 0, 0))
+        t += dt
+    x, y = points[-1]
+    events.append((TOUCH, t, x * 100, y * 100, 1, TOUCHEVENTF_UP, 0) if as_touch else (MOUSE_UP, t, x, y, 0, 0, 0))
+    rp = Replayer(layout, measure=False)
+    code_cell = {}
+    for pos, target in rp.targets.items():
+        if target.action: code_cell[target.action.codes[0]] = pos
+    rp.run(events)
+    return fold(code_cell[code] for code in rp.key_downs())
+
+
+def check(layout, index, hz, count=300):
+    rng = random.Random(hz)
+    result = {"touch": 0, "mouse": 0, "endpoint only": 0}
+    cells = 0
+    for swipe in swipes(index, count, rng):
+        points = samples(swipe, hz)
+        want = crossed(index, points)
+        cells += len(want)
+        for name, as_touch in (("touch", True), ("mouse", False)):
+            got = replay_swipe(layout, points, 1.0 / hz, as_touch)
+            # A cell clipped by less than the 0.1 px reference step may fire on top; none may be missing
+            if not is_subsequence(want, got): result[name] += 1
+        if not is_subsequence(want, fold(a for a in (index.lookup(x, y) for x, y in points) if a)):
+            result["endpoint only"] += 1
+    return cells, result
+
+
+def main():
+    rows, cols, grid = make_layout()
+    layout = layout_from_grid(rows, cols, grid, GAP, ORIGIN, repeat_ms=1000)
+    index = GridHitIndex(rows, cols, grid, GAP, ORIGIN)
+
+    out = []
+    for hz in (60, 125, 250):
+        cells, result = check(layout, index, hz)
+        out.append((f"{hz} Hz samples ({SPEED / hz:.0f} px apart)",
+                    f"{cells:,} cells crossed   swipes with a skipped cell: "
+                    + "   ".join(f"{k} {v}" for k, v in result.items())))
+        assert not result["touch"] and not result["mouse"], result
+    report(f"3000 px/s swipes, 300 per rate, {len(rows)}x{len(cols)} grid, gap {GAP}", out)
+
+    rng = random.Random(5)
+    big = GridHitIndex([40] * 20, [40] * 20, {}, 1)
+    rows_out = []
+    for name, length in (("1000 Hz (3 px)", 3), ("125 Hz (24 px)", 24), ("60 Hz (50 px)", 50), ("full diagonal", 1130)):
+        segs = []
+        for _ in range(1000):
+            x0, y0 = rng.uniform(0, 800), rng.uniform(0, 800)
+            a = rng.uniform(0, 2 * math.pi)
+            segs.append((x0, y0, x0 + length * math.cos(a), y0 + length * math.sin(a)))
+        if length > 800: segs = [(1, 1, 799, 799)] * 1000
+        seg_t = timeit(lambda: [big.segment(*s) for s in segs], 5)
+        look_t = timeit(lambda: [big.cell_at(s[2], s[3]) for s in segs], 5)
+        n = sum(len(big.segment(*s)) for s in segs) / len(segs)
+        rows_out.append((name, f"segment {fmt_ns(seg_t, len(segs)):>9}   lookup {fmt_ns(look_t, len(segs)):>7}"
+                               f"   ({n:.1f} cells/segment)"))
+    report("cost per motion sample, 20x20 grid of 40 px cells", rows_out)
+
+
+if __name__ == "__main__":
+    main()
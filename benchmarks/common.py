@@ -0,0 +1,35 @@
+"""Small helpers shared by the benchmark scripts."""
+import time
+
+
+def timeit(fn, repeat=5, number=1):
+    """Best-of-`repeat` wall time in seconds for `number` calls of fn()."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def try_tk():
+    """A withdrawn Tk root, or None when no display is available."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def report(title, rows):
+    """Print a two-column result table."""
+    print(f"\n== {title} ==")
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name.ljust(width)}  {value}")
+
+
+def fmt_ns(seconds, count=1):
+    return f"{seconds / count * 1e9:,.0f} ns"
@@ -0,0 +1,27 @@
+"""Pure-Python building blocks for the virtual keypad.
+
+Nothing in this package touches Tk or the Win32 API at import time, so the
+input path can be exercised and benchmarked on any platform.  InputEngine
+is the whole input path behind one object; adapters for Tk
+(keypad.tkcanvas), SendInput (keypad.sendinput) and Win32 touch
+(keypad.win32) are only loaded by the app that uses them.
+"""
+from keypad.hittest import GridHitIndex, prefix_offsets
+from keypad.output import OutputBackend, RecordingBackend, KeyDispatcher
+from keypad.release import ReleaseScheduler
+from keypad.keys import KeyAction, KeySpecError, Macro, compile_key, compile_macro
+from keypad.macro import MacroRunner
+from keypad.reconcile import WidgetSpec, build_grid_specs, design_widget_at, diff_specs, diff_tracks
+from keypad.touch import TOUCHINPUT, TouchRing, TouchProcessor, TouchInputThread
+from keypad.motion import MotionCoalescer
+from keypad.clock import ManualClock
+from keypad.repeat import RepeatScheduler
+from keypad.latency import Histogram, LatencyProbes
+from keypad.cellstate import CellState
+from keypad.debounce import HitDebouncer
+from keypad.grid import Cell, GridModel
+from keypad.layout import Layout
+from keypad.layoutfile import LayoutError, load_layout, save_layout
+from keypad.engine import InputEngine
+from keypad.eventtrace import EventTrace, read_events
+from keypad.replay import Replayer, TraceRecorder, read_trace, write_trace
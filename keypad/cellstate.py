@@ -0,0 +1,42 @@
+"""Per-cell input state in flat arrays, indexed by a stable cell index.
+
+A cell's index is r * cols + c of its anchor, the same position the
+GridModel and GridHitIndex tables use; InputEngine.set_targets stamps it
+on every target as `cell_index`.  One CellState holds, for every grid
+position:
+
+  pressed     bytearray   1 while the cell is held (pointer or finger down)
+  last_press  array('d')  clock time of the last accepted press
+  finger      array('l')  touch id that last took the cell, -1 for none
+  holds       bytearray   fingers/pointers holding a HOLD cell down (its key is down while > 0)
+
+Threading model: the Tk thread (mouse) and the touch input thread both
+write here, without a lock.  Every access is a single item load or store
+on an array, which the GIL makes atomic, so a reader sees an old or a new
+value but never a torn one.  The debounce check-then-set is not atomic
+across threads; the only race is a mouse click and a touch landing on
+the same cell in the same instant, where both presses going out is
+right anyway.  `holds` is the exception: a key-down and its key-up
+hinge on the count, so InputEngine only touches it under its hold lock.
+A layout change never clears a table in place: the Tk
+thread builds a new CellState and swaps the reference, so a batch still
+running on the input thread finishes against the old one harmlessly.
+"""
+from array import array
+
+
+class CellState:
+    """The arrays for one layout; sized once, replaced (not resized) when the layout changes."""
+
+    __slots__ = ('size', 'pressed', 'last_press', 'finger', 'holds')
+
+    def __init__(self, size=0):
+        self.size = size
+        self.pressed = bytearray(size)
+        self.last_press = array('d', bytes(8 * size))
+        self.finger = array('l', [-1]) * size
+        self.holds = bytearray(size)
+
+    def held(self):
+        """Indexes of the cells currently held."""
+        return [i for i, p in enumerate(self.pressed) if p]
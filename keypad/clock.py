@@ -0,0 +1,23 @@
+"""Clocks for the schedulers.
+
+Schedulers take any zero-argument callable returning seconds; production
+code passes time.monotonic, tests and benchmarks pass a ManualClock so
+timing behaviour is deterministic.
+"""
+import time
+
+monotonic = time.monotonic
+
+
+class ManualClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
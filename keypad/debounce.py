@@ -0,0 +1,48 @@
+"""Per-cell press debounce shared by mouse, touch and replay.
+
+A cell that is not currently held always accepts a press.  While it is
+held, further presses (slide re-entry, repeats) are dropped if they come
+within `threshold_ms` of the last accepted one, unless forced.
+"""
+import time
+
+from keypad.cellstate import CellState
+
+
+class HitDebouncer:
+    """Tracks which cells are held and when each last fired, in a CellState.
+
+    Cells are cell indexes (see keypad.cellstate, which also documents why
+    no lock is needed).  reset() swaps in a blank table for a new layout.
+    """
+
+    def __init__(self, threshold_ms=0, clock=time.monotonic):
+        self.threshold_ms = threshold_ms  # 0 = no debounce
+        self.clock = clock
+        self.cells = CellState()
+
+    def reset(self, size):
+        self.cells = CellState(size)
+
+    def hit(self, cell, force=False):
+        """Should a press on `cell` go out now?  Records it if so."""
+        cells = self.cells
+        now = self.clock()
+        if not 0 <= cell < cells.size: return True  # Not in the table yet; the layout is being republished
+        if cells.pressed[cell] and not force and self.threshold_ms > 0 \
+                and (now - cells.last_press[cell]) * 1000 < self.threshold_ms:
+            return False
+        cells.last_press[cell] = now
+        cells.pressed[cell] = 1
+        return True
+
+    def release(self, cell):
+        cells = self.cells
+        if 0 <= cell < cells.size: cells.pressed[cell] = 0
+
+    def held(self, cell):
+        cells = self.cells
+        return 0 <= cell < cells.size and bool(cells.pressed[cell])
+
+    def clear(self):
+        self.reset(self.cells.size)
@@ -0,0 +1,342 @@
+"""The input engine: everything between "a finger/pointer is at (x, y)" and "keys go out".
+
+InputEngine owns key compilation, debounce, touch processing, repeat and
+deferred releases, and sends through whatever OutputBackend it is given.
+It imports only the standard library.  Platform pieces plug in from the
+outside:
+
+  output     an OutputBackend (keypad.sendinput.SendInputBackend on Windows,
+             RecordingBackend for tests, benchmarks and replay)
+  touch      raw TOUCHINPUT records, from a TouchInputThread or a replay
+  text       send_text(text) for cells that type text instead of keys
+  feedback   on_touch_hit(target) / on_finger(finger, target) so a UI can
+             flash cells and track fingers
+
+Targets are whatever the UI hit-tests to (Tk buttons, canvas cells,
+replay cells); the engine reads `.action` and, for the repeat rate,
+repeat_ms_for(target), and keeps per-cell state under `.cell_index`, which
+set_targets assigns (see keypad.cellstate).
+
+Cells fire pulses (key-down, key-up release_ms later, repeated while a
+finger stays).  Macro cells start their macro on the MacroRunner instead,
+once per touch; they are never repeated.  Other cells can be HOLD cells: hold_all, or hold_for(target)
+for a single cell.  A HOLD cell sends one key-down when the first finger
+or the pointer lands on it and the key-up when the last one lifts or
+slides off; release_holds() forces every held key up.
+"""
+import threading
+import time
+
+from keypad.debounce import HitDebouncer
+from keypad.eventtrace import (HIT, HIT_DEBOUNCED, HIT_NO_KEY, HIT_SENT, NO_FINGER, TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP,
+                               POINTER as TRACE_POINTER)
+from keypad.keys import KeySpecError, compile_key
+from keypad.macro import MacroRunner
+from keypad.output import KeyDispatcher
+from keypad.release import ReleaseScheduler
+from keypad.repeat import RepeatScheduler
+from keypad.touch import TouchProcessor
+
+POINTER = 'pointer'  # holder id of the mouse in hold_down/hold_up; touch ids are ints
+
+
+class InputEngine:
+    """Debounce, dispatch, repeat and release for one keypad, without UI.
+
+    threaded=False keeps the release scheduler on the caller's thread (see
+    ReleaseScheduler) for simulated clocks.
+    """
+
+    def __init__(self, backend, clock=time.monotonic, threaded=True, release_ms=12, repeat_ms=50):
+        self.clock = clock
+        self.release_ms = release_ms
+        self.dispatcher = KeyDispatcher(backend)
+        self.releaser = ReleaseScheduler(self._release_keys, clock, threaded)
+        self.macros = MacroRunner(self._macro_keys, clock, threaded)
+        self.debouncer = HitDebouncer(0, clock)
+        self.repeater = RepeatScheduler(self.touch_hit, repeat_ms, clock)
+        self.processor = TouchProcessor(self.touch_hit, self.touch_changed, self.dispatcher)
+        self.actions = {}  # cell key string -> compiled KeyAction (None for empty/invalid)
+        self.errors = {}  # cell key string -> why it did not compile
+        self.probes = None
+        self.trace = None  # keypad.eventtrace.EventTrace, see set_trace
+        self.send_text = None
+        self.on_touch_hit = None
+        self.on_finger = None
+        self.repeat_ms_for = lambda target: getattr(target, 'repeat_ms', None)
+        self.hold_all = False  # every cell is a HOLD cell
+        self.hold_for = lambda target: getattr(target, 'hold', False)
+        self._pointer = self._pointer_last = None
+        self._finger_cells = {}  # touch id -> cell index it holds (touch thread only)
+        self._hold_lock = threading.Lock()
+        self._holding = {}  # touch id or POINTER -> HOLD target it keeps down
+        self._held = {}  # scan code -> HOLD cells keeping it down, in press order
+
+    # --- keys ---
+    def compile(self, key):
+        """Compiled action for a cell key string, cached; parse errors land in `errors`."""
+        if key in self.actions: return self.actions[key]
+        try:
+            action = compile_key(key)
+        except KeySpecError as e:
+            self.errors[key] = str(e)
+            action = None
+        prepare = getattr(self.dispatcher.backend, 'prepare', None)
+        if action is not None and action.codes and prepare is not None:
+            prepare(action.codes)
+        self.actions[key] = action
+        return action
+
+    def compile_layout(self, keys):
+        """Recompile from scratch for a newly loaded layout."""
+        self.actions.clear()
+        self.errors.clear()
+        for key in keys: self.compile(key)
+
+    # --- hits ---
+    def set_targets(self, index, targets):
+        """Publish a new hit-test snapshot to the touch path (atomic swap).
+
+        Stamps each target's cell_index; a new layout (not just a moved
+        window) starts from a blank per-cell state table.
+        """
+        snapshot = self.processor.snapshot
+        if snapshot is None or snapshot[0].owners is not index.owners:
+            self.release_holds()
+            self.debouncer.reset(index.rows * index.cols)
+            trace = self.trace
+            if trace is not None: trace.set_layout(index.rows, index.cols)
+        cols = index.cols
+        for (r, c), target in targets.items(): target.cell_index = r * cols + c
+        self.processor.snapshot = (index, targets)
+
+    @property
+    def cells(self):
+        """The current keypad.cellstate.CellState."""
+        return self.debouncer.cells
+
+    def hit(self, target, force=False):
+        """Debounce and send one hit on a target; returns True if it went out.  Any thread."""
+        action = target.action
+        trace = self.trace
+        if action is None:
+            if trace is not None: trace.log(HIT, target.cell_index, NO_FINGER, force, HIT_NO_KEY)
+            return False
+        if not self.debouncer.hit(target.cell_index, force):
+            if trace is not None: trace.log(HIT, target.cell_index, NO_FINGER, force, HIT_DEBOUNCED)
+            return False
+        if trace is not None: trace.log(HIT, target.cell_index, NO_FINGER, force, HIT_SENT)
+        self.send_action(action)
+        return True
+
+    def send_action(self, action):
+        if action.macro is not None:
+            self.macros.start(action.macro)
+        elif action.text is None:
+            for code, _ in action.down: self.dispatcher.press(code)
+            # Key-ups from the release thread in reverse order; a re-press pushes the pending one back.
+            # A key a HOLD cell keeps down stays down (and _release_keys checks again when they fall due).
+            held = self._held
+            for code, _ in action.up:
+                if code not in held: self.releaser.schedule(code, self.release_ms)
+        elif self.send_text is not None:
+            self.send_text(action.text)
+
+    def touch_hit(self, target):
+        if self.once(target): return  # Sent once by touch_changed, never repeated
+        if self.hit(target, force=True) and self.on_touch_hit is not None:
+            self.on_touch_hit(target)
+
+    def touch_changed(self, finger, target):
+        cells, owned = self.debouncer.cells, self._finger_cells
+        prev = owned.pop(finger, None)
+        if prev is not None and 0 <= prev < cells.size and cells.finger[prev] == finger:
+            cells.finger[prev] = -1
+            cells.pressed[prev] = 0
+        if self._holding: self.hold_up(finger)
+        if target is None:
+            self.repeater.release(finger)
+        else:
+            i = owned[finger] = target.cell_index
+            if 0 <= i < cells.size: cells.finger[i] = finger
+            if self.holds(target):
+                self.repeater.release(finger)
+                if self.hold_down(finger, target) and self.on_touch_hit is not None: self.on_touch_hit(target)
+            elif self.once(target):
+                self.repeater.release(finger)
+                if self.hit(target, force=True) and self.on_touch_hit is not None: self.on_touch_hit(target)
+            else:
+                self.repeater.hold(finger, target, self.repeat_ms_for(target))
+        if self.on_finger is not None: self.on_finger(finger, target)
+
+    # --- HOLD cells ---
+    def holds(self, target):
+        """Is this a HOLD cell?  Text, macro and cells outside the current layout never are."""
+        action = target.action
+        return action is not None and action.text is None and action.macro is None \
+            and (self.hold_all or self.hold_for(target)) and 0 <= target.cell_index < self.debouncer.cells.size
+
+    def once(self, target):
+        """Does a touch fire this cell once, when it lands, rather than on every hit (HOLD and macro cells)?"""
+        action = target.action
+        return action is not None and (action.macro is not None or self.holds(target))
+
+    @property
+    def holding(self):
+        return bool(self._holding)
+
+    def hold_down(self, holder, target):
+        """`holder` (a touch id or POINTER) now keeps a HOLD cell down; returns True if its key-down went out.
+
+        Fingers on the same cell are counted and only the first sends the
+        key-down; a holder that already kept another cell down lets go of
+        it first.
+        """
+        with self._hold_lock:
+            if holder in self._holding: self._hold_up(holder)
+            holds, i = self.debouncer.cells.holds, target.cell_index
+            self._holding[holder] = target
+            n = holds[i]
+            if n < 255: holds[i] = n + 1
+            if n: return False
+            held = self._held
+            with self.dispatcher.frame():
+                for code, _ in target.action.down:
+                    # A pulse release still pending for the key would cut the hold short
+                    self.releaser.cancel(code)
+                    if code not in held: self.dispatcher.press(code)
+                    held[code] = held.get(code, 0) + 1
+            return True
+
+    def hold_up(self, holder):
+        """`holder` lifted or slid off; the last one off a HOLD cell sends its key-up.  Returns True if it did."""
+        with self._hold_lock: return self._hold_up(holder)
+
+    def _hold_up(self, holder):
+        target = self._holding.pop(holder, None)
+        if target is None: return False
+        holds, i = self.debouncer.cells.holds, target.cell_index
+        n = holds[i] - 1
+        if n > 0:
+            holds[i] = n
+            return False
+        holds[i] = 0
+        held = self._held
+        with self.dispatcher.frame():
+            for code, _ in target.action.up:
+                n = held.pop(code, 0) - 1
+                if n > 0: held[code] = n
+                else: self.dispatcher.release(code)
+        return True
+
+    def release_holds(self):
+        """Force every HOLD key up (mode switch, window lost, new layout); returns how many keys."""
+        with self._hold_lock:
+            codes = list(self._held)
+            self._held.clear()
+            self._holding.clear()
+            holds = self.debouncer.cells.holds
+            holds[:] = bytes(len(holds))
+            if codes:
+                with self.dispatcher.frame():
+                    for code in reversed(codes): self.dispatcher.release(code)
+        return len(codes)
+
+    # --- pointer (mouse slide mode) ---
+    def pointer_down(self, target):
+        self._pointer = self._pointer_last = target
+        trace = self.trace
+        if trace is not None: trace.log(TOUCH_DOWN, -1 if target is None else target.cell_index, TRACE_POINTER)
+        if target is None: return False
+        if self.holds(target): return self.hold_down(POINTER, target)
+        with self.dispatcher.frame(): return self.hit(target, force=True)
+
+    def click(self, target):
+        """A press and release in one (a TYPE-mode button click); returns True if it went out.
+
+        Goes through hit() like a touch, so it is traced and debounced
+        against a finger on the same cell; a HOLD cell sends a pulse.
+        """
+        with self.dispatcher.frame(): sent = self.hit(target)
+        if sent: self.debouncer.release(target.cell_index)
+        return sent
+
+    def pointer_move(self, target):
+        """Fire when the pointer enters a different cell while pressed."""
+        return bool(self.pointer_path((target,)))
+
+    def pointer_path(self, targets):
+        """Fire, in order, every cell a pointer move crossed (GridHitIndex.segment); returns those sent.
+
+        The cell the pointer was already on is not fired again.  A None
+        means the pointer left every cell (a gap, or off the keypad): the
+        HOLD cell it was on lets go, and coming back fires again.
+        """
+        sent = []
+        trace = self.trace
+        with self.dispatcher.frame():
+            for target in targets:
+                if target is self._pointer_last: continue
+                self._pointer_last = target
+                if trace is not None: trace.log(TOUCH_MOVE, -1 if target is None else target.cell_index, TRACE_POINTER)
+                if target is None:
+                    if self._holding: self.hold_up(POINTER)
+                elif self.holds(target):
+                    if self.hold_down(POINTER, target): sent.append(target)
+                else:
+                    if self._holding: self.hold_up(POINTER)
+                    if self.hit(target, force=True): sent.append(target)
+        return sent
+
+    def pointer_up(self):
+        trace = self.trace
+        if trace is not None:
+            trace.log(TOUCH_UP, -1 if self._pointer_last is None else self._pointer_last.cell_index, TRACE_POINTER)
+        if self._holding: self.hold_up(POINTER)
+        if self._pointer is not None: self.debouncer.release(self._pointer.cell_index)
+        self._pointer = self._pointer_last = None
+
+    # --- lifecycle ---
+    def set_probes(self, probes):
+        self.probes = probes
+        self.processor.probes = probes
+
+    def set_trace(self, trace):
+        """Log touches, hits, debounce decisions and key events to a keypad.eventtrace.EventTrace (None: off)."""
+        self.trace = trace
+        self.processor.trace = trace
+        self.dispatcher.trace = trace
+        snapshot = self.processor.snapshot
+        if trace is not None and snapshot is not None: trace.set_layout(snapshot[0].rows, snapshot[0].cols)
+
+    def _release_keys(self, codes):
+        """Release thread: every key-up that fell due together, as one batch.
+
+        A key a HOLD cell took down since the pulse was scheduled stays down;
+        checked under the hold lock, so a hold_down can't slip in between.
+        """
+        with self._hold_lock:
+            held = self._held
+            if held: codes = [code for code in codes if code not in held]
+            if not codes: return
+            with self.dispatcher.frame():
+                for code in codes: self.dispatcher.release(code)
+        probes = self.probes
+        if probes is not None: probes.released(codes)
+
+    def _macro_keys(self, events):
+        """Macro thread (or the pressing thread for a macro's first step): one step's events as one batch."""
+        with self.dispatcher.frame():
+            for code, up in events:
+                if up: self.dispatcher.release(code)
+                else: self.dispatcher.press(code)
+
+    def release_all(self):
+        self.macros.cancel_all()
+        self.releaser.release_all()
+        self.release_holds()
+
+    def stop(self):
+        self.release_all()
+        self.releaser.stop()
+        self.macros.stop()
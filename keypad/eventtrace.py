@@ -0,0 +1,245 @@
+"""Always-on binary event trace: what the input path did, for "a key didn't fire" reports.
+
+Unlike a .ktrace recording (keypad.replay), which keeps raw input to replay
+it, this logs the input path's decisions as they happen:
+
+  TOUCH_DOWN/MOVE/UP  a touch record (or the mouse, finger POINTER) and the
+                      cell the hit test found for it (-1: none)
+  HIT                 a cell fired or not: flag HIT_SENT, HIT_DEBOUNCED or
+                      HIT_NO_KEY (empty or invalid key); code 1 if forced
+  KEY_DOWN/KEY_UP     a key event handed to the output, by scan code
+  FEEDBACK            a cell flash drawn (flag 1) or cleared (flag 0)
+  LAYOUT              a new layout was published: x rows, y cols, so cell
+                      indexes (r * cols + c) can be read back as (r, c);
+                      repeated at the start of every file
+  LOST                written by the flusher: x records overwritten
+                      before they reached the disk
+
+Each event is one fixed-size RECORD packed into a preallocated ring without
+a lock; nothing is allocated on the hot path.  Finger ids are unsigned, as
+the Windows touch dwID is; NO_FINGER and POINTER are reserved at the top.  A background thread copies
+the ring to disk every flush_ms, into size-capped rotating files
+(events.kev, events.1.kev, ...).  Call sites test `trace is not None`, as
+for latency probes.
+
+Read the files back with keypad.readtrace.
+"""
+import glob
+import itertools
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+MAGIC = b'KPEV'
+VERSION = 2
+HEADER = struct.Struct('<4sHHqq')  # magic, version, record size, perf_counter_ns and time_ns at start
+RECORD = struct.Struct('<qIBBHiIii')  # t_ns, seq, kind, flag, code, cell, finger, x, y
+SIZE = RECORD.size  # 32 bytes
+SEQ = struct.Struct('<8xI20x')  # a record's seq alone, for iter_unpack
+SEQ_MASK = 0xFFFFFFFF
+
+TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP, HIT, KEY_DOWN, KEY_UP, FEEDBACK, LAYOUT, LOST = range(9)
+KINDS = ('touch_down', 'touch_move', 'touch_up', 'hit', 'key_down', 'key_up', 'feedback', 'layout', 'lost')
+HIT_DEBOUNCED, HIT_SENT, HIT_NO_KEY = range(3)
+NO_FINGER = 0xFFFFFFFF  # finger of events that have none (hits, keys, feedback)
+POINTER = 0xFFFFFFFE  # finger id of the mouse
+
+CAPACITY = 1 << 16  # records in the ring (2 MiB)
+FLUSH_MS = 250
+MAX_BYTES = 4 << 20  # per file
+KEEP = 4  # rotated files kept besides the current one
+NAME = "events"
+
+
+class EventTrace:
+    """Fixed-size event records in a ring, flushed to rotating files by a background thread.
+
+    log() is safe from any thread and takes no lock: a slot is claimed
+    with next() on an itertools.count (atomic under the GIL) and filled
+    with one pack_into.  Each record carries its sequence number, and
+    every record copied out of the ring is checked against the seq its slot
+    should hold: the flusher stops short of a slot whose writer has not
+    filled it yet (however many later writers finished first) and picks it
+    up on the next flush.  If the flusher falls a whole ring behind, the
+    oldest records are overwritten and counted in `lost`.  With directory=None nothing is
+    written; the ring alone keeps the last `capacity` events (records()).
+    """
+
+    def __init__(self, directory=None, capacity=CAPACITY, flush_ms=FLUSH_MS, max_bytes=MAX_BYTES, keep=KEEP,
+                 clock=time.perf_counter_ns):
+        self.clock = clock
+        self.capacity = capacity
+        self.buf = bytearray(capacity * SIZE)
+        self.lost = 0
+        self._last = -1  # seq of a recently filled record; writers race on it, it is only a hint
+        self._tail = 0  # records handed to the files so far
+        self._lock = threading.Lock()  # flusher/readers only
+        self.log = self._logger()
+        self.files = TraceFiles(directory, max_bytes, keep, clock) if directory is not None else None
+        self.flush_s = flush_ms / 1000.0
+        self._stop = threading.Event()
+        self._thread = None
+        if self.files is not None:
+            self._thread = threading.Thread(target=self._run, name="event-trace", daemon=True)
+            self._thread.start()
+
+    def _logger(self):
+        """log(kind, cell, finger, code, flag, x, y): the hot path, a closure so it reads no attributes."""
+        seq, pack, buf, clock, cap, trace = itertools.count(), RECORD.pack_into, self.buf, self.clock, self.capacity, self
+
+        def log(kind, cell=-1, finger=NO_FINGER, code=0, flag=0, x=0, y=0):
+            i = next(seq)
+            pack(buf, i % cap * SIZE, clock(), i & SEQ_MASK, kind, flag, code, cell, finger, x, y)
+            trace._last = i
+        return log
+
+    def set_layout(self, rows, cols):
+        """Log a LAYOUT and start every later file with it, so its cell indexes can be read as (r, c)."""
+        self.log(LAYOUT, x=rows, y=cols)
+        if self.files is not None: self.files.layout = rows, cols
+
+    def records(self):
+        """The events still in the ring, oldest first, as RECORD tuples."""
+        with self._lock:
+            head = self._last + 1
+            start = max(0, head - self.capacity)
+            data = self._slice(start, head)
+        # Slots still being filled, or refilled since the copy began, are left out
+        return [r for i, r in enumerate(RECORD.iter_unpack(data), start) if r[1] == i & SEQ_MASK]
+
+    def flush(self):
+        """Write everything logged since the last flush to the files; returns how many records."""
+        with self._lock:
+            head, tail = self._last + 1, self._tail
+            if head <= tail: return 0
+            lost = max(0, head - self.capacity - tail)
+            start = tail + lost
+            data = self._slice(start, head)
+            n = _filled(start, data)
+            data = data[:n * SIZE]
+            self._tail = start + n
+            self.lost += lost
+        if self.files is None: return 0
+        if lost: self.files.write(RECORD.pack(self.clock(), 0, LOST, 0, 0, -1, NO_FINGER, lost, 0))
+        if data: self.files.write(data)
+        return n
+
+    def _slice(self, start, end):
+        """Bytes of records start..end (at most one ring), unwrapped."""
+        if end <= start: return b''
+        cap, buf = self.capacity, self.buf
+        a, b = start % cap * SIZE, end % cap * SIZE
+        if a < b: return bytes(buf[a:b])
+        return bytes(buf[a:]) + bytes(buf[:b])
+
+    def _run(self):
+        while not self._stop.wait(self.flush_s):
+            try: self.flush()
+            except OSError: pass
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join(timeout=1)
+        self._thread = None
+        if self.files is not None:
+            self.flush()
+            self.files.close()
+
+
+def _filled(start, data):
+    """How many records at the front of data, copied from seq start on, hold the seq they were copied for."""
+    for k, (seq,) in enumerate(SEQ.iter_unpack(data)):
+        if seq != (start + k) & SEQ_MASK: return k
+    return len(data) // SIZE
+
+
+class TraceFiles:
+    """Appends records to DIR/events.kev, rotating to events.1.kev ... events.KEEP.kev at max_bytes.
+
+    Every file starts with a HEADER, so each one decodes on its own;
+    records never straddle two files.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, keep=KEEP, clock=time.perf_counter_ns):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max(max_bytes, HEADER.size + SIZE)
+        self.keep = keep
+        self.clock = clock
+        self.layout = None  # (rows, cols) written as a LAYOUT record after each header
+        self._f = None
+        self._size = 0
+
+    def path(self, n=0):
+        return os.path.join(self.directory, f"{NAME}.kev" if n == 0 else f"{NAME}.{n}.kev")
+
+    def write(self, data):
+        size = RECORD.size
+        while data:
+            if self._f is None: self._open()
+            room = (self.max_bytes - self._size) // size * size
+            if room <= 0:
+                self._rotate()
+                continue
+            chunk, data = data[:room], data[room:]
+            self._f.write(chunk)
+            self._size += len(chunk)
+        self._f.flush()
+
+    def _open(self):
+        # Every file gets its own clock reference in the header; a new session never appends to an old file
+        if self._size == 0 and os.path.exists(self.path()): self._rotate()
+        self._f = open(self.path(), 'wb')
+        t = self.clock()
+        self._f.write(HEADER.pack(MAGIC, VERSION, SIZE, t, time.time_ns()))
+        self._size = HEADER.size
+        if self.layout is not None:
+            self._f.write(RECORD.pack(t, 0, LAYOUT, 0, 0, -1, NO_FINGER, *self.layout))
+            self._size += SIZE
+
+    def _rotate(self):
+        if self._f is not None: self._f.close()
+        self._f = None
+        for n in range(self.keep, 0, -1):
+            src = self.path(n - 1)
+            if os.path.exists(src): os.replace(src, self.path(n))
+        # With keep=0 the current file is simply started over
+        if self.keep == 0 and os.path.exists(self.path()): os.remove(self.path())
+
+    def close(self):
+        if self._f is not None: self._f.close()
+        self._f = None
+
+
+# --- reading ---
+Event = namedtuple('Event', 'wall_ns seq kind flag code cell finger x y')
+
+
+def read_events(path):
+    """Events of one trace file, stamped with wall-clock ns (time_ns) from the file header."""
+    with open(path, 'rb') as f: data = f.read()
+    magic, version, size, t0, wall0 = HEADER.unpack_from(data)
+    if magic != MAGIC: raise ValueError(f"{path}: not a keypad event trace")
+    if version != VERSION or size != SIZE: raise ValueError(f"{path}: unsupported event trace version {version}")
+    end = HEADER.size + (len(data) - HEADER.size) // SIZE * SIZE
+    shift = wall0 - t0
+    return [Event(t + shift, *rest) for t, *rest in RECORD.iter_unpack(data[HEADER.size:end])]
+
+
+def trace_paths(target):
+    """A file, or every events*.kev in a directory, oldest first."""
+    if not os.path.isdir(target): return [target]
+    paths = glob.glob(os.path.join(target, f"{NAME}*.kev"))
+    rotated = lambda p: int(os.path.basename(p).split('.')[1]) if os.path.basename(p).count('.') > 1 else 0
+    return sorted(paths, key=rotated, reverse=True)
+
+
+def load(targets):
+    """Every Event from the given files/directories, in time order."""
+    events = []
+    for target in targets:
+        for path in trace_paths(target): events.extend(read_events(path))
+    events.sort(key=lambda e: e.wall_ns)
+    return events
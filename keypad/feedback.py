@@ -0,0 +1,108 @@
+"""Press feedback (cell flashes) applied once per display frame.
+
+Hits only record "this cell is lit until t" in a table and mark it dirty.
+One scheduled job per frame then does the Tk work: light newly hit cells,
+restore the ones whose time ran out.  A cell hit again while lit just gets
+a later deadline, so a fast slide costs a few configure calls per frame
+instead of a configure plus a timer per hit.
+
+Cells are anything with cget/config for 'bg' (Tk buttons, CanvasCells).
+Everything here runs on the Tk thread; `schedule(ms, fn)` is Tk's after.
+"""
+import time
+
+from keypad.eventtrace import FEEDBACK, NO_FINGER
+
+FLASH_COLOR = "#aaaaaa"
+FRAME_MS = 16
+
+
+class FeedbackCompositor:
+    """Dirty set + timestamped flash deadlines, flushed by a single frame job.
+
+    Frames fall on a fixed grid of frame_ms on the clock, so however many
+    hits arrive, the job runs at most once per frame.
+    """
+
+    def __init__(self, schedule, cancel=None, clock=time.monotonic, frame_ms=FRAME_MS, color=FLASH_COLOR):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.clock = clock
+        self.frame_s = frame_ms / 1000.0
+        self.color = color
+        self.trace = None  # keypad.eventtrace.EventTrace: flashes drawn and cleared, by cell_index
+        self._lit = {}  # id(cell) -> [cell, original bg (None until shown), lit-until]
+        self._dirty = set()  # ids whose on-screen color must change next frame
+        self._job = None
+        self._job_at = None
+
+    def flash(self, cell, ms):
+        """Light `cell` for ms from now (or keep it lit that much longer)."""
+        now = self.clock()
+        until = now + ms / 1000.0
+        key = id(cell)
+        entry = self._lit.get(key)
+        if entry is None:
+            self._lit[key] = [cell, None, until]
+            self._dirty.add(key)
+            self._arm(now, now)
+        elif until > entry[2]:
+            entry[2] = until
+
+    def end(self, cell):
+        """Drop a flash early (e.g. the pointer was released)."""
+        key = id(cell)
+        entry = self._lit.get(key)
+        if entry is not None:
+            entry[2] = 0.0
+            self._dirty.add(key)
+            now = self.clock()
+            self._arm(now, now)
+
+    def lit(self, cell):
+        return id(cell) in self._lit
+
+    def clear(self):
+        """Forget every flash without touching widgets (they are about to be rebuilt)."""
+        self._lit.clear()
+        self._dirty.clear()
+
+    def _arm(self, when, now):
+        """Make sure the frame job runs on the first frame boundary at or after `when`."""
+        frame = self.frame_s
+        at = max(-(-when // frame) * frame, now + 0.001)
+        if self._job is not None:
+            if self._job_at <= at: return
+            if self.cancel is not None: self.cancel(self._job)
+        self._job_at = at
+        self._job = self.schedule(max(1, int(round((at - now) * 1000))), self._frame)
+
+    def _frame(self):
+        self._job = None
+        now = self.clock()
+        lit, color, trace = self._lit, self.color, self.trace
+        # Newly hit cells: one cget + one config each, however often they were hit
+        for key in self._dirty:
+            entry = lit.get(key)
+            if entry is None or entry[1] is not None or entry[2] <= now: continue
+            try:
+                entry[1] = entry[0].cget('bg')
+                entry[0].config(bg=color)
+            except Exception:
+                del lit[key]  # Widget destroyed under us
+                continue
+            if trace is not None: trace.log(FEEDBACK, getattr(entry[0], 'cell_index', -1), NO_FINGER, 0, 1)
+        self._dirty.clear()
+        # Expired flashes, found from their deadlines
+        next_due = None
+        for key in list(lit):
+            cell, orig, until = lit[key]
+            if until > now:
+                if next_due is None or until < next_due: next_due = until
+                continue
+            del lit[key]
+            if orig is not None:
+                try: cell.config(bg=orig)
+                except Exception: continue
+                if trace is not None: trace.log(FEEDBACK, getattr(cell, 'cell_index', -1), NO_FINGER, 0, 0)
+        if next_due is not None: self._arm(next_due, now)
@@ -0,0 +1,423 @@
+"""Array-backed grid model: cell records in row-major order plus an owner index.
+
+GridModel replaces the {(r, c): {'key', 'span_r', 'span_c'}} dict the
+editor used to rebuild on every row/column insert or delete.  It keeps
+
+  cells     one Cell record per position, row-major; positions covered by
+            a merge keep their own record (restored when split again)
+  dr, dc    per position, the offset back to the anchor that owns it
+            (0, 0 for anchors), so owner(r, c) is O(1)
+  offsets   row/column prefix sums and the hit index, cached until a
+            size or span changes (`version` counts those changes)
+
+Offsets to the anchor, rather than the anchor position itself, stay valid
+when rows or columns shift, so insert/delete only touch the spans they
+cut through.  Merge and split touch only their rectangle.
+
+The model reads like the old dict (get, [pos], items, values...) and a
+Cell reads like the old per-cell dict, so hit testing, the reconciler and
+the renderers take either.  Spans are changed through merge/split only;
+sizes through set_size, so the cached offsets stay right.
+"""
+from array import array
+
+from keypad.hittest import GridHitIndex, prefix_offsets
+
+ROW_SIZE = 40
+COL_SIZE = 60
+SPAN_FIELDS = ('span_r', 'span_c')
+
+
+def iter_anchors(cells, rows, cols):
+    """(pos, cell) for every visible cell of a GridModel or a plain {(r, c): dict}, row-major."""
+    if isinstance(cells, GridModel):
+        yield from cells.anchors()
+        return
+    covered = set()
+    for r in range(rows):
+        for c in range(cols):
+            if (r, c) in covered: continue
+            cell = cells.get((r, c), {})
+            span_r, span_c = cell.get('span_r', 1), cell.get('span_c', 1)
+            if span_r > 1 or span_c > 1:
+                covered.update((r + sr, c + sc) for sr in range(span_r) for sc in range(span_c))
+            yield (r, c), cell
+
+
+class Cell:
+    """One grid position: key, span (anchors only) and optional extra fields such as 'repeat_ms'.
+
+    Supports the dict-style access the editor and the saved layouts use.
+    """
+
+    __slots__ = ('key', 'span_r', 'span_c', 'extra')
+
+    def __init__(self, key='', extra=None):
+        self.key = key
+        self.span_r = self.span_c = 1
+        self.extra = extra  # dict of further fields, None while there are none
+
+    @classmethod
+    def from_dict(cls, d):
+        extra = {k: v for k, v in d.items() if k != 'key' and k not in SPAN_FIELDS}
+        return cls(d.get('key', ''), extra or None)
+
+    def __getitem__(self, name):
+        if name == 'key': return self.key
+        if name == 'span_r': return self.span_r
+        if name == 'span_c': return self.span_c
+        if self.extra is None: raise KeyError(name)
+        return self.extra[name]
+
+    def get(self, name, default=None):
+        try: return self[name]
+        except KeyError: return default
+
+    def __setitem__(self, name, value):
+        if name == 'key': self.key = value
+        elif name in SPAN_FIELDS: raise KeyError(f"{name} is set through GridModel.merge/split")
+        elif self.extra is None: self.extra = {name: value}
+        else: self.extra[name] = value
+
+    def update(self, d):
+        for name, value in d.items(): self[name] = value
+
+    def pop(self, name, *default):
+        if self.extra is not None and name in self.extra: return self.extra.pop(name)
+        if default: return default[0]
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return name == 'key' or name in SPAN_FIELDS or (self.extra is not None and name in self.extra)
+
+    def keys(self):
+        keys = ['key', 'span_r', 'span_c']
+        if self.extra: keys.extend(self.extra)
+        return keys
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def copy(self):
+        cell = Cell(self.key, dict(self.extra) if self.extra else None)
+        cell.span_r, cell.span_c = self.span_r, self.span_c
+        return cell
+
+    def __repr__(self):
+        return f"Cell({dict(self)!r})"
+
+
+class GridModel:
+    """Track sizes and cells of the keypad grid with O(1) span ownership."""
+
+    __slots__ = ('row_sizes', 'col_sizes', 'cells', 'dr', 'dc', 'version', '_row_offsets', '_col_offsets', '_hit')
+
+    def __init__(self, row_sizes, col_sizes, cells=None):
+        """cells: {(r, c): dict or Cell}; missing positions get empty cells, bad spans are clipped."""
+        self.row_sizes = list(row_sizes)
+        self.col_sizes = list(col_sizes)
+        rows, cols = self.shape
+        cells = cells or {}
+        records, spans = [], {}
+        for r in range(rows):
+            for c in range(cols):
+                d = cells.get((r, c))
+                if d is None:
+                    records.append(Cell())
+                    continue
+                records.append(Cell.from_dict(d))
+                span = d.get('span_r', 1), d.get('span_c', 1)
+                if span != (1, 1): spans[(r, c)] = span
+        self.cells = records
+        self.dr = array('H', bytes(2 * rows * cols))
+        self.dc = array('H', bytes(2 * rows * cols))
+        self.version = 0  # Bumped by every change to sizes or spans
+        self._row_offsets = self._col_offsets = self._hit = None
+        self.set_spans(spans)
+
+    def set_spans(self, spans):
+        """Apply {(r, c): (span_r, span_c)} to a grid with no merges yet.
+
+        Same claim order as the old refresh_grid: row-major, first anchor
+        wins; spans are clipped to the grid and to earlier merges.
+        """
+        rows, cols = self.shape
+        claimed = bytearray(rows * cols)
+        for r, c in sorted(spans):
+            if claimed[r * cols + c]: continue
+            span_r, span_c = spans[(r, c)]
+            span_r = max(1, min(span_r, rows - r))
+            span_c = max(1, min(span_c, cols - c))
+            for sc in range(1, span_c):
+                if claimed[r * cols + c + sc]: span_c = sc; break
+            for sr in range(1, span_r):
+                base = (r + sr) * cols + c
+                if any(claimed[base:base + span_c]): span_r = sr; break
+            for sr in range(span_r):
+                base = (r + sr) * cols + c
+                claimed[base:base + span_c] = b'\x01' * span_c
+            if span_r > 1 or span_c > 1:
+                cell = self.cells[r * cols + c]
+                cell.span_r, cell.span_c = span_r, span_c
+                self._claim(r, c)
+        self._changed()
+
+    @classmethod
+    def blank(cls, rows, cols, row_size=ROW_SIZE, col_size=COL_SIZE):
+        return cls([row_size] * rows, [col_size] * cols)
+
+    @property
+    def shape(self):
+        return len(self.row_sizes), len(self.col_sizes)
+
+    # --- dict-style reading, as {(r, c): cell} ---
+    def _index(self, pos):
+        r, c = pos
+        rows, cols = self.shape
+        if 0 <= r < rows and 0 <= c < cols: return r * cols + c
+        raise KeyError(pos)
+
+    def __getitem__(self, pos):
+        return self.cells[self._index(pos)]
+
+    def get(self, pos, default=None):
+        try: return self.cells[self._index(pos)]
+        except (KeyError, TypeError, ValueError): return default
+
+    def __contains__(self, pos):
+        return self.get(pos) is not None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        rows, cols = self.shape
+        return [(r, c) for r in range(rows) for c in range(cols)]
+
+    def values(self):
+        return self.cells
+
+    def items(self):
+        return zip(self.keys(), self.cells)
+
+    # --- ownership ---
+    def owner(self, r, c):
+        """Anchor (r, c) of the cell covering position (r, c)."""
+        i = self._index((r, c))
+        return r - self.dr[i], c - self.dc[i]
+
+    def is_anchor(self, r, c):
+        i = self._index((r, c))
+        return not (self.dr[i] or self.dc[i])
+
+    def anchors(self):
+        """(pos, cell) for every visible cell, row-major."""
+        cols = len(self.col_sizes)
+        dr, dc, cells = self.dr, self.dc, self.cells
+        for i in range(len(cells)):
+            if not (dr[i] or dc[i]): yield divmod(i, cols), cells[i]
+
+    def owner_table(self):
+        """(owners, spans) in GridHitIndex's layout: flat row-major anchor list, anchor -> span."""
+        cols = len(self.col_sizes)
+        dr, dc, cells = self.dr, self.dc, self.cells
+        owners, spans = [None] * len(cells), {}
+        for i in range(len(cells)):
+            r, c = divmod(i, cols)
+            if dr[i] or dc[i]:
+                owners[i] = owners[i - dr[i] * cols - dc[i]]  # The anchor comes first in row-major order
+            else:
+                owners[i] = pos = (r, c)
+                spans[pos] = (cells[i].span_r, cells[i].span_c)
+        return owners, spans
+
+    def _claim(self, ar, ac):
+        """Point every position of the anchor's span back at it."""
+        cols = len(self.col_sizes)
+        cell = self.cells[ar * cols + ac]
+        run_c = array('H', range(cell.span_c))
+        for sr in range(cell.span_r):
+            base = (ar + sr) * cols + ac
+            self.dr[base:base + cell.span_c] = array('H', [sr]) * cell.span_c
+            self.dc[base:base + cell.span_c] = run_c
+
+    def _spans_on(self, axis, i):
+        """Anchors of the multi-cell spans that include row/column i, each once."""
+        rows, cols = self.shape
+        dr, dc, cells = self.dr, self.dc, self.cells
+        found = []
+        if axis == 'row':
+            for c in range(cols):
+                k = i * cols + c
+                if dc[k]: continue  # Only the span's first column reports it
+                ar = i - dr[k]
+                if ar != i or cells[k].span_r > 1 or cells[k].span_c > 1: found.append((ar, c))
+        else:
+            for r in range(rows):
+                k = r * cols + i
+                if dr[k]: continue
+                ac = i - dc[k]
+                if ac != i or cells[k].span_r > 1 or cells[k].span_c > 1: found.append((r, ac))
+        return found
+
+    # --- sizes ---
+    def row_offsets(self):
+        if self._row_offsets is None: self._row_offsets = prefix_offsets(self.row_sizes)
+        return self._row_offsets
+
+    def col_offsets(self):
+        if self._col_offsets is None: self._col_offsets = prefix_offsets(self.col_sizes)
+        return self._col_offsets
+
+    def set_size(self, axis, i, size):
+        if axis == 'row':
+            self.row_sizes[i] = size
+        else:
+            self.col_sizes[i] = size
+        self._changed()
+
+    def _changed(self):
+        """Sizes or spans changed: drop the cached offsets and hit index."""
+        self.version += 1
+        self._row_offsets = self._col_offsets = self._hit = None
+
+    def hit_index(self, gap=0, origin=(0, 0)):
+        """GridHitIndex for this grid, built once per layout change and gap; moving it is free."""
+        index = self._hit
+        if index is None or index.gap != gap:
+            index = self._hit = GridHitIndex(self.row_sizes, self.col_sizes, self, gap)
+        return index if origin == (0, 0) else index.with_origin(origin)
+
+    # --- structure ---
+    def insert_row(self, i, size=ROW_SIZE):
+        """New empty row before row i (i == rows appends); merges it cuts through grow by one."""
+        rows, cols = self.shape
+        cut = [a for a in self._spans_on('row', i) if a[0] < i] if i < rows else []
+        base = i * cols
+        self.cells[base:base] = [Cell() for _ in range(cols)]
+        self.dr[base:base] = array('H', bytes(2 * cols))
+        self.dc[base:base] = array('H', bytes(2 * cols))
+        self.row_sizes.insert(i, size)
+        self._changed()
+        for ar, ac in cut:
+            self.cells[ar * cols + ac].span_r += 1
+            self._claim(ar, ac)
+
+    def insert_col(self, j, size=COL_SIZE):
+        """New empty column before column j; merges it cuts through grow by one."""
+        rows, cols = self.shape
+        cut = [a for a in self._spans_on('col', j) if a[1] < j] if j < cols else []
+        cells, dr, dc = [], array('H'), array('H')
+        zero = array('H', [0])
+        for r in range(rows):
+            a, b = r * cols, r * cols + j
+            cells += self.cells[a:b]; cells.append(Cell()); cells += self.cells[b:a + cols]
+            dr += self.dr[a:b]; dr += zero; dr += self.dr[b:a + cols]
+            dc += self.dc[a:b]; dc += zero; dc += self.dc[b:a + cols]
+        self.cells, self.dr, self.dc = cells, dr, dc
+        self.col_sizes.insert(j, size)
+        self._changed()
+        cols += 1
+        for ar, ac in cut:
+            self.cells[ar * cols + ac].span_c += 1
+            self._claim(ar, ac)
+
+    def delete_row(self, i):
+        """Remove row i; merges through it shrink, one anchored on it moves down to the next row."""
+        rows, cols = self.shape
+        if rows <= 1: return
+        hit = []
+        for ar, ac in self._spans_on('row', i):
+            cell = self.cells[ar * cols + ac]
+            cell.span_r -= 1
+            if not cell.span_r: continue  # Lies entirely in the row
+            if ar == i: self.cells[(i + 1) * cols + ac] = cell
+            hit.append((ar, ac))
+        base = i * cols
+        del self.cells[base:base + cols], self.dr[base:base + cols], self.dc[base:base + cols]
+        self.row_sizes.pop(i)
+        self._changed()
+        for ar, ac in hit: self._claim(ar, ac)
+
+    def delete_col(self, j):
+        """Remove column j; merges through it shrink, one anchored on it moves right."""
+        rows, cols = self.shape
+        if cols <= 1: return
+        hit = []
+        for ar, ac in self._spans_on('col', j):
+            cell = self.cells[ar * cols + ac]
+            cell.span_c -= 1
+            if not cell.span_c: continue
+            if ac == j: self.cells[ar * cols + j + 1] = cell
+            hit.append((ar, ac))
+        cells, dr, dc = [], array('H'), array('H')
+        for r in range(rows):
+            a, b = r * cols, r * cols + j
+            cells += self.cells[a:b]; cells += self.cells[b + 1:a + cols]
+            dr += self.dr[a:b]; dr += self.dr[b + 1:a + cols]
+            dc += self.dc[a:b]; dc += self.dc[b + 1:a + cols]
+        self.cells, self.dr, self.dc = cells, dr, dc
+        self.col_sizes.pop(j)
+        self._changed()
+        cols -= 1
+        for ar, ac in hit: self._claim(ar, ac)
+
+    def merge(self, r0, c0, r1, c1):
+        """Merge the rectangle (inclusive), grown to take in any merge it overlaps; returns the anchor."""
+        rows, cols = self.shape
+        r0, r1 = max(0, min(r0, r1)), min(rows - 1, max(r0, r1))
+        c0, c1 = max(0, min(c0, c1)), min(cols - 1, max(c0, c1))
+        dr, dc, cells = self.dr, self.dc, self.cells
+        grown = True
+        while grown:
+            grown = False
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    k = r * cols + c
+                    ar, ac = r - dr[k], c - dc[k]
+                    anchor = cells[ar * cols + ac]
+                    er, ec = ar + anchor.span_r - 1, ac + anchor.span_c - 1
+                    if ar < r0 or ac < c0 or er > r1 or ec > c1:
+                        r0, c0, r1, c1 = min(r0, ar), min(c0, ac), max(r1, er), max(c1, ec)
+                        grown = True
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                cell = cells[r * cols + c]
+                cell.span_r = cell.span_c = 1
+        anchor = cells[r0 * cols + c0]
+        anchor.span_r, anchor.span_c = r1 - r0 + 1, c1 - c0 + 1
+        self._claim(r0, c0)
+        self._changed()
+        return r0, c0
+
+    def split(self, r, c):
+        """Undo the merge covering (r, c); the covered positions show their own cells again."""
+        ar, ac = self.owner(r, c)
+        cols = len(self.col_sizes)
+        cell = self.cells[ar * cols + ac]
+        span_r, span_c = cell.span_r, cell.span_c
+        cell.span_r = cell.span_c = 1
+        zeros = array('H', bytes(2 * span_c))
+        for sr in range(span_r):
+            base = (ar + sr) * cols + ac
+            self.dr[base:base + span_c] = zeros
+            self.dc[base:base + span_c] = zeros
+        self._changed()
+
+    # --- conversion ---
+    def copy(self):
+        """An independent grid with the same content; shares only the offsets and hit index, never changed in place."""
+        new = GridModel.__new__(GridModel)
+        new.row_sizes, new.col_sizes = list(self.row_sizes), list(self.col_sizes)
+        new.cells = [cell.copy() for cell in self.cells]
+        new.dr, new.dc = array('H', self.dr), array('H', self.dc)
+        new.version = self.version
+        new._row_offsets, new._col_offsets, new._hit = self._row_offsets, self._col_offsets, self._hit
+        return new
+
+    def to_cells(self):
+        """Plain {(r, c): dict} as stored in layout files."""
+        return {pos: dict(cell) for pos, cell in self.items()}
@@ -0,0 +1,204 @@
+"""Geometry based hit testing for the keypad grid.
+
+Resolves a screen point to the cell under it from the layout itself
+(row/column sizes, theme gap and merged spans) instead of asking the
+window system which widget sits there and walking up its parents.
+"""
+from bisect import bisect_right
+
+
+def prefix_offsets(sizes):
+    """Return [0, s0, s0+s1, ...] - the start offset of every track plus the total."""
+    offsets = [0]
+    total = 0
+    for s in sizes:
+        total += s
+        offsets.append(total)
+    return offsets
+
+
+class GridHitIndex:
+    """Precomputed lookup table from pixel position to anchor cell.
+
+    Build it once per layout/window origin; every lookup afterwards is two
+    bisects and one table read.  Cells are reported as their merged anchor,
+    i.e. the (r, c) key of the grid_data entry that owns the span.
+    """
+    __slots__ = ("rows", "cols", "gap", "origin_x", "origin_y",
+                 "row_offsets", "col_offsets", "owners", "spans")
+
+    def __init__(self, row_sizes, col_sizes, grid_data, gap=0, origin=(0, 0)):
+        self.rows, self.cols = len(row_sizes), len(col_sizes)
+        self.gap = gap
+        self.origin_x, self.origin_y = origin
+        owner_table = getattr(grid_data, 'owner_table', None)
+        if owner_table is not None:
+            # A GridModel already keeps offsets and span ownership current
+            self.row_offsets, self.col_offsets = grid_data.row_offsets(), grid_data.col_offsets()
+            self.owners, self.spans = owner_table()
+            return
+        self.row_offsets = prefix_offsets(row_sizes)
+        self.col_offsets = prefix_offsets(col_sizes)
+        # Flat row-major owner table: position -> anchor (r, c)
+        self.owners = [None] * (self.rows * self.cols)
+        # Anchor -> (span_r, span_c), clipped to the grid
+        self.spans = {}
+        self._build_owners(grid_data)
+
+    def _build_owners(self, grid_data):
+        rows, cols, owners = self.rows, self.cols, self.owners
+        # Same claim order as refresh_grid: row-major, first anchor wins
+        for r in range(rows):
+            for c in range(cols):
+                if owners[r * cols + c] is not None: continue
+                cell = grid_data.get((r, c), {})
+                span_r = min(cell.get('span_r', 1), rows - r)
+                span_c = min(cell.get('span_c', 1), cols - c)
+                anchor = (r, c)
+                self.spans[anchor] = (span_r, span_c)
+                for sr in range(r, r + span_r):
+                    base = sr * cols
+                    for sc in range(c, c + span_c):
+                        if owners[base + sc] is None: owners[base + sc] = anchor
+
+    def with_origin(self, origin):
+        """The same index for another window position; the tables are shared, not copied."""
+        index = GridHitIndex.__new__(GridHitIndex)
+        for name in self.__slots__: setattr(index, name, getattr(self, name))
+        index.origin_x, index.origin_y = origin
+        return index
+
+    def matches_origin(self, origin):
+        return origin == (self.origin_x, self.origin_y)
+
+    def owner(self, r, c):
+        """Anchor cell owning grid position (r, c), or None if out of range."""
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return self.owners[r * self.cols + c]
+        return None
+
+    def position_at(self, x, y):
+        """Raw (r, c) grid position for a point relative to the grid origin."""
+        c = bisect_right(self.col_offsets, x) - 1
+        r = bisect_right(self.row_offsets, y) - 1
+        if 0 <= r < self.rows and 0 <= c < self.cols: return r, c
+        return None
+
+    def cell_at(self, x, y):
+        """Anchor cell under a point relative to the grid origin, None for gaps/outside."""
+        pos = self.position_at(x, y)
+        if pos is None: return None
+        anchor = self.owners[pos[0] * self.cols + pos[1]]
+        ar, ac = anchor
+        span_r, span_c = self.spans[anchor]
+        # The widget stops `gap` pixels short of its last track (padx/pady=(0, gap))
+        if x >= self.col_offsets[ac + span_c] - self.gap: return None
+        if y >= self.row_offsets[ar + span_r] - self.gap: return None
+        return anchor
+
+    def lookup(self, x_root, y_root):
+        """Anchor cell under a screen point."""
+        return self.cell_at(x_root - self.origin_x, y_root - self.origin_y)
+
+    def cell_rect(self, r, c):
+        """(x0, y0, x1, y1) of an anchor cell relative to the grid origin, gap excluded."""
+        span_r, span_c = self.spans[(r, c)]
+        return (self.col_offsets[c], self.row_offsets[r],
+                self.col_offsets[c + span_c] - self.gap, self.row_offsets[r + span_r] - self.gap)
+
+    def segment(self, x0, y0, x1, y1):
+        """Anchor cells a straight move from (x0, y0) to (x1, y1) passes over, in order.
+
+        Points are relative to the grid origin.  This is a grid DDA: from the
+        start cell, step to whichever row or column boundary the segment
+        reaches next, so every track crossed is visited once however long the
+        move.  A merged cell is reported once; a cell the segment only
+        touches in its gap strip or at a corner point is left out.
+        """
+        dx, dy = x1 - x0, y1 - y0
+        if not dx and not dy:
+            anchor = self.cell_at(x0, y0)
+            return [anchor] if anchor else []
+        col_offsets, row_offsets = self.col_offsets, self.row_offsets
+        a, b = self.position_at(x0, y0), self.position_at(x1, y1)
+        if a is not None and b is not None:
+            cols, owners = self.cols, self.owners
+            anchor = owners[a[0] * cols + a[1]]
+            if anchor == owners[b[0] * cols + b[1]]:
+                # Both ends on one cell (most samples): a span is convex, so nothing else is crossed
+                return [anchor] if self._crosses(anchor, x0, y0, dx, dy, 0.0, 1.0) else []
+        # Clip to the grid rectangle first (Liang-Barsky)
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, x0), (dx, col_offsets[-1] - x0), (-dy, y0), (dy, row_offsets[-1] - y0)):
+            if not p:
+                if q < 0: return []
+            elif p < 0: t0 = max(t0, q / p)
+            else: t1 = min(t1, q / p)
+        out = self._walk(x0, y0, dx, dy, t0, t1) if t0 < t1 else []
+        # An end point exactly on a cell's top/left edge is in that cell, as lookup() has it
+        first, end = self.cell_at(x0, y0), self.cell_at(x1, y1)
+        if first and (not out or out[0] != first): out.insert(0, first)
+        if end and (not out or out[-1] != end): out.append(end)
+        return out
+
+    def _walk(self, x0, y0, dx, dy, t0, t1):
+        """The DDA itself, over the stretch [t0, t1] of the segment that lies inside the grid."""
+        col_offsets, row_offsets = self.col_offsets, self.row_offsets
+        rows, cols, owners = self.rows, self.cols, self.owners
+        c = min(max(bisect_right(col_offsets, x0 + dx * t0) - 1, 0), cols - 1)
+        r = min(max(bisect_right(row_offsets, y0 + dy * t0) - 1, 0), rows - 1)
+        inf = float('inf')
+        # Parameter t at which the segment reaches the next column / row boundary
+        step_c = (dx > 0) - (dx < 0)
+        step_r = (dy > 0) - (dy < 0)
+        next_x = (col_offsets[c + (step_c > 0)] - x0) / dx if step_c else inf
+        next_y = (row_offsets[r + (step_r > 0)] - y0) / dy if step_r else inf
+        out = []
+        last, start, t = owners[r * cols + c], t0, t0
+        while True:
+            t = min(next_x, next_y, t1)
+            if t >= t1: break
+            if next_x == t:
+                c += step_c
+                if not 0 <= c < cols: break
+                next_x = (col_offsets[c + (step_c > 0)] - x0) / dx
+            if next_y == t:  # Both at once: the segment runs exactly through a corner
+                r += step_r
+                if not 0 <= r < rows: break
+                next_y = (row_offsets[r + (step_r > 0)] - y0) / dy
+            anchor = owners[r * cols + c]
+            if anchor != last:
+                if self._crosses(last, x0, y0, dx, dy, start, t): out.append(last)
+                last, start = anchor, t
+        if self._crosses(last, x0, y0, dx, dy, start, t): out.append(last)
+        return out
+
+    def _crosses(self, anchor, x0, y0, dx, dy, ta, tb):
+        """Whether the stretch [ta, tb] of a segment runs through the anchor's widget, not just its gap."""
+        gap = self.gap
+        if not gap: return ta < tb
+        r, c = anchor
+        span_r, span_c = self.spans[anchor]
+        for p, o, lo, hi in ((dx, x0, self.col_offsets[c], self.col_offsets[c + span_c] - gap),
+                             (dy, y0, self.row_offsets[r], self.row_offsets[r + span_r] - gap)):
+            if not p:
+                if not lo <= o < hi: return False
+                continue
+            a, b = (lo - o) / p, (hi - o) / p
+            if a > b: a, b = b, a
+            if a > ta: ta = a
+            if b < tb: tb = b
+        return ta < tb
+
+    def lookup_segment(self, x0_root, y0_root, x1_root, y1_root):
+        """segment() between two screen points."""
+        ox, oy = self.origin_x, self.origin_y
+        return self.segment(x0_root - ox, y0_root - oy, x1_root - ox, y1_root - oy)
+
+    def lookup_path(self, points):
+        """Anchor cells along a polyline of screen points, in order, each run of one cell reported once."""
+        out = []
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            for anchor in self.lookup_segment(x0, y0, x1, y1):
+                if not out or out[-1] != anchor: out.append(anchor)
+        return out
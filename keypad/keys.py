@@ -0,0 +1,227 @@
+"""Key names, the DirectInput scan codes they map to, and the cell key compiler."""
+import re
+from collections import namedtuple
+
+# Common DirectInput Scan Codes
+SCAN_CODES = {
+    'esc': 0x01, '1': 0x02, '2': 0x03, '3': 0x04, '4': 0x05, '5': 0x06, '6': 0x07, '7': 0x08, '8': 0x09, '9': 0x0A, '0': 0x0B,
+    'q': 0x10, 'w': 0x11, 'e': 0x12, 'r': 0x13, 't': 0x14, 'y': 0x15, 'u': 0x16, 'i': 0x17, 'o': 0x18, 'p': 0x19,
+    'a': 0x1E, 's': 0x1F, 'd': 0x20, 'f': 0x21, 'g': 0x22, 'h': 0x23, 'j': 0x24, 'k': 0x25, 'l': 0x26,
+    'z': 0x2C, 'x': 0x2D, 'c': 0x2E, 'v': 0x2F, 'b': 0x30, 'n': 0x31, 'm': 0x32,
+    'space': 0x39, 'enter': 0x1C, 'shift': 0x2A, 'ctrl': 0x1D, 'alt': 0x38,
+    'up': 0xC8, 'left': 0xCB, 'right': 0xCD, 'down': 0xD0,
+    'f1': 0x3B, 'f2': 0x3C, 'f3': 0x3D, 'f4': 0x3E, 'f5': 0x3F, 'f6': 0x40,
+    'f7': 0x41, 'f8': 0x42, 'f9': 0x43, 'f10': 0x44, 'f11': 0x57, 'f12': 0x58
+}
+
+# Named keys beyond SCAN_CODES that cells may use
+EXTRA_SCAN_CODES = {
+    'tab': 0x0F, 'backspace': 0x0E, 'capslock': 0x3A,
+    '-': 0x0C, '=': 0x0D, '[': 0x1A, ']': 0x1B, ';': 0x27, "'": 0x28, '`': 0x29, '\\': 0x2B,
+    ',': 0x33, '.': 0x34, '/': 0x35,
+    'lshift': 0x2A, 'rshift': 0x36, 'lctrl': 0x1D, 'lalt': 0x38,
+    'home': 0xC7, 'end': 0xCF, 'pageup': 0xC9, 'pagedown': 0xD1, 'insert': 0xD2, 'delete': 0xD3,
+}
+
+KEY_ALIASES = {
+    'escape': 'esc', 'return': 'enter', 'control': 'ctrl', 'spacebar': 'space',
+    'del': 'delete', 'ins': 'insert', 'pgup': 'pageup', 'pgdn': 'pagedown', 'caps': 'capslock',
+    'comma': ',',
+}
+
+MODIFIERS = {'ctrl', 'shift', 'alt', 'lshift', 'rshift', 'lctrl', 'lalt'}
+
+
+class KeySpecError(ValueError):
+    """A cell key string that cannot be compiled."""
+
+
+# Compiled cell key.  `down`/`up` are the exact (code, is_up) events to send;
+# `text` is set instead for strings that are typed rather than pressed, and
+# `macro` for macros (see compile_macro).
+KeyAction = namedtuple('KeyAction', 'source codes down up text macro', defaults=(None,))
+
+# Compiled macro.  `steps` are (offset_s, events) from the start, in time
+# order, each a tuple of (code, is_up) sent together; `toggle` makes a
+# re-press cancel a running macro instead of restarting it.
+Macro = namedtuple('Macro', 'steps toggle duration')
+
+MACRO_PREFIX = re.compile(r'\s*macro(\s+toggle)?\s*:', re.I)
+MACRO_TOKEN = re.compile(r'\s*(?:([(),])|\*\s*(\d+)|([^(),*]+))')
+MACRO_WAIT = re.compile(r'(\d+(?:\.\d+)?)\s*ms$')
+MACRO_HOLD = re.compile(r'(.+?)\s*\[\s*(\d+(?:\.\d+)?)\s*(?:ms)?\s*\]$')
+MACRO_TAP_MS = 12  # how long a plain key in a macro stays down, as a pulse does
+MAX_MACRO_EVENTS = 10000
+MAX_MACRO_STEPS = 10000  # steps after unrolling repeats, waits included
+MAX_MACRO_MS = 10 * 60 * 1000
+
+
+def scan_code(name):
+    """Scan code for a key name (case-insensitive, aliases allowed), or None."""
+    name = KEY_ALIASES.get(name, name)
+    code = SCAN_CODES.get(name)
+    return code if code is not None else EXTRA_SCAN_CODES.get(name)
+
+
+def compile_key(source):
+    """Compile a cell key string once so the hot path only replays events.
+
+    'a', 'F5', 'space' -> one scan code; 'ctrl+shift+a' -> a chord, modifiers
+    pressed first and released last.  A single unknown token such as 'hello'
+    compiles to a text action (typed, not pressed).  Malformed combos raise
+    KeySpecError.  Returns None for an empty cell.  'macro: ...' compiles
+    a macro (compile_macro).
+    """
+    spec = source.strip().lower()
+    if not spec: return None
+    if MACRO_PREFIX.match(spec): return compile_macro(source)
+    if '+' not in spec or spec == '+':
+        code = scan_code(spec)
+        if code is None: return KeyAction(source, (), (), (), source.strip())
+        return KeyAction(source, (code,), ((code, False),), ((code, True),), None)
+    names = [p.strip() for p in spec.split('+')]
+    if not all(names): raise KeySpecError(f"Empty key in '{source.strip()}'")
+    codes = []
+    for name in sorted(names, key=lambda n: KEY_ALIASES.get(n, n) not in MODIFIERS):
+        code = scan_code(name)
+        if code is None: raise KeySpecError(f"Unknown key '{name}' in '{source.strip()}'")
+        if code in codes: raise KeySpecError(f"'{name}' used twice in '{source.strip()}'")
+        codes.append(code)
+    down = tuple((c, False) for c in codes)
+    up = tuple((c, True) for c in reversed(codes))
+    return KeyAction(source, tuple(codes), down, up, None)
+
+
+def compile_macro(source, tap_ms=MACRO_TAP_MS):
+    """Compile 'macro: step, step, ...' into a KeyAction carrying a Macro.
+
+    Steps run one after another:
+
+      a, ctrl+c    tap (down, up tap_ms later)
+      a[200]       hold for 200 ms
+      +shift       press and keep down;  -shift  release
+      50ms         wait
+      step*3       repeat a step; (a, 30ms, b)*5 repeats a group
+
+    'macro toggle:' makes a second press stop the macro instead of
+    restarting it.  Keys still down at the end are released.  Repeats
+    are unrolled here, once, so running a macro only replays events.
+    """
+    m = MACRO_PREFIX.match(source)
+    body = source[m.end():]
+    tokens, pos = [], 0
+    while pos < len(body):
+        t = MACRO_TOKEN.match(body, pos)
+        if t is None or t.end() == pos: break
+        pos = t.end()
+        punct, count, word = t.groups()
+        if punct: tokens.append(punct)
+        elif count: tokens.append(int(count))
+        elif word.strip(): tokens.append(word.strip().lower())
+    if body[pos:].strip(): raise KeySpecError(f"Cannot read '{body[pos:].strip()}' in macro")
+    nodes, i = _parse_steps(tokens, 0, source)
+    if i < len(tokens): raise KeySpecError(f"Unmatched ')' in '{source.strip()}'")
+    if not nodes: raise KeySpecError("Empty macro")
+    # Sized before unrolling, so a wait repeated a million times is refused without building it
+    steps, duration = _measure(nodes, tap_ms)
+    if steps > MAX_MACRO_STEPS:
+        raise KeySpecError(f"Macro too long (over {MAX_MACRO_STEPS:,} steps) in '{source.strip()}'")
+    if duration > MAX_MACRO_MS:
+        raise KeySpecError(f"Macro too long (over {MAX_MACRO_MS // 60000} minutes) in '{source.strip()}'")
+
+    events, held = [], {}
+    end = _emit_steps(nodes, 0.0, tap_ms, events, held, source)
+    if not events: raise KeySpecError(f"Macro sends no keys in '{source.strip()}'")
+    for code in reversed(list(held)): events.append((end, code, True))
+    steps = []
+    for t, code, up in events:
+        if steps and steps[-1][0] == t: steps[-1][1].append((code, up))
+        else: steps.append((t, [(code, up)]))
+    steps = tuple((t / 1000.0, tuple(evs)) for t, evs in steps)
+    codes = tuple(dict.fromkeys(code for _, code, _ in events))
+    return KeyAction(source, codes, (), (), None, Macro(steps, bool(m.group(1)), end / 1000.0))
+
+
+def _parse_steps(tokens, i, source):
+    """Steps from tokens[i] up to a closing ')' or the end: (nodes, index after them)."""
+    nodes = []
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok == ')': break
+        if tok == ',':
+            i += 1
+            continue
+        if tok == '(':
+            node, i = _parse_steps(tokens, i + 1, source)
+            if i >= len(tokens): raise KeySpecError(f"Unclosed '(' in '{source.strip()}'")
+            node = ('group', node)
+            i += 1
+        elif isinstance(tok, int):
+            raise KeySpecError(f"'*{tok}' repeats nothing in '{source.strip()}'")
+        else:
+            node = _parse_step(tok)
+            i += 1
+        if i < len(tokens) and isinstance(tokens[i], int):
+            if tokens[i] == 0: raise KeySpecError(f"'*0' repeats a step no times in '{source.strip()}'")
+            node = ('repeat', tokens[i], node)
+            i += 1
+        nodes.append(node)
+    return nodes, i
+
+
+def _parse_step(word):
+    wait = MACRO_WAIT.match(word)
+    if wait: return ('wait', float(wait.group(1)))
+    hold = MACRO_HOLD.match(word)
+    if hold: return ('hold', _macro_codes(hold.group(1)), float(hold.group(2)))
+    if len(word) > 1 and word[0] in '+-':
+        return ('down' if word[0] == '+' else 'up', _macro_codes(word[1:]))
+    return ('tap', _macro_codes(word))
+
+
+def _macro_codes(name):
+    action = compile_key(name)
+    if action is None or not action.codes or action.macro is not None:
+        raise KeySpecError(f"Unknown key '{name.strip()}' in macro")
+    return action.codes
+
+
+def _measure(nodes, tap_ms):
+    """(steps, duration in ms) the nodes unroll to, computed without unrolling them."""
+    steps = duration = 0
+    for node in nodes:
+        kind = node[0]
+        if kind == 'group': n, ms = _measure(node[1], tap_ms)
+        elif kind == 'repeat':
+            n, ms = _measure((node[2],), tap_ms)
+            n, ms = n * node[1], ms * node[1]
+        else: n, ms = 1, node[1] if kind == 'wait' else node[2] if kind == 'hold' else tap_ms if kind == 'tap' else 0
+        steps += n
+        duration += ms
+    return steps, duration
+
+
+def _emit_steps(nodes, t, tap_ms, events, held, source):
+    """Append (t_ms, code, is_up) for nodes starting at t; returns the time after them."""
+    for node in nodes:
+        kind = node[0]
+        if kind == 'group': t = _emit_steps(node[1], t, tap_ms, events, held, source)
+        elif kind == 'repeat':
+            for _ in range(node[1]): t = _emit_steps((node[2],), t, tap_ms, events, held, source)
+        elif kind == 'wait': t += node[1]
+        elif kind == 'down':
+            for code in node[1]:
+                events.append((t, code, False))
+                held[code] = True
+        elif kind == 'up':
+            for code in reversed(node[1]):
+                events.append((t, code, True))
+                held.pop(code, None)
+        else:
+            codes = node[1]
+            for code in codes: events.append((t, code, False))
+            t += node[2] if kind == 'hold' else tap_ms
+            for code in reversed(codes): events.append((t, code, True))
+        if len(events) > MAX_MACRO_EVENTS:
+            raise KeySpecError(f"Macro too long (over {MAX_MACRO_EVENTS:,} key events) in '{source.strip()}'")
+    return t
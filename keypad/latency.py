@@ -0,0 +1,150 @@
+"""Latency probes for the touch path, recorded into fixed-bucket histograms.
+
+Stages, all measured per touch record:
+
+  touch     dwTime (when the digitizer saw the contact) -> wndproc entry.
+            Both sides are GetTickCount milliseconds, so this one is only
+            millisecond-accurate.
+  hit       wndproc entry -> hit-test done on the touch input thread
+  dispatch  wndproc entry -> SendInput returned for the record's frame
+  release   wndproc entry -> key-up sent by the release thread
+
+The wndproc stamps each record with its perf_counter_ns entry time (in
+TOUCHINPUT.dwExtraInfo) so later stages can be measured on other threads.
+Dispatch latency is also kept per cell.
+
+Probes are off by passing None instead of a LatencyProbes: call sites test
+`probes is not None` and do nothing else.  Each histogram has a single
+writer thread (touch: Tk, hit/dispatch/cells: touch input, release:
+release thread), so recording takes no lock.
+"""
+import csv
+import json
+import time
+from bisect import bisect_left
+
+STAGES = ('touch', 'hit', 'dispatch', 'release')
+
+# Upper bucket bounds in ns: 1 us to ~13 s, four buckets per doubling (+-9%)
+BOUNDS_NS = tuple(int(1000 * 2 ** (i / 4)) for i in range(96))
+MAX_NS = 60 * 10**9  # Anything longer is a stale or foreign stamp, not a latency
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Counts of samples per fixed log-spaced bucket; percentiles are bucket upper bounds."""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS_NS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[bisect_left(BOUNDS_NS, ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max: self.max = ns
+
+    def percentile(self, p):
+        if not self.count: return 0
+        rank = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BOUNDS_NS[i], self.max) if i < len(BOUNDS_NS) else self.max
+        return self.max
+
+    def summary(self):
+        """{count, mean, p50, p95, p99, max}; times in microseconds."""
+        out = {'count': self.count, 'mean': self.total / self.count / 1000.0 if self.count else 0.0}
+        for p in PERCENTILES: out[f'p{p}'] = self.percentile(p) / 1000.0
+        out['max'] = self.max / 1000.0
+        return out
+
+
+class LatencyProbes:
+    """Per-stage and per-cell latency histograms for touch input.
+
+    describe(target) -> (label, codes) names a hit target for the per-cell
+    table and lists the scan codes its press sends, so their key-ups can be
+    matched back to the touch that caused them.
+    """
+
+    def __init__(self, describe=None, clock_ns=time.perf_counter_ns):
+        self.describe = describe or (lambda target: (str(target), ()))
+        self.clock_ns = clock_ns
+        self.stages = {name: Histogram() for name in STAGES}
+        self.cells = {}  # label -> dispatch Histogram
+        self._pending = {}  # scan code -> entry stamp of the press awaiting its key-up
+
+    def stamp(self, inputs, n, tick_ms):
+        """wndproc: record touch->entry for n TOUCHINPUTs and stamp them with the entry time."""
+        now = self.clock_ns()
+        touch = self.stages['touch']
+        for i in range(n):
+            ti = inputs[i]
+            touch.record(((tick_ms - ti.dwTime) & 0xffffffff) * 1000000)
+            ti.dwExtraInfo = now
+
+    def hit(self, stamp):
+        d = self.clock_ns() - stamp
+        if 0 <= d < MAX_NS: self.stages['hit'].record(d)
+
+    def dispatched(self, hits):
+        """Input thread, after the frame was sent: hits is a list of (stamp, target)."""
+        now = self.clock_ns()
+        stage, cells, pending = self.stages['dispatch'], self.cells, self._pending
+        for stamp, target in hits:
+            d = now - stamp
+            if not 0 <= d < MAX_NS: continue
+            stage.record(d)
+            label, codes = self.describe(target)
+            h = cells.get(label)
+            if h is None: h = cells[label] = Histogram()
+            h.record(d)
+            for code in codes: pending[code] = stamp
+
+    def released(self, codes):
+        """Release thread, after the key-ups were sent."""
+        now = self.clock_ns()
+        stage, pending = self.stages['release'], self._pending
+        for code in codes:
+            stamp = pending.pop(code, None)
+            if stamp is not None: stage.record(now - stamp)
+
+    def reset(self):
+        for h in self.stages.values(): h.__init__()
+        self.cells.clear()
+        self._pending.clear()
+
+    def summary(self):
+        return {'stages': {name: h.summary() for name, h in self.stages.items()},
+                'cells': {label: h.summary() for label, h in sorted(self.cells.items())}}
+
+    def format_summary(self):
+        """Short text table for the control panel (milliseconds)."""
+        lines = ["stage      p50   p95   p99   max"]
+        for name, h in self.stages.items():
+            s = h.summary()
+            lines.append(f"{name:<8}" + "".join(f"{s[k] / 1000:6.2f}" for k in ('p50', 'p95', 'p99', 'max')))
+        return "\n".join(lines)
+
+    def export_json(self, path):
+        data = self.summary()
+        data['bounds_ns'] = BOUNDS_NS
+        data['buckets'] = {name: h.counts for name, h in self.stages.items()}
+        with open(path, 'w') as f: json.dump(data, f, indent=1)
+
+    def export_csv(self, path):
+        cols = ['count', 'mean'] + [f'p{p}' for p in PERCENTILES] + ['max']
+        summary = self.summary()
+        with open(path, 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['scope', 'name'] + [c if c == 'count' else f'{c}_us' for c in cols])
+            for scope in ('stages', 'cells'):
+                for name, s in summary[scope].items():
+                    w.writerow([scope[:-1], name] + [s[c] if c == 'count' else f"{s[c]:.1f}" for c in cols])
@@ -0,0 +1,66 @@
+"""The keypad layout: track sizes and cells, independent of any UI.
+
+A layout is a list of row heights, a list of column widths and a dict of
+cells keyed by (row, col).  Each cell is a plain dict with at least 'key',
+'span_r' and 'span_c'; a merged cell lives at its top-left anchor and the
+positions it covers keep their own (ignored) entries, as the editor
+expects when the cell is split again.  The editor works on the same data
+as a keypad.grid.GridModel (Layout.grid()); either can be saved.
+"""
+from keypad.grid import GridModel, iter_anchors
+from keypad.hittest import GridHitIndex
+
+
+def parse_pos(text):
+    """'(r, c)' as written by the layout files -> (r, c), without eval."""
+    r, c = text.strip().strip("()").split(",")
+    return int(r), int(c)
+
+
+def default_cell():
+    return {'key': '', 'span_r': 1, 'span_c': 1}
+
+
+class Layout:
+    """Row/column sizes and cells; the model the engine and the editor share."""
+
+    __slots__ = ('row_sizes', 'col_sizes', 'cells')
+
+    def __init__(self, row_sizes, col_sizes, cells=None):
+        self.row_sizes = row_sizes
+        self.col_sizes = col_sizes
+        self.cells = cells if cells is not None else {}
+
+    @classmethod
+    def blank(cls, rows, cols, row_size=40, col_size=60):
+        return cls([row_size] * rows, [col_size] * cols,
+                   {(r, c): default_cell() for r in range(rows) for c in range(cols)})
+
+    @classmethod
+    def from_dict(cls, d):
+        """Read a saved layout ({"(r, c)": cell}) or a trace header ([[r, c, cell], ...])."""
+        cells = d["cells"]
+        if isinstance(cells, dict):
+            cells = {parse_pos(k): v for k, v in cells.items()}
+        else:
+            cells = {(r, c): v for r, c, v in cells}
+        return cls(list(d["row_sizes"]), list(d["col_sizes"]), cells)
+
+    def to_dict(self):
+        return {"row_sizes": self.row_sizes, "col_sizes": self.col_sizes,
+                "cells": {str(k): dict(v) for k, v in self.cells.items()}}
+
+    @property
+    def shape(self):
+        return len(self.row_sizes), len(self.col_sizes)
+
+    def anchors(self):
+        """(pos, cell) for every visible cell: anchors of merges and plain cells, row-major."""
+        return iter_anchors(self.cells, *self.shape)
+
+    def grid(self):
+        """The layout as an editable GridModel."""
+        return GridModel(self.row_sizes, self.col_sizes, self.cells)
+
+    def hit_index(self, gap=0, origin=(0, 0)):
+        return GridHitIndex(self.row_sizes, self.col_sizes, self.cells, gap, origin)
@@ -0,0 +1,233 @@
+"""Layout files: a versioned JSON schema, a compact binary form and the old v0 files.
+
+v1 JSON is one header line, then one cell per line, so it can be read in
+chunks without holding the whole document:
+
+  {"format": "keypad-layout", "version": 1, "row_sizes": [...], "col_sizes": [...], ..., "cells": [
+  [0, 0, 1, 1, "A"],
+  [0, 1, 1, 2, "ctrl+c", {"repeat_ms": 30}],
+  ]}
+
+Each cell is [row, col, span_r, span_c, key] plus an optional object of
+further fields.  Only cells that differ from an empty 1x1 cell are stored.
+Files that were reformatted by hand are still valid JSON and load too,
+just without the chunking.
+
+The binary form (.kpl) has a fixed header, the track sizes as uint16, a
+JSON blob with the key table and extra fields, then 12-byte cell records.
+
+v0 is what older versions wrote: {"(r, c)": {"key", "span_r", "span_c"}}.
+
+Loading validates every cell and hands each key to `compile` in the same
+pass that fills the GridModel; nothing is ever eval'd.
+"""
+import json
+import struct
+import sys
+from array import array
+
+from keypad.grid import GridModel
+from keypad.layout import parse_pos
+from keypad.repeat import MAX_INTERVAL_MS, MIN_INTERVAL_MS
+
+FORMAT = "keypad-layout"
+VERSION = 1
+CHUNK = 4096  # cells parsed per json.loads / struct.iter_unpack call
+
+BIN_MAGIC = b'KPLB'
+BIN_HEADER = struct.Struct('<4sHHHII')  # magic, version, rows, cols, cell count, JSON blob length
+BIN_CELL = struct.Struct('<HHHHI')  # row, col, span_r, span_c, index into the key table
+MAX_TRACKS = 0xFFFF
+
+
+class LayoutError(ValueError):
+    """A layout file that cannot be loaded; the message says where and why."""
+
+
+# --- loading ---
+def load_layout(path, compile=None):
+    """Read any layout file -> (GridModel, meta); meta holds the other top-level fields (renderer...).
+
+    compile(key), if given, is called for every cell key as it is read.
+    """
+    with open(path, 'rb') as f:
+        if f.read(4) == BIN_MAGIC:
+            f.seek(0)
+            return _load_binary(f, path, compile)
+        f.seek(0)
+        first = f.readline().decode('utf-8', 'replace')
+        if first.rstrip().endswith('"cells": ['):
+            header = _json(first.rstrip() + ']}', path)
+            return _load_lines(f, path, header, compile)
+        f.seek(0)
+        doc = _json(f.read(), path)
+    if not isinstance(doc, dict) or 'cells' not in doc: raise LayoutError(f"{path}: not a keypad layout")
+    cells = doc.pop('cells')
+    if 'version' not in doc:
+        if not isinstance(cells, dict): raise LayoutError(f"{path}: v0 cells must be an object")
+        return _fill(path, doc, _v0_cells(cells, path), compile)
+    return _fill(path, doc, cells, compile)
+
+
+def _json(text, path):
+    try: return json.loads(text)
+    except ValueError as e: raise LayoutError(f"{path}: {e}") from None
+
+
+def _v0_cells(cells, path):
+    for k, v in cells.items():
+        try: r, c = parse_pos(k)
+        except ValueError: raise LayoutError(f"{path}: bad cell position {k!r}") from None
+        if not isinstance(v, dict): raise LayoutError(f"{path}: cell {k} is not an object")
+        extra = {n: x for n, x in v.items() if n not in ('key', 'span_r', 'span_c')}
+        yield [r, c, v.get('span_r', 1), v.get('span_c', 1), v.get('key', '')] + ([extra] if extra else [])
+
+
+def _load_lines(f, path, header, compile):
+    def cells():
+        batch = []
+        for line in f:
+            line = line.strip()
+            if line.startswith(b']'): break  # ']}' closes the document
+            if line: batch.append(line.rstrip(b','))
+            if len(batch) >= CHUNK:
+                yield from _json(b'[' + b','.join(batch) + b']', path)
+                batch.clear()
+        if batch: yield from _json(b'[' + b','.join(batch) + b']', path)
+    header.pop('cells', None)
+    return _fill(path, header, cells(), compile)
+
+
+def _sizes(meta, name, path):
+    sizes = meta.pop(name, None)
+    if (not isinstance(sizes, list) or not 0 < len(sizes) <= MAX_TRACKS
+            or not all(type(s) is int and 0 < s <= MAX_TRACKS for s in sizes)):
+        raise LayoutError(f"{path}: {name} must be a non-empty list of positive sizes")
+    return sizes
+
+
+def _check_header(meta, path):
+    if meta.get('format', FORMAT) != FORMAT: raise LayoutError(f"{path}: not a keypad layout")
+    version = meta.get('version', 0)
+    if type(version) is not int or version > VERSION:
+        raise LayoutError(f"{path}: layout version {version} is newer than this app supports ({VERSION})")
+    meta.pop('format', None)
+    meta.pop('version', None)
+
+
+def _fill(path, meta, cells, compile):
+    """The single pass: validate each cell record, store it, compile its key."""
+    _check_header(meta, path)
+    grid = GridModel(_sizes(meta, 'row_sizes', path), _sizes(meta, 'col_sizes', path))
+    rows, cols = grid.shape
+    records, spans = grid.cells, {}
+    seen = bytearray(rows * cols)
+    for n, cell in enumerate(cells):
+        if not isinstance(cell, list) or len(cell) not in (5, 6):
+            raise LayoutError(f"{path}: cell #{n} must be [row, col, span_r, span_c, key(, fields)]")
+        r, c, span_r, span_c, key = cell[:5]
+        if not all(type(v) is int for v in (r, c, span_r, span_c)):
+            raise LayoutError(f"{path}: cell #{n} has a non-integer position or span")
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise LayoutError(f"{path}: cell #{n} at ({r}, {c}) is outside the {rows}x{cols} grid")
+        if span_r < 1 or span_c < 1: raise LayoutError(f"{path}: cell ({r}, {c}) has an empty span")
+        if type(key) is not str: raise LayoutError(f"{path}: cell ({r}, {c}) key must be a string")
+        i = r * cols + c
+        if seen[i]: raise LayoutError(f"{path}: cell ({r}, {c}) appears twice")
+        seen[i] = 1
+        record = records[i]
+        record.key = key
+        if len(cell) == 6:
+            if not isinstance(cell[5], dict): raise LayoutError(f"{path}: cell ({r}, {c}) fields must be an object")
+            _check_fields(cell[5], r, c, path)
+            if cell[5]: record.extra = cell[5]
+        if span_r > 1 or span_c > 1: spans[(r, c)] = (span_r, span_c)
+        if compile is not None: compile(key)
+    grid.set_spans(spans)
+    return grid, meta
+
+
+def _check_fields(fields, r, c, path):
+    """The optional fields the input path acts on must have the types and ranges the panel would save."""
+    if 'repeat_ms' in fields:
+        ms = fields['repeat_ms']
+        if type(ms) is not int or not MIN_INTERVAL_MS <= ms <= MAX_INTERVAL_MS:
+            raise LayoutError(f"{path}: cell ({r}, {c}) repeat_ms must be a whole number from "
+                              f"{MIN_INTERVAL_MS} to {MAX_INTERVAL_MS}, not {ms!r}")
+    if 'hold' in fields and type(fields['hold']) is not bool:
+        raise LayoutError(f"{path}: cell ({r}, {c}) hold must be true or false, not {fields['hold']!r}")
+
+
+def _load_binary(f, path, compile):
+    head = f.read(BIN_HEADER.size)
+    if len(head) < BIN_HEADER.size: raise LayoutError(f"{path}: truncated header")
+    _, version, rows, cols, count, blob_len = BIN_HEADER.unpack(head)
+    sizes = array('H')
+    try: sizes.frombytes(f.read(2 * (rows + cols)))
+    except ValueError: raise LayoutError(f"{path}: truncated track sizes") from None
+    if len(sizes) != rows + cols: raise LayoutError(f"{path}: truncated track sizes")
+    if sys.byteorder != 'little': sizes.byteswap()
+    meta = _json(f.read(blob_len), path)
+    if not isinstance(meta, dict): raise LayoutError(f"{path}: bad header blob")
+    keys, extra = meta.pop('keys', []), meta.pop('extra', {})
+    meta.update(version=version, row_sizes=sizes[:rows].tolist(), col_sizes=sizes[rows:].tolist())
+    if compile is not None:
+        for key in keys: compile(key)
+
+    def cells():
+        left = count
+        while left:
+            n = min(left, CHUNK)
+            data = f.read(n * BIN_CELL.size)
+            if len(data) != n * BIN_CELL.size: raise LayoutError(f"{path}: truncated cell records")
+            for i, (r, c, span_r, span_c, k) in enumerate(BIN_CELL.iter_unpack(data), count - left):
+                if k >= len(keys): raise LayoutError(f"{path}: cell ({r}, {c}) has no key entry {k}")
+                fields = extra.get(str(i))
+                yield [r, c, span_r, span_c, keys[k]] if fields is None else [r, c, span_r, span_c, keys[k], fields]
+            left -= n
+    return _fill(path, meta, cells(), None)
+
+
+# --- saving ---
+def cell_records(grid):
+    """[row, col, span_r, span_c, key(, fields)] for every cell that is not an empty 1x1 cell."""
+    cols = len(grid.col_sizes)
+    for i, cell in enumerate(grid.cells):
+        if cell.key or cell.extra or cell.span_r > 1 or cell.span_c > 1:
+            r, c = divmod(i, cols)
+            yield [r, c, cell.span_r, cell.span_c, cell.key] + ([cell.extra] if cell.extra else [])
+
+
+def save_layout(path, grid, meta=None, binary=False):
+    """Write grid (and meta such as the renderer) as v1 JSON, or as .kpl binary."""
+    meta = dict(meta or {})
+    if binary:
+        _save_binary(path, grid, meta)
+        return
+    head = {"format": FORMAT, "version": VERSION, **meta,
+            "row_sizes": grid.row_sizes, "col_sizes": grid.col_sizes, "cells": []}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(head)[:-3] + '[\n')  # Leave the cells array open
+        f.write(',\n'.join(json.dumps(rec) for rec in cell_records(grid)))
+        f.write('\n]}\n')
+
+
+def _save_binary(path, grid, meta):
+    rows, cols = grid.shape
+    if rows > MAX_TRACKS or cols > MAX_TRACKS: raise LayoutError(f"{path}: grid too large for the binary format")
+    table, extra, out = {}, {}, []
+    pack = BIN_CELL.pack
+    for n, rec in enumerate(cell_records(grid)):
+        r, c, span_r, span_c, key = rec[:5]
+        k = table.setdefault(key, len(table))
+        out.append(pack(r, c, span_r, span_c, k))
+        if len(rec) == 6: extra[str(n)] = rec[5]
+    blob = json.dumps({**meta, "keys": list(table), "extra": extra}).encode('utf-8')
+    sizes = array('H', grid.row_sizes + grid.col_sizes)
+    if sys.byteorder != 'little': sizes.byteswap()
+    with open(path, 'wb') as f:
+        f.write(BIN_HEADER.pack(BIN_MAGIC, VERSION, rows, cols, len(out), len(blob)))
+        f.write(sizes.tobytes())
+        f.write(blob)
+        f.write(b''.join(out))
+
@@ -0,0 +1,163 @@
+"""Macro playback on absolute deadlines, off the UI thread.
+
+A compiled Macro (keypad.keys.compile_macro) is a list of steps at fixed
+offsets from its start.  MacroRunner fires the first step at once on the
+pressing thread and every later one from a single timer thread at
+start + offset, so a busy Tk thread or a late wakeup delays one step but
+never pushes the rest of the macro back.  Condition.wait only wakes as
+precisely as the OS timer, so the last spin_ms before a deadline is spent
+yielding in a loop instead.
+"""
+import heapq
+import threading
+import time
+
+
+class _Run:
+    __slots__ = ('macro', 'start', 'step', 'held', 'done')
+
+    def __init__(self, macro, start):
+        self.macro = macro
+        self.start = start
+        self.step = 0
+        self.held = {}  # codes this run has down, in press order
+        self.done = False
+
+
+class MacroRunner:
+    """Runs macros, calling `on_events(events)` with each batch of (code, is_up) that falls due.
+
+    start(macro) on a running macro restarts it, or cancels it for a
+    toggle macro; either way the keys it had down are released first.
+    Steps that fall due together, across macros, go out as one batch; a
+    step that is late is still sent, in order.  Thread-safe; on_events is
+    called under the runner's lock so batches never interleave.  With
+    threaded=False no thread is started and the owner drives it with
+    next_deadline()/run_due(), e.g. on a simulated clock.
+    """
+
+    def __init__(self, on_events, clock=time.monotonic, threaded=True, spin_ms=1.0):
+        self.on_events = on_events
+        self.clock = clock
+        self.threaded = threaded
+        self.spin = spin_ms / 1000.0
+        self._runs = {}  # Macro -> its _Run while playing
+        self._heap = []  # (deadline, seq, run) for each run's next step; finished runs skipped lazily
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self, macro):
+        """Press: play `macro` from now.  Returns False if the press only cancelled it (toggle)."""
+        with self._cond:
+            events = []
+            run = self._runs.pop(macro, None)
+            if run is not None:
+                self._cancel(run, events)
+                if macro.toggle:
+                    if events: self.on_events(events)
+                    return False
+            run = _Run(macro, self.clock())
+            self._runs[macro] = run
+            self._advance(run, run.start, events)
+            if events: self.on_events(events)
+            if not run.done:
+                if self._thread is None and self.threaded: self._start()
+                self._cond.notify()
+            return True
+
+    def cancel(self, macro):
+        """Stop a running macro and release what it holds; returns True if it was running."""
+        with self._cond:
+            run = self._runs.pop(macro, None)
+            if run is None: return False
+            events = []
+            self._cancel(run, events)
+            if events: self.on_events(events)
+            return True
+
+    def cancel_all(self):
+        with self._cond:
+            events = []
+            for run in self._runs.values(): self._cancel(run, events)
+            self._runs.clear()
+            self._heap.clear()
+            if events: self.on_events(events)
+
+    def running(self, macro):
+        with self._cond:
+            return macro in self._runs
+
+    def next_deadline(self):
+        with self._cond:
+            heap = self._heap
+            while heap and heap[0][2].done: heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def run_due(self):
+        """Fire every step due by now on the calling thread; returns how many events."""
+        with self._cond:
+            now = self.clock()
+            heap, events = self._heap, []
+            while heap and heap[0][0] <= now:
+                run = heapq.heappop(heap)[2]
+                if not run.done: self._advance(run, now, events)
+            if events: self.on_events(events)
+            return len(events)
+
+    def stop(self):
+        self.cancel_all()
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread: self._thread.join(timeout=1)
+        self._thread = None
+
+    # --- internals, called with the lock held ---
+    def _advance(self, run, now, events):
+        """Emit run's steps due by now; schedule the next one or finish."""
+        steps, start, held = run.macro.steps, run.start, run.held
+        i, n = run.step, len(steps)
+        while i < n and start + steps[i][0] <= now:
+            for code, up in steps[i][1]:
+                if up: held.pop(code, None)
+                else: held[code] = True
+            events.extend(steps[i][1])
+            i += 1
+        run.step = i
+        if i < n:
+            self._seq += 1
+            heapq.heappush(self._heap, (start + steps[i][0], self._seq, run))
+        else:
+            run.done = True
+            if self._runs.get(run.macro) is run: del self._runs[run.macro]
+
+    def _cancel(self, run, events):
+        run.done = True
+        events.extend((code, True) for code in reversed(list(run.held)))
+        run.held.clear()
+
+    def _start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="macro", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        heap, clock = self._heap, self.clock
+        while True:
+            with self._cond:
+                while self._running:
+                    while heap and heap[0][2].done: heapq.heappop(heap)
+                    if not heap:
+                        self._cond.wait()
+                        continue
+                    wait = heap[0][0] - clock()
+                    if wait <= self.spin: break
+                    self._cond.wait(wait - self.spin)
+                if not self._running: return
+                deadline = heap[0][0]
+            # Spin out the last stretch without the lock so presses are not held up
+            while clock() < deadline: time.sleep(0)
+            try: self.run_due()
+            except Exception: pass
@@ -0,0 +1,113 @@
+"""Latest-sample-wins coalescing of pointer motion.
+
+A 1000 Hz mouse delivers a motion event every millisecond, far more than
+the UI needs to handle one by one.  MotionCoalescer takes every sample in
+cheaply and hands each pointer's path since the last run to the handler
+at most once per tick, so the newest position is always the one that
+counts and the path in between is still there for traversal (see
+GridHitIndex.segment).  Samples of one pointer are never reordered or
+dropped, and a press or release flushes what is pending first.
+"""
+import math
+import time
+
+
+class MotionCoalescer:
+    """Per-pointer motion paths, flushed at most once per tick.
+
+    handler(pointer, path) receives [(x, y), ...]: the last point already
+    handled followed by every sample since, oldest first.
+
+    A sample is handled at once when a full tick has passed since the last
+    flush, or when region(x, y) differs from that of the pointer's
+    previous sample (the app passes the cell under the point, so entering
+    a new cell is never delayed).  Any other sample waits for a timer at
+    the end of the tick, set with schedule(delay_ms, fn) -> job (Tk's
+    after) and dropped with cancel(job) (after_cancel) when something
+    flushes first.  Either way the handler sees everything since its last
+    run.  A flush stops once budget_ms has been spent and leaves the
+    remaining pointers for a timer right after.
+    """
+
+    def __init__(self, handler, schedule, cancel=None, region=None, tick_ms=2, budget_ms=4.0,
+                 clock=time.perf_counter):
+        self.handler = handler
+        self.schedule = schedule
+        self.cancel = cancel
+        self.region = region
+        self.tick = tick_ms / 1000.0
+        self.budget = budget_ms / 1000.0
+        self.clock = clock
+        self.flushed_at = float('-inf')
+        self.last = {}  # pointer -> last handled (x, y)
+        self.paths = {}  # pointer -> samples not handled yet, in arrival order
+        self.regions = {}  # pointer -> region of its latest sample
+        self.samples = self.calls = 0
+        self._job = None
+        self._flushing = False
+
+    def begin(self, pointer, x, y):
+        """Pointer pressed at (x, y): paths start here."""
+        self.flush_pointer(pointer)
+        self.last[pointer] = (x, y)
+        if self.region is not None: self.regions[pointer] = self.region(x, y)
+
+    def add(self, pointer, x, y):
+        """One motion sample: handled now if a tick has passed or it changed region, else on the tick timer."""
+        self.samples += 1
+        path = self.paths.get(pointer)
+        if path is None: self.paths[pointer] = [(x, y)]
+        else: path.append((x, y))
+        wait = self.flushed_at + self.tick - self.clock()
+        if self.region is not None:
+            region = self.region(x, y)
+            if region != self.regions.get(pointer):
+                self.regions[pointer] = region
+                wait = 0
+        if wait <= 0 and not self._flushing: self.flush()
+        elif self._job is None: self._job = self.schedule(math.ceil(wait * 1000), self._timer)
+
+    def end(self, pointer):
+        """Pointer released: hand over what is left, then forget it."""
+        self.flush_pointer(pointer)
+        self.last.pop(pointer, None)
+        self.regions.pop(pointer, None)
+
+    def flush_pointer(self, pointer):
+        path = self.paths.pop(pointer, None)
+        if path: self._handle(pointer, path)
+
+    def _timer(self):
+        self._job = None
+        self.flush()
+
+    def flush(self):
+        """Hand every pending path to the handler, oldest pointer first, within the time budget."""
+        if self._flushing: return
+        if self._job is not None and self.cancel is not None:
+            self.cancel(self._job)
+            self._job = None
+        self._flushing = True
+        try:
+            self.flushed_at = now = self.clock()
+            deadline = now + self.budget
+            paths = self.paths
+            while paths:
+                pointer = next(iter(paths))
+                self._handle(pointer, paths.pop(pointer))
+                if paths and self.clock() >= deadline:
+                    # Over budget: let the event loop breathe, the rest go next
+                    if self._job is None: self._job = self.schedule(0, self._timer)
+                    break
+        finally:
+            self._flushing = False
+
+    def _handle(self, pointer, path):
+        start = self.last.get(pointer)
+        self.last[pointer] = path[-1]
+        self.calls += 1
+        self.handler(pointer, path if start is None else [start] + path)
+
+    @property
+    def pending(self):
+        return sum(len(p) for p in self.paths.values())
@@ -0,0 +1,87 @@
+"""Key output dispatch.
+
+Key events are (scancode, is_up) pairs.  KeyDispatcher groups all events
+produced while handling one input frame and hands them to an OutputBackend
+in a single ordered call; the backend decides how they actually leave the
+process (SendInput on Windows, a list in memory for tests and benchmarks).
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from keypad.eventtrace import KEY_DOWN, KEY_UP, NO_FINGER
+
+
+class OutputBackend(ABC):
+    """Destination for ordered batches of (scancode, is_up) events."""
+
+    @abstractmethod
+    def send(self, events):
+        """Deliver one batch, in order, as a single unit where the platform allows."""
+
+
+class RecordingBackend(OutputBackend):
+    """In-memory sink: remembers every batch together with the time it was sent."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.batches = []
+
+    def send(self, events):
+        self.batches.append((self.clock(), tuple(events)))
+
+    @property
+    def events(self):
+        return [e for _, batch in self.batches for e in batch]
+
+    def clear(self):
+        self.batches.clear()
+
+
+class _Frame(threading.local):
+    pending = None  # this thread's queued events while it has a frame open
+
+
+class KeyDispatcher:
+    """Collects key events per input frame and flushes them in one backend call.
+
+    Outside a frame every event is sent on its own.  Inside `frame()` a
+    thread's events are queued in order and sent when its outermost frame
+    closes.  Frames are per thread: the touch thread, the Tk thread and
+    timer threads each batch only their own events and never hold back,
+    or reorder, another thread's.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.trace = None  # keypad.eventtrace.EventTrace: every key event, when it is emitted
+        self._frame = _Frame()
+
+    def press(self, code):
+        self._emit((code, False))
+
+    def release(self, code):
+        self._emit((code, True))
+
+    def _emit(self, event):
+        trace = self.trace
+        if trace is not None: trace.log(KEY_UP if event[1] else KEY_DOWN, -1, NO_FINGER, event[0])
+        pending = self._frame.pending
+        if pending is not None: pending.append(event)
+        else: self.backend.send((event,))
+
+    @contextmanager
+    def frame(self):
+        """Batch every event emitted by this thread until its outermost frame exits."""
+        state = self._frame
+        if state.pending is not None:
+            # Nested: the outermost frame sends
+            yield
+            return
+        state.pending = pending = []
+        try:
+            yield
+        finally:
+            state.pending = None
+            if pending: self.backend.send(pending)
@@ -0,0 +1,132 @@
+"""Hot profile cache: several layouts kept loaded, compiled and hit-indexed.
+
+Switching games used to mean a file dialog, a parse and a compile.  A
+ProfileCache loads each layout once (keypad.layoutfile), compiles its keys
+and builds its hit index up front, so switching to a cached profile only
+swaps objects.  Loaded profiles are kept in LRU order under a memory cap
+(an estimate from the cell count, see CELL_BYTES); the active profile is
+never evicted, and an evicted one is simply reloaded from its file when
+it is next used.
+
+Cached profiles are never edited: the app edits a copy of the active
+profile's grid, so unsaved edits are dropped when it switches away, and
+saving over a profile's file replaces its cached grid (saved()).
+"""
+import os
+import time
+from collections import OrderedDict
+
+from keypad.layoutfile import load_layout
+
+# Approximate resident bytes per grid position of a loaded profile: Cell
+# record, owner arrays and hit-index tables (benchmarks/bench_profiles.py)
+CELL_BYTES = 200
+MAX_BYTES = 16 * 1024 * 1024
+
+
+def profile_name(path):
+    """What the profile list shows: the file name without extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class Profile:
+    """One loaded layout, ready to be shown."""
+
+    __slots__ = ('path', 'name', 'grid', 'meta', 'actions', 'nbytes', 'load_ms')
+
+    def __init__(self, path, grid, meta, actions, load_ms):
+        self.path = path
+        self.name = profile_name(path)
+        self.grid = grid
+        self.meta = meta
+        self.actions = actions  # cell key -> compiled KeyAction (None for empty/invalid)
+        self.nbytes = len(grid.cells) * CELL_BYTES
+        self.load_ms = load_ms
+
+
+class ProfileCache:
+    """The profile list plus an LRU cache of loaded profiles.
+
+    `paths` is the user's list (what the control panel shows, in order);
+    `loaded` holds the profiles currently in memory, least recently used
+    first.  compile(key) -> action is the engine's compile; gap is the
+    theme gap the hit indexes are prebuilt for.
+    """
+
+    def __init__(self, compile, max_bytes=MAX_BYTES, gap=0, clock=time.perf_counter):
+        self.compile = compile
+        self.max_bytes = max_bytes
+        self.gap = gap
+        self.clock = clock
+        self.paths = []
+        self.loaded = OrderedDict()  # path -> Profile
+        self.active = None
+        self.hits = self.misses = self.evictions = 0
+
+    def add(self, path, reload=False):
+        """Register a layout file and preload it; raises LayoutError/OSError if it does not load.
+
+        reload=True reads the file again even if it is cached (dropping unsaved edits).
+        """
+        if reload: self.loaded.pop(path, None)
+        profile = self.get(path)
+        if path not in self.paths: self.paths.append(path)
+        return profile
+
+    def remove(self, path):
+        if path in self.paths: self.paths.remove(path)
+        if path != self.active: self.loaded.pop(path, None)
+
+    def get(self, path):
+        """The loaded profile for path, from memory if cached."""
+        profile = self.loaded.get(path)
+        if profile is not None:
+            self.hits += 1
+            self.loaded.move_to_end(path)
+            return profile
+        self.misses += 1
+        t0 = self.clock()
+        actions = {}
+
+        def compile(key):
+            if key not in actions: actions[key] = self.compile(key)
+        grid, meta = load_layout(path, compile)
+        grid.hit_index(self.gap)  # Built now, not on the first touch
+        profile = Profile(path, grid, meta, actions, (self.clock() - t0) * 1000)
+        self.loaded[path] = profile
+        self._evict()
+        return profile
+
+    def activate(self, path):
+        """get() and mark it active (pinned against eviction)."""
+        profile = self.get(path)
+        self.active = path
+        return profile
+
+    def saved(self, path, grid, meta):
+        """`grid` was just saved to path: a cached profile of that file becomes a copy of it."""
+        profile = self.loaded.get(path)
+        if profile is not None:
+            profile.grid, profile.meta = grid.copy(), dict(meta)
+            profile.nbytes = len(profile.grid.cells) * CELL_BYTES
+
+    def set_gap(self, gap):
+        """Theme changed: rebuild the cached hit indexes for the new gap."""
+        self.gap = gap
+        for profile in self.loaded.values(): profile.grid.hit_index(gap)
+
+    @property
+    def nbytes(self):
+        return sum(p.nbytes for p in self.loaded.values())
+
+    def _evict(self):
+        total = self.nbytes
+        for path in list(self.loaded):
+            if total <= self.max_bytes: break
+            if path == self.active or len(self.loaded) == 1: continue
+            total -= self.loaded.pop(path).nbytes
+            self.evictions += 1
+
+    def summary(self):
+        return (f"{len(self.loaded)}/{len(self.paths)} loaded, {self.nbytes / 1024:,.0f} KiB\n"
+                f"{self.hits} hits, {self.misses} loads, {self.evictions} evicted")
@@ -0,0 +1,96 @@
+"""Reader for the event trace files (keypad.eventtrace): decode, filter and summarize.
+
+    python -m keypad.readtrace DIR [--cell 12 | --cell 2,3] [--finger 5] [--kind key_down] [--summary]
+
+DIR is the trace folder (every events*.kev in it, oldest first) or single
+files.  Events are listed with seconds since the first one; --cell takes
+a cell index or the row,column of the layout in force at the time.
+"""
+import sys
+import time
+from collections import Counter, defaultdict
+
+from keypad.eventtrace import (FEEDBACK, HIT, HIT_DEBOUNCED, HIT_NO_KEY, HIT_SENT, KEY_DOWN, KEY_UP, KINDS, LAYOUT,
+                               LOST, NO_FINGER, POINTER, TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP, load)
+
+
+def cell_names(events):
+    """Per event, the (r, c) of its cell under the layout in force then (None when unknown)."""
+    cols, names = None, []
+    for e in events:
+        if e.kind == LAYOUT: cols = e.y
+        names.append(divmod(e.cell, cols) if cols and e.cell >= 0 else None)
+    return names
+
+
+def describe(e, rc):
+    kind = e.kind
+    parts = [KINDS[kind].upper() if kind < len(KINDS) else f"KIND{kind}"]
+    if e.finger != NO_FINGER: parts.append("mouse" if e.finger == POINTER else f"finger {e.finger}")
+    if kind in (TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP, HIT, FEEDBACK):
+        parts.append((f"cell {e.cell}" + (f" (r{rc[0]},c{rc[1]})" if rc else "")) if e.cell >= 0 else "no cell")
+    if kind in (TOUCH_DOWN, TOUCH_MOVE) and (e.x or e.y): parts.append(f"at {e.x},{e.y}")
+    if kind == HIT: parts.append(("debounced", "sent", "no key")[e.flag] + (" (forced)" if e.code else ""))
+    elif kind in (KEY_DOWN, KEY_UP): parts.append(f"scan 0x{e.code:02x}")
+    elif kind == FEEDBACK: parts.append("on" if e.flag else "off")
+    elif kind == LAYOUT: parts.append(f"{e.x}x{e.y}")
+    elif kind == LOST: parts.append(f"{e.x} records")
+    return "  ".join(parts)
+
+
+def summarize(events, names):
+    """Rows of (name, value): counts per kind, per-cell hit outcomes, keys left down."""
+    kinds = Counter(e.kind for e in events)
+    span = (events[-1].wall_ns - events[0].wall_ns) / 1e9 if events else 0
+    rows = [("events", f"{len(events):,} over {span:.3f} s")]
+    rows += [(f"  {KINDS[k]}", f"{n:,}") for k, n in sorted(kinds.items()) if k < len(KINDS)]
+    outcomes = defaultdict(Counter)
+    for e, rc in zip(events, names):
+        if e.kind == HIT: outcomes[rc or e.cell][e.flag] += 1
+    for cell, n in sorted(outcomes.items(), key=lambda kv: -sum(kv[1].values()))[:10]:
+        rows.append((f"  cell {cell}", f"sent {n[HIT_SENT]:,}  debounced {n[HIT_DEBOUNCED]:,}  no key {n[HIT_NO_KEY]:,}"))
+    down = Counter()
+    for e in events:
+        if e.kind == KEY_DOWN: down[e.code] += 1
+        elif e.kind == KEY_UP and down[e.code]: down[e.code] -= 1
+    stuck = sorted(code for code, n in down.items() if n)
+    rows.append(("keys still down", ", ".join(f"0x{c:02x}" for c in stuck) if stuck else "none"))
+    lost = sum(e.x for e in events if e.kind == LOST)
+    if lost: rows.append(("records lost", f"{lost:,} (the flusher fell a ring behind)"))
+    return rows
+
+
+
+def main(argv=None):
+    import argparse
+    p = argparse.ArgumentParser(prog="python -m keypad.readtrace", description="Decode a keypad event trace.")
+    p.add_argument("paths", nargs="+", help="trace files or directories of rotated files")
+    p.add_argument("--cell", help="cell index, or r,c")
+    p.add_argument("--finger", type=int, help="touch id (-2: the mouse)")
+    p.add_argument("--kind", action="append", choices=KINDS, help="only these kinds (repeatable)")
+    p.add_argument("--summary", action="store_true", help="counts instead of the event list")
+    args = p.parse_args(argv)
+
+    events = load(args.paths)
+    picked = list(zip(events, cell_names(events)))
+    if args.cell is not None:
+        want = tuple(int(v) for v in args.cell.split(","))
+        if len(want) == 2: picked = [(e, rc) for e, rc in picked if rc == want]
+        else: picked = [(e, rc) for e, rc in picked if e.cell == want[0]]
+    if args.finger is not None: picked = [(e, rc) for e, rc in picked if e.finger == args.finger & 0xFFFFFFFF]
+    if args.kind: picked = [(e, rc) for e, rc in picked if e.kind < len(KINDS) and KINDS[e.kind] in args.kind]
+
+    out = sys.stdout
+    if args.summary:
+        rows = summarize([e for e, _ in picked], [rc for _, rc in picked])
+        width = max(len(name) for name, _ in rows)
+        for name, value in rows: out.write(f"{name.ljust(width)}  {value}\n")
+        return
+    if not events: return
+    t0 = events[0].wall_ns
+    out.write(f"# t=0 at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t0 / 1e9))}\n")
+    for e, rc in picked: out.write(f"{(e.wall_ns - t0) / 1e9:12.6f}  {describe(e, rc)}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Desired-state description of the grid widgets and the diff against what exists.
+
+refresh_grid describes every header label and cell button as a WidgetSpec
+keyed by a stable id ('corner',), ('col', c), ('row', r) or ('cell', r, c)
+and only touches the widgets whose spec changed.  Specs are plain tuples so
+the planning side needs no Tk and can be benchmarked anywhere.  The same
+ids come back from design_widget_at, which finds the widget under a point
+from the layout geometry instead of asking Tk.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+from keypad.grid import iter_anchors
+from keypad.theme import theme_styles
+
+# grid/style are tuples of (option, value) pairs in a fixed order: the text,
+# if any, then the keypad.theme record for the widget's state.  A style of
+# None means "unknown" (the widget was restyled outside the reconciler) and
+# forces a full reconfigure on the next diff.
+WidgetSpec = namedtuple('WidgetSpec', 'kind grid style')
+
+# create/destroy/regrid: lists of ids; restyle: list of (id, {option: value})
+Plan = namedtuple('Plan', 'create destroy regrid restyle')
+
+HEADER_W, HEADER_H = 30, 20
+
+
+def build_grid_specs(row_sizes, col_sizes, grid_data, theme, design, base_unit,
+                     selected_cells=(), selected_rows=(), selected_cols=(), error_keys=()):
+    """Describe the grid as ({id: WidgetSpec}, {(axis, grid_index): minsize})."""
+    styles = theme_styles(theme)
+    rows, cols = len(row_sizes), len(col_sizes)
+    offset = 1 if design else 0
+    specs, tracks = {}, {}
+
+    if design:
+        tracks[('col', 0)] = HEADER_W
+        tracks[('row', 0)] = HEADER_H
+        specs[('corner',)] = WidgetSpec('corner', (('row', 0), ('column', 0)), styles.corner)
+        header, header_sel = styles.header, styles.header_selected
+        for c in range(cols):
+            specs[('col', c)] = WidgetSpec('header',
+                (('row', 0), ('column', c + offset), ('padx', 1), ('pady', 1)),
+                (('text', str(col_sizes[c] // base_unit)),) + (header_sel if c in selected_cols else header))
+        for r in range(rows):
+            specs[('row', r)] = WidgetSpec('header',
+                (('row', r + offset), ('column', 0), ('padx', 1), ('pady', 1)),
+                (('text', str(row_sizes[r] // base_unit)),) + (header_sel if r in selected_rows else header))
+
+    for r in range(rows): tracks[('row', r + offset)] = row_sizes[r]
+    for c in range(cols): tracks[('col', c + offset)] = col_sizes[c]
+
+    gap = theme['gap']
+    normal, selected, error = styles.cell, styles.cell_selected, styles.cell_error
+    for (r, c), cell in iter_anchors(grid_data, rows, cols):
+        span_r, span_c = cell.get('span_r', 1), cell.get('span_c', 1)
+        key = cell.get('key', '')
+        if (r, c) in selected_cells: style = selected
+        elif design and key in error_keys: style = error
+        else: style = normal
+        specs[('cell', r, c)] = WidgetSpec('cell',
+            (('row', r + offset), ('column', c + offset), ('rowspan', span_r), ('columnspan', span_c),
+             ('padx', (0, gap)), ('pady', (0, gap))),
+            (('text', key),) + style)
+    return specs, tracks
+
+
+def design_widget_at(index, x_root, y_root, header_w=HEADER_W, header_h=HEADER_H):
+    """Id of the design-mode widget under a screen point, or None (gaps, outside).
+
+    `index` is the layout's GridHitIndex with its origin on the first cell;
+    the header column and row are the header_w / header_h strips before it.
+    Returns ('cell', r, c) for the anchor under the point, ('col', c),
+    ('row', r) or ('corner',).
+    """
+    x, y = x_root - index.origin_x, y_root - index.origin_y
+    if x >= 0 and y >= 0:
+        anchor = index.cell_at(x, y)
+        return ('cell',) + anchor if anchor else None
+    if x < -header_w or y < -header_h: return None
+    if x < 0 and y < 0: return ('corner',)
+    if y < 0:
+        c = bisect_right(index.col_offsets, x) - 1
+        return ('col', c) if c < index.cols else None
+    r = bisect_right(index.row_offsets, y) - 1
+    return ('row', r) if r < index.rows else None
+
+
+def diff_specs(current, desired):
+    """Plan the minimal create/destroy/regrid/restyle steps from current to desired."""
+    create, destroy, regrid, restyle = [], [], [], []
+    for wid, old in current.items():
+        new = desired.get(wid)
+        if new is None or new.kind != old.kind: destroy.append(wid)
+    for wid, new in desired.items():
+        old = current.get(wid)
+        if old is None or old.kind != new.kind:
+            create.append(wid)
+            continue
+        if old.grid != new.grid: regrid.append(wid)
+        if old.style is None:
+            restyle.append((wid, dict(new.style)))
+        elif old.style != new.style:
+            changed = {k: v for (k, v), (_, ov) in zip(new.style, old.style) if v != ov}
+            restyle.append((wid, changed))
+    return Plan(create, destroy, regrid, restyle)
+
+
+def diff_tracks(current, desired):
+    """Row/column minsize changes: {(axis, index): minsize}, 0 for tracks that went away."""
+    changes = {k: v for k, v in desired.items() if current.get(k) != v}
+    for k in current:
+        if k not in desired: changes[k] = 0
+    return changes
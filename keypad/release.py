@@ -0,0 +1,114 @@
+"""Deferred key releases serviced by a single timer thread.
+
+Pulse presses send the key-down immediately and the key-up a few
+milliseconds later.  Instead of a sleeping thread per press, pending
+releases live in a heap ordered by absolute monotonic deadline and one
+long-lived thread fires them.  Re-pressing a key moves its deadline rather
+than queueing a second release.
+"""
+import heapq
+import threading
+import time
+
+
+class ReleaseScheduler:
+    """Fires `on_release(codes)` for every code whose deadline has passed.
+
+    Codes that fall due together are handed over in one call so they can be
+    sent as one batch.  Thread-safe; the service thread starts on first use.
+    With threaded=False no thread is started and the owner drives it with
+    next_deadline()/run_due(), e.g. on a simulated clock.
+    """
+
+    def __init__(self, on_release, clock=time.monotonic, threaded=True):
+        self.on_release = on_release
+        self.clock = clock
+        self.threaded = threaded
+        self._heap = []  # (deadline, seq, code); stale entries skipped lazily
+        self._deadlines = {}  # code -> current deadline
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def schedule(self, code, delay_ms):
+        """Release `code` delay_ms from now, replacing any pending release."""
+        deadline = self.clock() + delay_ms / 1000.0
+        with self._cond:
+            self._deadlines[code] = deadline
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, code))
+            if self._thread is None and self.threaded: self._start()
+            # Only wake the thread if this became the earliest deadline
+            if self._heap[0][2] == code and self._heap[0][0] == deadline: self._cond.notify()
+
+    def cancel(self, code):
+        """Drop a pending release; returns True if one was pending."""
+        with self._cond:
+            return self._deadlines.pop(code, None) is not None
+
+    def pending(self, code):
+        with self._cond:
+            return code in self._deadlines
+
+    def next_deadline(self):
+        with self._cond:
+            heap, deadlines = self._heap, self._deadlines
+            while heap and deadlines.get(heap[0][2]) != heap[0][0]: heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def run_due(self):
+        """Fire everything due by now on the calling thread; returns how many codes."""
+        with self._cond:
+            due = self._pop_due(self.clock())
+        if due: self.on_release(due)
+        return len(due)
+
+    def release_all(self):
+        """Fire every pending release now (e.g. before leaving play mode)."""
+        with self._cond:
+            codes = list(self._deadlines)
+            self._deadlines.clear()
+            self._heap.clear()
+        if codes: self.on_release(codes)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread: self._thread.join(timeout=1)
+        self._thread = None
+
+    def _start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="key-release", daemon=True)
+        self._thread.start()
+
+    def _pop_due(self, now):
+        heap, deadlines = self._heap, self._deadlines
+        due = []
+        while heap and heap[0][0] <= now:
+            deadline, _, code = heapq.heappop(heap)
+            if deadlines.get(code) == deadline:
+                del deadlines[code]
+                due.append(code)
+        return due
+
+    def _run(self):
+        heap, deadlines = self._heap, self._deadlines
+        while True:
+            with self._cond:
+                while self._running:
+                    # Discard entries superseded by a re-press or cancel
+                    while heap and deadlines.get(heap[0][2]) != heap[0][0]: heapq.heappop(heap)
+                    if not heap:
+                        self._cond.wait()
+                        continue
+                    wait = heap[0][0] - self.clock()
+                    if wait <= 0: break
+                    self._cond.wait(wait)
+                if not self._running: return
+                due = self._pop_due(self.clock())
+            if due:
+                try: self.on_release(due)
+                except Exception: pass
@@ -0,0 +1,60 @@
+"""Key repeat for held fingers on absolute deadlines.
+
+Every held finger has a next deadline on a fixed grid (press time + k *
+interval).  A single tick() serves all fingers that are due, so lateness
+of whoever calls tick() shows up as jitter but never accumulates into
+drift, and no finger is starved by another.
+"""
+import time
+
+MIN_INTERVAL_MS = 10  # the Touch Repeat slider's range; shorter intervals are raised to the minimum
+MAX_INTERVAL_MS = 200
+
+
+class RepeatScheduler:
+    """Fires `fire(target)` for each held finger once per its interval.
+
+    Not thread-safe: hold/release/tick are expected from one thread (the
+    touch input thread).
+    """
+
+    def __init__(self, fire, interval_ms=50, clock=time.monotonic):
+        self.fire = fire
+        self.interval = _seconds(interval_ms)
+        self.clock = clock
+        self.holds = {}  # finger -> [target, interval_s, next_deadline]
+
+    def hold(self, finger, target, interval_ms=None):
+        """Start (or retarget) repeating for a finger; first repeat one interval from now."""
+        interval = self.interval if interval_ms is None else _seconds(interval_ms)
+        self.holds[finger] = [target, interval, self.clock() + interval]
+
+    def release(self, finger):
+        self.holds.pop(finger, None)
+
+    def clear(self):
+        self.holds.clear()
+
+    def next_deadline(self):
+        if not self.holds: return None
+        return min(h[2] for h in self.holds.values())
+
+    def tick(self):
+        """Fire every due finger, earliest deadline first; returns how many fired."""
+        now = self.clock()
+        due = [h for h in self.holds.values() if h[2] <= now]
+        if not due: return 0
+        due.sort(key=lambda h: h[2])
+        for h in due:
+            self.fire(h[0])
+            interval = h[1]
+            # Stay on the original grid; if the caller was very late, skip the
+            # missed slots instead of bursting to catch up
+            missed = int((now - h[2]) / interval)
+            h[2] += (missed + 1) * interval
+        return len(due)
+
+
+def _seconds(interval_ms):
+    """ms -> s, never below MIN_INTERVAL_MS: a zero or negative interval would fire on every tick."""
+    return max(interval_ms, MIN_INTERVAL_MS) / 1000.0
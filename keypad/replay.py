@@ -0,0 +1,225 @@
+"""Record raw input to a compact trace file and replay it without Tk or Win32.
+
+A trace is a small header (magic, version, layout as JSON) followed by
+fixed-size records:
+
+  kind     TOUCH, MOUSE_DOWN, MOUSE_MOVE, MOUSE_UP or ORIGIN
+  t        seconds since recording started (perf_counter)
+  x, y     TOUCH: 1/100 px as in TOUCHINPUT; others: screen px
+  id       touch id
+  flags    TOUCHEVENTF_* flags
+  dwTime   TOUCHINPUT.dwTime
+
+TOUCH records that arrived in one WM_TOUCH share the same t and are
+replayed as one batch.  ORIGIN records follow the grid when the window
+moves during a recording.
+
+Replayer pushes a trace through the same InputEngine the app uses (hit
+test, touch processing, debounce, repeat and release) into a
+RecordingBackend on a ManualClock, so it runs as fast as the CPU allows.
+"""
+import json
+import struct
+import time
+
+from keypad.clock import ManualClock
+from keypad.engine import InputEngine
+from keypad.latency import Histogram
+from keypad.layout import Layout
+from keypad.output import RecordingBackend
+
+MAGIC = b'KPTR'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')  # magic, version, layout JSON length
+RECORD = struct.Struct('<BdiiIII')  # kind, t, x, y, id, flags, dwTime
+
+TOUCH, MOUSE_DOWN, MOUSE_MOVE, MOUSE_UP, ORIGIN = range(5)
+
+
+def layout_from_grid(row_sizes, col_sizes, grid_data, gap, origin, repeat_ms=50, debounce_ms=0, release_ms=12,
+                     hold=False):
+    """The layout block stored in a trace header; hold is the global HOLD mode (cells may set 'hold')."""
+    return {"row_sizes": list(row_sizes), "col_sizes": list(col_sizes), "gap": gap, "origin": list(origin),
+            "cells": [[r, c, dict(cell)] for (r, c), cell in sorted(grid_data.items())],
+            "repeat_ms": repeat_ms, "debounce_ms": debounce_ms, "release_ms": release_ms, "hold": hold}
+
+
+class TraceRecorder:
+    """Appends input records to a trace file as they happen."""
+
+    def __init__(self, path, layout, clock=time.perf_counter):
+        self.clock = clock
+        self._f = open(path, 'wb')
+        blob = json.dumps(layout).encode()
+        self._f.write(HEADER.pack(MAGIC, VERSION, len(blob)) + blob)
+        self._t0 = clock()
+        self.count = 0
+
+    def touch(self, inputs, n):
+        """wndproc: record the first n TOUCHINPUTs of one WM_TOUCH."""
+        t = self.clock() - self._t0
+        pack, write = RECORD.pack, self._f.write
+        for i in range(n):
+            ti = inputs[i]
+            write(pack(TOUCH, t, ti.x, ti.y, ti.dwID, ti.dwFlags, ti.dwTime))
+        self.count += n
+
+    def mouse(self, kind, x_root, y_root):
+        self._f.write(RECORD.pack(kind, self.clock() - self._t0, x_root, y_root, 0, 0, 0))
+        self.count += 1
+
+    def origin(self, x, y):
+        self._f.write(RECORD.pack(ORIGIN, self.clock() - self._t0, x, y, 0, 0, 0))
+        self.count += 1
+
+    def close(self):
+        self._f.close()
+
+
+def write_trace(path, layout, events):
+    """Write (kind, t, x, y, id, flags, dwTime) tuples as a trace, e.g. a synthetic stream."""
+    blob = json.dumps(layout).encode()
+    pack = RECORD.pack
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(blob)) + blob)
+        f.write(b''.join(pack(*ev) for ev in events))
+
+
+def read_trace(path):
+    """(layout, [(kind, t, x, y, id, flags, dwTime), ...])"""
+    with open(path, 'rb') as f: data = f.read()
+    magic, version, n = HEADER.unpack_from(data)
+    if magic != MAGIC: raise ValueError(f"{path}: not a keypad trace")
+    if version != VERSION: raise ValueError(f"{path}: unsupported trace version {version}")
+    start = HEADER.size + n
+    layout = json.loads(data[HEADER.size:start])
+    return layout, list(RECORD.iter_unpack(data[start:]))
+
+
+class ReplayCell:
+    """Stand-in for a cell widget: what the input path reads off a button."""
+
+    __slots__ = ('grid_pos', 'meta_key', 'action', 'repeat_ms', 'hold', 'cell_index')
+
+    def __init__(self, grid_pos, key, action, repeat_ms=None, hold=False):
+        self.grid_pos = grid_pos
+        self.meta_key = key
+        self.action = action
+        self.repeat_ms = repeat_ms
+        self.hold = hold
+        self.cell_index = -1  # set by InputEngine.set_targets
+
+
+class Replayer:
+    """Drives a trace through an InputEngine on a simulated clock.
+
+    Every event is processed at its recorded time; repeat and release
+    deadlines that fall in between are served in order first.  `sink`
+    receives the key batches (a RecordingBackend stamped with simulated
+    time by default).  Text cells are collected in `texts`.
+    """
+
+    def __init__(self, layout, sink=None, measure=True):
+        self.clock = clock = ManualClock()
+        self.sink = sink if sink is not None else RecordingBackend(clock)
+        self.engine = engine = InputEngine(self.sink, clock, threaded=False,
+                                           release_ms=layout.get("release_ms", 12),
+                                           repeat_ms=layout.get("repeat_ms", 50))
+        engine.debouncer.threshold_ms = layout.get("debounce_ms", 0)
+        engine.hold_all = layout.get("hold", False)
+        self.texts = []
+        engine.send_text = self.texts.append
+        self._pointer = None  # last mouse (x, y) while the button is down
+        self.event_cost = Histogram() if measure else None  # wall ns per replayed event
+
+        self.layout = Layout.from_dict(layout)
+        self.gap = layout.get("gap", 0)
+        self.targets = {}
+        self.index = None
+        for pos, cell in self.layout.anchors():
+            key = cell.get('key', '')
+            self.targets[pos] = ReplayCell(pos, key, engine.compile(key), cell.get('repeat_ms'), cell.get('hold', False))
+        self.set_origin(*layout.get("origin", (0, 0)))
+
+    def set_origin(self, x, y):
+        # Same tables at a new origin, so the engine keeps its per-cell state
+        if self.index is None: self.index = self.layout.hit_index(self.gap, origin=(x, y))
+        else: self.index = self.index.with_origin((x, y))
+        self.engine.set_targets(self.index, self.targets)
+
+    def _cell_at(self, x, y):
+        anchor = self.index.lookup(x, y)
+        return self.targets.get(anchor) if anchor else None
+
+    # --- driving ---
+    def advance(self, t):
+        """Serve every repeat, macro and release deadline up to t, then move the clock to t."""
+        engine, clock = self.engine, self.clock
+        repeater, releaser, macros = engine.repeater, engine.releaser, engine.macros
+        while True:
+            deadlines = [d for d in (repeater.next_deadline(), releaser.next_deadline(), macros.next_deadline())
+                         if d is not None]
+            if not deadlines: break
+            nxt = min(deadlines)
+            if nxt > t: break
+            if nxt > clock.now: clock.now = nxt
+            with engine.dispatcher.frame(): repeater.tick()
+            macros.run_due()
+            releaser.run_due()
+        if t > clock.now: clock.now = t
+
+    def run(self, events):
+        """Replay a list of trace records; returns the wall time taken in seconds."""
+        cost = self.event_cost
+        ns = time.perf_counter_ns
+        t_start = time.perf_counter()
+        i, n = 0, len(events)
+        while i < n:
+            t0 = ns()
+            kind, t = events[i][0], events[i][1]
+            self.advance(t)
+            if kind == TOUCH:
+                # One WM_TOUCH: consecutive records with the same timestamp
+                j = i
+                while j < n and events[j][0] == TOUCH and events[j][1] == t: j += 1
+                self.engine.processor.process([(x, y, tid, flags, dw, 0) for _, _, x, y, tid, flags, dw in events[i:j]])
+                count, i = j - i, j
+            else:
+                _, _, x, y = events[i][:4]
+                self._mouse(kind, x, y)
+                count, i = 1, i + 1
+            if cost is not None:
+                d = (ns() - t0) // count
+                for _ in range(count): cost.record(d)
+        # Lift anything still held and let the last key-ups go out
+        self.engine.repeater.clear()
+        self.engine.release_holds()
+        self.advance(self.clock.now + 1.0)
+        self.engine.macros.cancel_all()
+        return time.perf_counter() - t_start
+
+    def _mouse(self, kind, x, y):
+        if kind == ORIGIN: self.set_origin(x, y)
+        elif kind == MOUSE_DOWN: self.engine.pointer_down(self._cell_at(x, y))
+        elif kind == MOUSE_MOVE:
+            x0, y0 = self._pointer or (x, y)
+            targets = self.targets
+            path = [targets[a] for a in self.index.lookup_segment(x0, y0, x, y)]
+            if self.index.lookup(x, y) is None: path.append(None)  # Ended off every cell
+            self.engine.pointer_path(path)
+        elif kind == MOUSE_UP:
+            self.engine.pointer_up()
+            x = y = None
+        self._pointer = (x, y) if x is not None else None
+
+    # --- results ---
+    def key_downs(self):
+        return [code for code, up in self.sink.events if not up]
+
+    def stuck_keys(self):
+        """Codes whose last event was a key-down."""
+        down = set()
+        for code, up in self.sink.events:
+            if up: down.discard(code)
+            else: down.add(code)
+        return down
@@ -0,0 +1,147 @@
+"""SendInput output backend and the C structures it needs.
+
+Games require 'Scan Codes', not just virtual key presses, so every event is
+sent with KEYEVENTF_SCANCODE.  The structures are plain ctypes and can be
+built on any platform; only SendInputBackend() without an explicit
+`send_input` function needs Windows.
+"""
+import ctypes
+import threading
+
+from keypad.output import OutputBackend
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_SCANCODE = 0x0008
+
+
+# C struct definitions
+class KeyBdInput(ctypes.Structure):
+    _fields_ = [("wVk", ctypes.c_ushort),
+                ("wScan", ctypes.c_ushort),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
+
+class HardwareInput(ctypes.Structure):
+    _fields_ = [("uMsg", ctypes.c_ulong),
+                ("wParamL", ctypes.c_short),
+                ("wParamH", ctypes.c_ushort)]
+
+class MouseInput(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long),
+                ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
+
+class Input_I(ctypes.Union):
+    _fields_ = [("ki", KeyBdInput),
+                ("mi", MouseInput),
+                ("hi", HardwareInput)]
+
+class Input(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_ulong),
+                ("ii", Input_I)]
+
+
+def fill_key_input(inp, code, is_up):
+    """Fill an Input struct in place as a scancode key-down or key-up."""
+    inp.type = INPUT_KEYBOARD
+    ki = inp.ii.ki
+    ki.wVk = 0
+    ki.wScan = code
+    ki.dwFlags = KEYEVENTF_SCANCODE | (KEYEVENTF_KEYUP if is_up else 0)
+    ki.time = 0
+
+
+def windows_send_input():
+    send = ctypes.windll.user32.SendInput
+    send.restype = ctypes.c_uint
+    send.argtypes = [ctypes.c_uint, ctypes.POINTER(Input), ctypes.c_int]
+    return send
+
+
+class InputTable:
+    """Key-down and key-up Input structs for a set of scan codes, built once.
+
+    All structs live in one contiguous ctypes array; `pointers` maps an
+    event tuple (code, is_up) straight to a pointer into it and `structs`
+    to a struct view of the same slot, so sending a known key never
+    constructs a ctypes object.
+    """
+
+    def __init__(self, codes=()):
+        self.codes = []
+        self.array = None
+        self.pointers = {}
+        self.structs = {}
+        self._retired = []  # Old arrays stay alive while another thread may still use them
+        self.ensure(codes)
+
+    def ensure(self, codes):
+        """Make sure every code has prebuilt structs; rebuilds the array only if one is new."""
+        new = set(codes) - set(self.codes)
+        if not new: return
+        codes = sorted(set(self.codes) | new)
+        array = (Input * (2 * len(codes)))()
+        size = ctypes.sizeof(Input)
+        base = ctypes.addressof(array)
+        ptr_type = ctypes.POINTER(Input)
+        pointers, structs = {}, {}
+        for i, code in enumerate(codes):
+            for j, is_up in enumerate((False, True)):
+                slot = 2 * i + j
+                fill_key_input(array[slot], code, is_up)
+                structs[(code, is_up)] = array[slot]
+                pointers[(code, is_up)] = ctypes.cast(base + slot * size, ptr_type)
+        if self.array is not None: self._retired.append(self.array)
+        self.codes, self.array = codes, array
+        self.pointers, self.structs = pointers, structs
+
+
+class SendInputBackend(OutputBackend):
+    """OutputBackend that injects each batch with a single SendInput call.
+
+    Single events pass a pointer into the prebuilt InputTable.  Larger
+    batches are copied slot by slot into a preallocated scratch array, so
+    the send path does not allocate ctypes structures either way.
+    """
+
+    def __init__(self, send_input=None, codes=(), batch_capacity=32):
+        self.send_input = send_input or windows_send_input()
+        self.input_size = ctypes.sizeof(Input)
+        self.table = InputTable(codes)
+        self.capacity = batch_capacity
+        self.scratch = (Input * batch_capacity)()
+        self._scratch_lock = threading.Lock()
+
+    def prepare(self, codes):
+        """Prebuild structs for codes a newly loaded layout can send."""
+        self.table.ensure(codes)
+
+    def send(self, events):
+        n = len(events)
+        if n == 1:
+            ptr = self.table.pointers.get(events[0])
+            if ptr is None:
+                self.prepare((events[0][0],))
+                ptr = self.table.pointers[events[0]]
+            self.send_input(1, ptr, self.input_size)
+            return
+        with self._scratch_lock:
+            structs, scratch, capacity = self.table.structs, self.scratch, self.capacity
+            i = 0
+            for event in events:
+                try:
+                    scratch[i] = structs[event]
+                except KeyError:
+                    self.prepare((event[0],))
+                    structs = self.table.structs
+                    scratch[i] = structs[event]
+                i += 1
+                if i == capacity:
+                    self.send_input(i, scratch, self.input_size)
+                    i = 0
+            if i: self.send_input(i, scratch, self.input_size)
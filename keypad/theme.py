@@ -0,0 +1,97 @@
+"""Precomputed widget style records for a theme.
+
+A theme (the dicts in virtual_keypad.THEMES) is turned once into a
+ThemeStyles: one record per widget role and state, each a tuple of
+(option, value) pairs in a fixed order.  Records are interned, so two
+themes that agree on a role share the very same tuple and a theme switch
+can skip every role whose record `is` the one already applied.  The grid
+specs, hover, press feedback, the canvas renderer and the control panel
+all configure from these instead of reading theme keys per widget.
+"""
+from collections import namedtuple
+
+from keypad.feedback import FLASH_COLOR
+
+SELECTED_FG = "#ffffff"
+ERROR_FG = "#cc0000"
+HOVER_FG = "#ffffff"
+
+# cell*: grid cell buttons, in WidgetSpec style order (text goes in front).
+# hover/pressed: transient cell states.  header*/corner: design-mode headers.
+# canvas_*: itemconfigure options for the canvas renderer's rectangles/labels.
+# window..panel_slider: the keypad window and the control panel.
+ThemeStyles = namedtuple('ThemeStyles',
+                         'cell cell_selected cell_error hover pressed header header_selected corner'
+                         ' canvas canvas_cell canvas_label window grid title'
+                         ' panel panel_bar panel_button panel_accent panel_label panel_separator panel_list panel_slider')
+
+_records = {}  # record -> itself: equal records from different themes are one object
+_options = {}  # record -> its options as a dict, for configure(); never mutate these
+_styles = {}  # frozen theme items -> ThemeStyles
+_last = [None, None]  # (theme, its ThemeStyles) of the last lookup
+
+
+def _rec(*pairs):
+    return _records.setdefault(pairs, pairs)
+
+
+def options(record):
+    """configure() keyword dict for a record, built once per record."""
+    d = _options.get(record)
+    if d is None: d = _options[record] = dict(record)
+    return d
+
+
+def theme_styles(theme):
+    """ThemeStyles for a theme dict; cached, so asking again for the same theme is one dict compare."""
+    last = _last
+    if last[0] == theme: return last[1]
+    key = tuple(sorted(theme.items()))
+    styles = _styles.get(key)
+    if styles is None: styles = _styles[key] = _build(theme)
+    # A copy: the app edits its theme dict in place (accent color)
+    last[:] = [dict(theme), styles]
+    return styles
+
+
+def _cell(t, bg, fg):
+    return _rec(('bg', bg), ('fg', fg), ('relief', t['relief']), ('bd', t['border']),
+                ('activebackground', t.get('btn_active', bg)), ('activeforeground', fg))
+
+
+def _build(t):
+    # Grid keys are required; window/panel ones fall back for themes that only style the grid
+    bg, accent = t['bg'], t['accent']
+    grid_bg, fg, separator = t.get('grid_bg', bg), t.get('fg', t['btn_fg']), t.get('separator', bg)
+    return ThemeStyles(
+        cell=_cell(t, t['btn_bg'], t['btn_fg']),
+        cell_selected=_cell(t, accent, SELECTED_FG),
+        cell_error=_cell(t, t['btn_bg'], ERROR_FG),
+        hover=_rec(('bg', t.get('btn_hover', accent)), ('fg', HOVER_FG)),
+        pressed=_rec(('bg', FLASH_COLOR),),
+        header=_rec(('bg', t['header_bg']), ('fg', t['header_fg'])),
+        header_selected=_rec(('bg', accent), ('fg', SELECTED_FG)),
+        corner=_rec(('bg', bg),),
+        canvas=_rec(('bg', grid_bg),),
+        canvas_cell=_rec(('fill', t['btn_bg']), ('outline', separator if t['border'] else ''),
+                         ('width', t['border'])),
+        canvas_label=_rec(('fill', t['btn_fg']),),
+        window=_rec(('bg', bg),),
+        grid=_rec(('bg', grid_bg),),
+        title=_rec(('bg', accent), ('fg', "#ffffff")),
+        panel=_rec(('bg', bg),),
+        panel_bar=_rec(('bg', accent), ('fg', "#ffffff")),
+        panel_button=_rec(('bg', t['btn_bg']), ('fg', t['btn_fg']), ('relief', t['relief']), ('bd', t['border'])),
+        panel_accent=_rec(('bg', accent), ('fg', "white"), ('relief', t['relief']), ('bd', t['border'])),
+        panel_label=_rec(('bg', bg), ('fg', fg)),
+        panel_separator=_rec(('bg', separator),),
+        panel_list=_rec(('bg', t['btn_bg']), ('fg', t['btn_fg']), ('selectbackground', accent),
+                        ('selectforeground', "#ffffff")),
+        panel_slider=_rec(('bg', t.get('slider_bg', bg)), ('troughcolor', t.get('slider_trough', separator)),
+                          ('activebackground', t.get('slider_active', accent)), ('fg', fg)))
+
+
+def changed(old, new):
+    """Names of the records that differ between two ThemeStyles (all of them when old is None)."""
+    if old is None: return set(new._fields)
+    return {name for name, a, b in zip(new._fields, old, new) if a is not b}
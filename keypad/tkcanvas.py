@@ -0,0 +1,80 @@
+"""Single-Canvas play-mode renderer (Tk adapter, not imported by the package)."""
+import tkinter as tk
+
+from keypad.theme import options, theme_styles
+
+
+class CanvasCell:
+    """One cell drawn on a CanvasGrid.
+
+    Quacks like the cell Buttons (meta_key, action, grid_pos, cget/config of
+    bg/fg/text, winfo_exists) so press, feedback and touch handling work the
+    same for both renderers.
+    """
+    __slots__ = ("canvas", "rect", "label", "grid_pos", "meta_key", "action", "cell_index")
+
+    def __init__(self, canvas, rect, label, grid_pos, meta_key, action, cell_index):
+        self.canvas, self.rect, self.label = canvas, rect, label
+        self.grid_pos, self.meta_key, self.action = grid_pos, meta_key, action
+        self.cell_index = cell_index
+
+    def cget(self, option):
+        if option == 'bg': return self.canvas.itemcget(self.rect, 'fill')
+        if option == 'fg': return self.canvas.itemcget(self.label, 'fill')
+        return self.canvas.itemcget(self.label, option)
+
+    def config(self, bg=None, fg=None, text=None, **_):
+        if bg is not None: self.canvas.itemconfigure(self.rect, fill=bg)
+        if fg is not None: self.canvas.itemconfigure(self.label, fill=fg)
+        if text is not None: self.canvas.itemconfigure(self.label, text=text)
+    configure = config
+
+    def winfo_exists(self):
+        return self.canvas.winfo_exists()
+
+
+class CanvasGrid:
+    """Play-mode renderer drawing the whole grid on a single tk.Canvas.
+
+    Cells are a rectangle and a text item laid out from the hit-test index;
+    input arrives through canvas-level bindings and is resolved by geometry.
+    """
+
+    def __init__(self, parent):
+        self.canvas = tk.Canvas(parent, highlightthickness=0, bd=0)
+        self.index = None
+        self.cells = {}  # anchor (r, c) -> CanvasCell
+        self.styles = None  # keypad.theme.ThemeStyles the cells were last drawn with
+
+    def render(self, index, grid_data, theme, actions):
+        self.index = index
+        styles = theme_styles(theme)
+        cv = self.canvas
+        cv.delete("all")
+        cv.configure(width=index.col_offsets[-1], height=index.row_offsets[-1], **options(styles.canvas))
+        rect_opts, label_opts = options(styles.canvas_cell), options(styles.canvas_label)
+        self.cells = {}
+        for (r, c) in index.spans:
+            key = grid_data.get((r, c), {}).get('key', '')
+            x0, y0, x1, y1 = index.cell_rect(r, c)
+            rect = cv.create_rectangle(x0, y0, x1, y1, tags="cell", **rect_opts)
+            label = cv.create_text((x0 + x1) / 2, (y0 + y1) / 2, text=key, tags="label", **label_opts)
+            self.cells[(r, c)] = CanvasCell(cv, rect, label, (r, c), key, actions.get(key), r * index.cols + c)
+        self.styles = styles
+        return self.cells
+
+    def restyle(self, theme):
+        """Recolor every cell for a new theme in place: one itemconfigure per item tag, not per cell."""
+        styles, old = theme_styles(theme), self.styles
+        if old is None or styles is old: return
+        cv = self.canvas
+        if styles.canvas is not old.canvas: cv.configure(**options(styles.canvas))
+        if styles.canvas_cell is not old.canvas_cell: cv.itemconfigure("cell", **options(styles.canvas_cell))
+        if styles.canvas_label is not old.canvas_label: cv.itemconfigure("label", **options(styles.canvas_label))
+        self.styles = styles
+
+    def cell_at(self, x, y):
+        """Cell under a canvas-local point."""
+        if self.index is None: return None
+        anchor = self.index.cell_at(x, y)
+        return self.cells.get(anchor) if anchor else None
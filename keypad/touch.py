@@ -0,0 +1,241 @@
+"""WM_TOUCH records, the lock-free ring they are parked in, and the thread that consumes them.
+
+The window procedure only copies the raw TOUCHINPUT records into a
+preallocated TouchRing and returns.  A TouchInputThread drains the ring and
+hands each batch to a TouchProcessor, which hit-tests against an immutable
+geometry snapshot and fires keys without touching Tk.
+"""
+import ctypes
+import sys
+import threading
+from contextlib import nullcontext
+from ctypes import wintypes
+
+from keypad.eventtrace import TOUCH_DOWN, TOUCH_MOVE, TOUCH_UP
+
+# Patch for missing ULONG_PTR in some Python versions
+if not hasattr(wintypes, 'ULONG_PTR'):
+    wintypes.ULONG_PTR = ctypes.c_uint64 if sys.maxsize > 2**32 else ctypes.c_uint32
+
+WM_TOUCH = 0x0240
+TOUCHEVENTF_MOVE = 0x0001
+TOUCHEVENTF_DOWN = 0x0002
+TOUCHEVENTF_UP = 0x0004
+TOUCHEVENTF_INRANGE = 0x0008
+TOUCHEVENTF_PRIMARY = 0x0010
+TOUCHEVENTF_NOCOALESCE = 0x0020
+TOUCHEVENTF_PEN = 0x0040
+TOUCHEVENTF_PALM = 0x0080
+
+MAX_TOUCH_INPUTS = 64  # Per WM_TOUCH message; Windows reports at most one record per contact
+
+
+class TOUCHINPUT(ctypes.Structure):
+    _fields_ = [
+        ("x", wintypes.LONG),
+        ("y", wintypes.LONG),
+        ("hSource", wintypes.HANDLE),
+        ("dwID", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("dwMask", wintypes.DWORD),
+        ("dwTime", wintypes.DWORD),
+        ("dwExtraInfo", wintypes.ULONG_PTR),
+        ("cxContact", wintypes.DWORD),
+        ("cyContact", wintypes.DWORD),
+    ]
+
+
+def make_touch_inputs(records):
+    """Build a TOUCHINPUT array from (x, y, id, flags, time) tuples; x/y in pixels."""
+    arr = (TOUCHINPUT * len(records))()
+    for ti, (x, y, tid, flags, t) in zip(arr, records):
+        ti.x, ti.y, ti.dwID, ti.dwFlags, ti.dwTime = x * 100, y * 100, tid, flags, t
+    return arr
+
+
+class TouchRing:
+    """Single-producer/single-consumer ring of TOUCHINPUT records.
+
+    The producer (window procedure) memmoves whole records in and bumps
+    `head`; the consumer reads up to `head` and bumps `tail`.  Each index is
+    written by one side only, so no lock is needed.  When the consumer falls
+    a full ring behind, new records are dropped and counted.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.buf = (TOUCHINPUT * capacity)()
+        self.record_size = ctypes.sizeof(TOUCHINPUT)
+        self.base = ctypes.addressof(self.buf)
+        self.head = 0  # total records written
+        self.tail = 0  # total records read
+        self.dropped = 0
+        self.ready = threading.Event()
+
+    def push(self, src, n):
+        """Copy the first n records of a TOUCHINPUT array in; returns how many fit."""
+        free = self.capacity - (self.head - self.tail)
+        if n > free:
+            self.dropped += n - free
+            n = free
+        if n <= 0: return 0
+        size, cap = self.record_size, self.capacity
+        start = self.head % cap
+        first = min(n, cap - start)
+        src_addr = ctypes.addressof(src)
+        ctypes.memmove(self.base + start * size, src_addr, first * size)
+        if n > first: ctypes.memmove(self.base, src_addr + first * size, (n - first) * size)
+        self.head += n  # publish only after the copy
+        self.ready.set()
+        return n
+
+    def drain(self, limit=None):
+        """Pop pending records as (x, y, id, flags, time, stamp) tuples; x/y still in 1/100 px.
+
+        stamp is dwExtraInfo, which the wndproc overwrites with its entry
+        time when latency probes are on (see keypad.latency).
+        """
+        head, tail, buf, cap = self.head, self.tail, self.buf, self.capacity
+        if limit is not None: head = min(head, tail + limit)
+        out = []
+        for i in range(tail, head):
+            ti = buf[i % cap]
+            out.append((ti.x, ti.y, ti.dwID, ti.dwFlags, ti.dwTime, ti.dwExtraInfo))
+        self.tail = head
+        return out
+
+    def __len__(self):
+        return self.head - self.tail
+
+
+class TouchProcessor:
+    """Turns raw touch records into key hits against a geometry snapshot.
+
+    `snapshot` is an (index, targets) pair: a GridHitIndex in screen
+    coordinates and a dict from anchor cell to whatever the caller uses as a
+    cell target.  It is replaced wholesale, never mutated, so the input
+    thread can read it while the Tk thread publishes a new one.
+
+    hit(target) fires a cell; changed(finger, target) reports that a finger
+    now owns a different cell (None when lifted, or when it slid off every
+    cell into a gap or off the keypad).  Records are
+    (x, y, id, flags, time, stamp) as TouchRing.drain returns them.
+
+    A move fires every cell on the straight path from the finger's previous
+    sample, in order (GridHitIndex.segment), so a fast swipe between two
+    WM_TOUCH samples does not skip the cells in between.
+
+    `probes` is an optional keypad.latency.LatencyProbes.
+    """
+
+    def __init__(self, hit, changed, dispatcher=None, probes=None):
+        self.hit = hit
+        self.changed = changed
+        self.dispatcher = dispatcher
+        self.probes = probes
+        self.trace = None  # keypad.eventtrace.EventTrace: every record and the cell it hit
+        self.snapshot = None
+        self.fingers = {}  # Windows touch id -> target
+        self.points = {}  # Windows touch id -> last (x, y) in px while down, for the move path
+
+    def process(self, records):
+        snapshot = self.snapshot
+        if snapshot is None: return
+        index, targets = snapshot
+        fingers, points = self.fingers, self.points
+        probes, trace = self.probes, self.trace
+        hits = [] if probes is not None else None
+        # Every key produced by this batch goes out in one SendInput call
+        with self.dispatcher.frame() if self.dispatcher else nullcontext():
+            for x, y, tid, flags, _, stamp in records:
+                if flags & TOUCHEVENTF_UP:
+                    points.pop(tid, None)
+                    target = fingers.pop(tid, None)
+                    if trace is not None: trace.log(TOUCH_UP, -1 if target is None else target.cell_index, tid)
+                    if target is not None: self.changed(tid, None)
+                    continue
+                # Touch coordinates are in 1/100 of a pixel
+                x, y = x // 100, y // 100
+                if probes is not None and stamp: probes.hit(stamp)
+                if flags & TOUCHEVENTF_DOWN:
+                    anchor = index.lookup(x, y)
+                    target = targets.get(anchor) if anchor else None
+                    if trace is not None: trace.log(TOUCH_DOWN, -1 if target is None else target.cell_index, tid, 0, 0, x, y)
+                    points[tid] = (x, y)
+                    if target is not None:
+                        fingers[tid] = target
+                        self.hit(target)
+                        self.changed(tid, target)
+                        if hits is not None and stamp: hits.append((stamp, target))
+                elif flags & TOUCHEVENTF_MOVE and tid in points:
+                    # A finger that landed in a gap starts firing at the first cell it slides into
+                    x0, y0 = points[tid]
+                    points[tid] = (x, y)
+                    current = fingers.get(tid)
+                    entered = False
+                    for anchor in index.lookup_segment(x0, y0, x, y):
+                        target = targets.get(anchor)
+                        if target is None or target is current: continue
+                        # New cell on the path: switch ownership first, then fire it
+                        fingers[tid] = current = target
+                        self.changed(tid, target)
+                        self.hit(target)
+                        entered = True
+                        if hits is not None and stamp: hits.append((stamp, target))
+                    here = targets.get(index.lookup(x, y)) if current is not None or trace is not None else None
+                    if trace is not None: trace.log(TOUCH_MOVE, -1 if here is None else here.cell_index, tid, 0, 0, x, y)
+                    if current is None: continue
+                    if here is None:
+                        # Slid off into a gap or off the keypad: the cell is let go
+                        del fingers[tid]
+                        self.changed(tid, None)
+                    elif not entered and current is here:
+                        # Still on the same cell: keep firing
+                        self.hit(current)
+                        if hits is not None and stamp: hits.append((stamp, current))
+        if hits: probes.dispatched(hits)
+
+
+class TouchInputThread:
+    """Drains a TouchRing into a TouchProcessor on a dedicated daemon thread.
+
+    With a RepeatScheduler attached the thread also sleeps only until the
+    next repeat deadline and serves every held finger from the same loop.
+    """
+
+    def __init__(self, ring, processor, repeater=None):
+        self.ring = ring
+        self.processor = processor
+        self.repeater = repeater
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="touch-input", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.ring.ready.set()
+        if self._thread: self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self):
+        ring, ready, repeater = self.ring, self.ring.ready, self.repeater
+        dispatcher = self.processor.dispatcher
+        while True:
+            timeout = None
+            if repeater is not None:
+                deadline = repeater.next_deadline()
+                if deadline is not None: timeout = max(0.0, deadline - repeater.clock())
+            ready.wait(timeout)
+            ready.clear()
+            if not self._running: return
+            records = ring.drain()
+            try:
+                if records: self.processor.process(records)
+                if repeater is not None and repeater.holds:
+                    with dispatcher.frame() if dispatcher else nullcontext():
+                        repeater.tick()
+            except Exception: pass
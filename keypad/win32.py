@@ -0,0 +1,92 @@
+"""Win32 adapter for the app: touch registration, window subclassing, hotkeys, process priority.
+
+Nothing is bound at import time; each helper looks up user32/kernel32 on
+first use, so importing this module is harmless on other platforms.
+"""
+import ctypes
+import functools
+from ctypes import wintypes
+
+from keypad.touch import TOUCHINPUT, WM_TOUCH
+
+GWL_WNDPROC = -4
+HIGH_PRIORITY_CLASS = 0x00000080
+WM_HOTKEY = 0x0312
+MOD_ALT, MOD_CONTROL, MOD_NOREPEAT = 0x0001, 0x0002, 0x4000
+
+
+class TouchAPI:
+    """The user32/kernel32 touch functions with argtypes set."""
+
+    def __init__(self):
+        user32, kernel32 = ctypes.windll.user32, ctypes.windll.kernel32
+        self.RegisterTouchWindow = user32.RegisterTouchWindow
+        self.RegisterTouchWindow.restype = wintypes.BOOL
+        self.RegisterTouchWindow.argtypes = [wintypes.HWND, wintypes.ULONG]
+        self.GetTouchInputInfo = user32.GetTouchInputInfo
+        self.GetTouchInputInfo.restype = wintypes.BOOL
+        self.GetTouchInputInfo.argtypes = [wintypes.HANDLE, wintypes.UINT, ctypes.POINTER(TOUCHINPUT), wintypes.INT]
+        self.CloseTouchInputHandle = user32.CloseTouchInputHandle
+        self.CloseTouchInputHandle.restype = wintypes.BOOL
+        self.CloseTouchInputHandle.argtypes = [wintypes.HANDLE]
+        self.GetTickCount = kernel32.GetTickCount  # Same clock as TOUCHINPUT.dwTime
+        self.GetTickCount.restype = wintypes.DWORD
+
+
+@functools.lru_cache(maxsize=None)
+def touch_api():
+    return TouchAPI()
+
+
+def raise_process_priority():
+    """HIGH_PRIORITY_CLASS for the whole process, for input responsiveness; best effort."""
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), HIGH_PRIORITY_CLASS)
+    except Exception:
+        pass
+
+
+def register_hotkeys(hwnd, hotkeys):
+    """RegisterHotKey each (id, modifiers, virtual key) for hwnd; returns the ids it got.
+
+    Windows posts WM_HOTKEY to the window for these keys only, so unlike
+    a low-level keyboard hook nothing sits in front of other keystrokes.
+    A key combination another program already registered is skipped.
+    """
+    user32 = ctypes.windll.user32
+    user32.RegisterHotKey.restype = wintypes.BOOL
+    user32.RegisterHotKey.argtypes = [wintypes.HWND, ctypes.c_int, wintypes.UINT, wintypes.UINT]
+    return [hid for hid, mods, vk in hotkeys if user32.RegisterHotKey(hwnd, hid, mods | MOD_NOREPEAT, vk)]
+
+
+def unregister_hotkeys(hwnd, ids):
+    user32 = ctypes.windll.user32
+    for hid in ids: user32.UnregisterHotKey(hwnd, hid)
+
+
+def subclass_touch_wndproc(hwnd, on_touch, on_hotkey=None):
+    """Route WM_TOUCH for hwnd to on_touch(wParam, lParam) and WM_HOTKEY to on_hotkey(id); the rest to DefWindowProc.
+
+    Returns the WNDPROC callback, which the caller must keep alive.
+    """
+    WNDPROC = ctypes.WINFUNCTYPE(ctypes.c_long, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+    user32 = ctypes.windll.user32
+    # Set argtypes/restype for pointer safety
+    user32.SetWindowLongPtrW.restype = ctypes.c_void_p
+    user32.SetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, ctypes.c_void_p]
+    user32.DefWindowProcW.restype = ctypes.c_long
+    user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+
+    def py_wndproc(hWnd, msg, wParam, lParam):
+        if msg == WM_TOUCH:
+            on_touch(wParam, lParam)
+            return 1  # TRUE: message handled, suppresses the default touch feedback
+        if msg == WM_HOTKEY and on_hotkey is not None:
+            on_hotkey(wParam)
+            return 0
+        return user32.DefWindowProcW(hWnd, msg, wParam, lParam)
+
+    proc = WNDPROC(py_wndproc)
+    user32.SetWindowLongPtrW(hwnd, GWL_WNDPROC, ctypes.cast(proc, ctypes.c_void_p))
+    return proc
@@ -1,132 +1,35 @@
 
 import tkinter as tk
-from tkinter import filedialog, colorchooser
-import keyboard
-import json
-import win32gui
-import win32con
 import math
-import winreg
 import ctypes
+import os
+import sys
 import time
-import threading
-from collections import defaultdict
-
-from ctypes import windll, wintypes
-# Patch for missing ULONG_PTR in some Python versions
-if not hasattr(wintypes, 'ULONG_PTR'):
-    import sys
-    if sys.maxsize > 2**32:
-        wintypes.ULONG_PTR = ctypes.c_uint64
-    else:
-        wintypes.ULONG_PTR = ctypes.c_uint32
-
-# --- Windows Touch API integration ---
-WM_TOUCH = 0x0240
-TOUCHEVENTF_MOVE = 0x0001
-TOUCHEVENTF_DOWN = 0x0002
-TOUCHEVENTF_UP = 0x0004
-TOUCHEVENTF_INRANGE = 0x0008
-TOUCHEVENTF_PRIMARY = 0x0010
-TOUCHEVENTF_NOCOALESCE = 0x0020
-TOUCHEVENTF_PEN = 0x0040
-TOUCHEVENTF_PALM = 0x0080
-
-class TOUCHINPUT(ctypes.Structure):
-    _fields_ = [
-        ("x", wintypes.LONG),
-        ("y", wintypes.LONG),
-        ("hSource", wintypes.HANDLE),
-        ("dwID", wintypes.DWORD),
-        ("dwFlags", wintypes.DWORD),
-        ("dwMask", wintypes.DWORD),
-        ("dwTime", wintypes.DWORD),
-        ("dwExtraInfo", wintypes.ULONG_PTR),
-        ("cxContact", wintypes.DWORD),
-        ("cyContact", wintypes.DWORD),
-    ]
-
-user32 = ctypes.windll.user32
-RegisterTouchWindow = user32.RegisterTouchWindow
-RegisterTouchWindow.restype = wintypes.BOOL
-RegisterTouchWindow.argtypes = [wintypes.HWND, wintypes.ULONG]
-GetTouchInputInfo = user32.GetTouchInputInfo
-GetTouchInputInfo.restype = wintypes.BOOL
-GetTouchInputInfo.argtypes = [wintypes.HANDLE, wintypes.UINT, ctypes.POINTER(TOUCHINPUT), wintypes.INT]
-CloseTouchInputHandle = user32.CloseTouchInputHandle
-CloseTouchInputHandle.restype = wintypes.BOOL
-CloseTouchInputHandle.argtypes = [wintypes.HANDLE]
-
-
-# Set process priority to HIGH for maximum responsiveness
-try:
-    ctypes.windll.kernel32.SetPriorityClass(ctypes.windll.kernel32.GetCurrentProcess(), 0x00000080)  # HIGH_PRIORITY_CLASS
-except:
-    pass
+from collections import defaultdict, deque
+
+from keypad import GridModel, InputEngine, LatencyProbes, layoutfile
+from keypad.keys import SCAN_CODES
+from keypad.reconcile import build_grid_specs, design_widget_at, diff_specs, diff_tracks
+from keypad.tkcanvas import CanvasGrid
+from keypad.eventtrace import EventTrace
+from keypad.feedback import FeedbackCompositor
+from keypad.theme import options, theme_styles, changed as styles_changed
+from keypad.motion import MotionCoalescer
+from keypad.profiles import ProfileCache, profile_name
+from keypad.sendinput import SendInputBackend
+from keypad.replay import TraceRecorder, layout_from_grid, MOUSE_DOWN, MOUSE_MOVE, MOUSE_UP
+from keypad.touch import TOUCHINPUT, MAX_TOUCH_INPUTS, TouchRing, TouchInputThread
+from keypad.win32 import (MOD_ALT, MOD_CONTROL, register_hotkeys, touch_api, raise_process_priority,
+                          subclass_touch_wndproc, unregister_hotkeys)
 
 # --- DirectInput Configuration for Games ---
-# Games require 'Scan Codes', not just virtual key presses.
-# This structure defines the C input structures needed for SendInput.
-
-SendInput = ctypes.windll.user32.SendInput
-
-# C struct definitions
-class KeyBdInput(ctypes.Structure):
-    _fields_ = [("wVk", ctypes.c_ushort),
-                ("wScan", ctypes.c_ushort),
-                ("dwFlags", ctypes.c_ulong),
-                ("time", ctypes.c_ulong),
-                ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
-
-class HardwareInput(ctypes.Structure):
-    _fields_ = [("uMsg", ctypes.c_ulong),
-                ("wParamL", ctypes.c_short),
-                ("wParamH", ctypes.c_ushort)]
-
-class MouseInput(ctypes.Structure):
-    _fields_ = [("dx", ctypes.c_long),
-                ("dy", ctypes.c_long),
-                ("mouseData", ctypes.c_ulong),
-                ("dwFlags", ctypes.c_ulong),
-                ("time", ctypes.c_ulong),
-                ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong))]
-
-class Input_I(ctypes.Union):
-    _fields_ = [("ki", KeyBdInput),
-                ("mi", MouseInput),
-                ("hi", HardwareInput)]
-
-class Input(ctypes.Structure):
-    _fields_ = [("type", ctypes.c_ulong),
-                ("ii", Input_I)]
-
-# Common DirectInput Scan Codes
-SCAN_CODES = {
-    'esc': 0x01, '1': 0x02, '2': 0x03, '3': 0x04, '4': 0x05, '5': 0x06, '6': 0x07, '7': 0x08, '8': 0x09, '9': 0x0A, '0': 0x0B,
-    'q': 0x10, 'w': 0x11, 'e': 0x12, 'r': 0x13, 't': 0x14, 'y': 0x15, 'u': 0x16, 'i': 0x17, 'o': 0x18, 'p': 0x19,
-    'a': 0x1E, 's': 0x1F, 'd': 0x20, 'f': 0x21, 'g': 0x22, 'h': 0x23, 'j': 0x24, 'k': 0x25, 'l': 0x26,
-    'z': 0x2C, 'x': 0x2D, 'c': 0x2E, 'v': 0x2F, 'b': 0x30, 'n': 0x31, 'm': 0x32,
-    'space': 0x39, 'enter': 0x1C, 'shift': 0x2A, 'ctrl': 0x1D, 'alt': 0x38,
-    'up': 0xC8, 'left': 0xCB, 'right': 0xCD, 'down': 0xD0,
-    'f1': 0x3B, 'f2': 0x3C, 'f3': 0x3D, 'f4': 0x3E, 'f5': 0x3F, 'f6': 0x40, 
-    'f7': 0x41, 'f8': 0x42, 'f9': 0x43, 'f10': 0x44, 'f11': 0x57, 'f12': 0x58
-}
-
-def PressKey(hexKeyCode):
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    # 0x0008 represents KEYEVENTF_SCANCODE
-    ii_.ki = KeyBdInput(0, hexKeyCode, 0x0008, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(1), ii_)
-    SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
-
-def ReleaseKey(hexKeyCode):
-    extra = ctypes.c_ulong(0)
-    ii_ = Input_I()
-    # 0x0008 | 0x0002 represents KEYEVENTF_SCANCODE | KEYEVENTF_KEYUP
-    ii_.ki = KeyBdInput(0, hexKeyCode, 0x0008 | 0x0002, 0, ctypes.pointer(extra))
-    x = Input(ctypes.c_ulong(1), ii_)
-    SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+# Key events are batched per input frame and injected through SendInput
+# (see keypad.output / keypad.sendinput); scan codes live in keypad.keys.
+# Everything between a touch and SendInput is keypad.engine.InputEngine;
+# Win32 touch plumbing lives in keypad.win32 and is bound on first use.
+# Startup: keyboard, pywin32, winreg and the Tk dialogs are imported where
+# they are first needed, and the control panel is built after the keypad's
+# first frame (python -m benchmarks.bench_startup).
 
 # --- Standard App Config ---
 DEFAULT_ROWS = 4
@@ -135,15 +38,29 @@ BASE_UNIT = 10
 REPEAT_INTERVAL = 50   
 DRAG_THRESHOLD = 5
 # Optimization constants
-EVENT_THROTTLE_MS = 2  # Tighter throttle for faster motion response
+MOTION_TICK_MS = 16  # Mouse motion within one cell is handled at most once a frame
+MOTION_BUDGET_MS = 4  # Longest a single pass over coalesced motion may run
+MOUSE_POINTER = 0  # MotionCoalescer key of the mouse
 KEY_PRESS_DELAY = 12   # Faster key release for snappier feel
 RENDER_BATCH_INTERVAL = 15  # Batch visual updates     
+HIT_FLASH_MS = 50  # Press feedback for a key hit
+PULSE_FLASH_MS = 100  # Press feedback for a tap in TYPE mode
+DESIGN_TAG = "KeypadDesign"  # Bind tag of every design-mode cell and header; handlers bound once per app
+SYSTEM_THEME_POLL_MS = 5000  # How often "Follow System" re-reads the Windows theme and accent
+# Always-on input event trace, rotated at 4 MiB: python -m keypad.readtrace <TRACE_DIR> --summary
+TRACE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "GridController", "trace")
+
+_registry_keys = {}  # HKCU subkey path -> open key, kept for the Follow System poll
+
+def _registry_value(path, name):
+    import winreg
+    key = _registry_keys.get(path)
+    if key is None: key = _registry_keys[path] = winreg.OpenKey(winreg.HKEY_CURRENT_USER, path)
+    return winreg.QueryValueEx(key, name)[0]
 
 def get_system_accent():
     try:
-        registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-        key = winreg.OpenKey(registry, r"Software\Microsoft\Windows\DWM")
-        value, _ = winreg.QueryValueEx(key, "AccentColor")
+        value = _registry_value(r"Software\Microsoft\Windows\DWM", "AccentColor")
         a = (value >> 24) & 0xFF
         b = (value >> 16) & 0xFF
         g = (value >> 8) & 0xFF
@@ -153,9 +70,7 @@ def get_system_accent():
 
 def get_system_mode():
     try:
-        registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-        key = winreg.OpenKey(registry, r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize")
-        value, _ = winreg.QueryValueEx(key, "AppsUseLightTheme")
+        value = _registry_value(r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize", "AppsUseLightTheme")
         return "Light" if value == 1 else "Dark"
     except Exception: return "Light"
 
@@ -187,7 +102,9 @@ class ControlPanel(tk.Toplevel):
         self.btn_container.pack(fill="both", expand=True, padx=10, pady=5)
         self.tool_buttons = [] 
         self.separators = []
+        self.labels = []
         self.btn_lock = None
+        self.styles = None  # keypad.theme.ThemeStyles last applied
         
         self.create_buttons()
 
@@ -218,7 +135,21 @@ class ControlPanel(tk.Toplevel):
         self.btn_lock = self.mk_btn(r1, "Lock 🔒", self.app.toggle_mode, self.app.current_theme['accent'])
         self.mk_btn(r1, "Save 💾", self.app.save_layout)
         self.mk_btn(r1, "Load 📂", self.app.load_layout)
-        
+
+        add_sep()
+
+        self.mk_label("Profiles (Ctrl+Alt+1-9)").pack(anchor="w")
+        self.profile_list = tk.Listbox(self.btn_container, height=4, font=("Segoe UI", 9), activestyle="none",
+                                       relief="flat", borderwidth=0, highlightthickness=0, exportselection=False)
+        self.profile_list.pack(fill="x")
+        self.profile_list.bind("<<ListboxSelect>>", self.on_profile_select)
+        r8 = tk.Frame(self.btn_container)
+        r8.pack(fill="x", pady=(4, 0))
+        self.mk_btn(r8, "Add ➕", self.app.add_profile)
+        self.mk_btn(r8, "Remove ➖", self.remove_selected_profile)
+        self.profile_label = self.mk_label("", font=("Consolas", 7), justify="left")
+        self.profile_label.pack(anchor="w", pady=(4, 0))
+
         add_sep()
 
         r2 = tk.Frame(self.btn_container)
@@ -250,7 +181,17 @@ class ControlPanel(tk.Toplevel):
         self.btn_slide.configure(relief="flat", borderwidth=0, highlightthickness=0)
         self.tool_buttons.append(self.btn_slide)
 
-        tk.Label(self.btn_container, text="Opacity", font=("Segoe UI", 8)).pack(anchor="w")
+        self.btn_hold = tk.Button(self.btn_container, text="Hold: OFF", command=self.toggle_hold)
+        self.btn_hold.pack(fill="x", pady=(0, 6))
+        self.btn_hold.configure(relief="flat", borderwidth=0, highlightthickness=0)
+        self.tool_buttons.append(self.btn_hold)
+
+        self.btn_renderer = tk.Button(self.btn_container, text="Render: BUTTONS 🔲", command=self.toggle_renderer)
+        self.btn_renderer.pack(fill="x", pady=(0, 6))
+        self.btn_renderer.configure(relief="flat", borderwidth=0, highlightthickness=0)
+        self.tool_buttons.append(self.btn_renderer)
+
+        self.mk_label("Opacity").pack(anchor="w")
         self.opacity_slider = tk.Scale(self.btn_container, from_=0.2, to=1.0, resolution=0.05, 
                                        orient="horizontal", command=self.app.update_opacity, showvalue=0,
                                        relief="flat", borderwidth=0, highlightthickness=0)
@@ -259,7 +200,7 @@ class ControlPanel(tk.Toplevel):
         
         add_sep()
         
-        tk.Label(self.btn_container, text="Visual Feedback", font=("Segoe UI", 8)).pack(anchor="w")
+        self.mk_label("Visual Feedback").pack(anchor="w")
         self.feedback_btn = tk.Button(self.btn_container, text="Feedback: ON", command=self.toggle_visual_feedback, 
                                       font=("Segoe UI", 9))
         self.feedback_btn.pack(fill="x", pady=4)
@@ -268,19 +209,76 @@ class ControlPanel(tk.Toplevel):
         
         add_sep()
         
-        tk.Label(self.btn_container, text="Debounce (ms)", font=("Segoe UI", 8)).pack(anchor="w")
+        self.mk_label("Debounce (ms)").pack(anchor="w")
         self.debounce_slider = tk.Scale(self.btn_container, from_=0, to=100, resolution=1, 
                                         orient="horizontal", command=self.set_debounce_time,
                                         showvalue=1, relief="flat", borderwidth=0, highlightthickness=0)
         self.debounce_slider.set(0)
         self.debounce_slider.pack(fill="x")
 
+        self.mk_label("Touch Repeat (ms)").pack(anchor="w")
+        self.repeat_slider = tk.Scale(self.btn_container, from_=10, to=200, resolution=5,
+                                      orient="horizontal", command=self.set_repeat_interval,
+                                      showvalue=1, relief="flat", borderwidth=0, highlightthickness=0)
+        self.repeat_slider.set(REPEAT_INTERVAL)
+        self.repeat_slider.pack(fill="x")
+
+        add_sep()
+
+        self.mk_label("Touch Latency (ms)").pack(anchor="w")
+        r6 = tk.Frame(self.btn_container)
+        r6.pack(fill="x")
+        self.btn_probes = self.mk_btn(r6, "Probes: OFF", self.toggle_latency_probes)
+        self.mk_btn(r6, "Export 📊", self.app.export_latency)
+        r7 = tk.Frame(self.btn_container)
+        r7.pack(fill="x", pady=(4, 0))
+        self.btn_record = self.mk_btn(r7, "Record Input ⏺", self.toggle_recording)
+        self.latency_label = self.mk_label("", font=("Consolas", 7), justify="left")
+        self.latency_label.pack(anchor="w", pady=(4, 0))
+        self.latency_job = None
+
+    def on_profile_select(self, event):
+        sel = self.profile_list.curselection()
+        if not sel: return
+        path = self.app.profiles.paths[sel[0]]
+        if path != self.app.profiles.active: self.app.switch_profile(path)
+
+    def remove_selected_profile(self):
+        sel = self.profile_list.curselection()
+        if sel: self.app.remove_profile(self.app.profiles.paths[sel[0]])
+
+    def update_profiles(self):
+        """Redraw the profile list, mark the active one, show the last switch time and cache use."""
+        profiles = self.app.profiles
+        lb = self.profile_list
+        lb.delete(0, "end")
+        for n, path in enumerate(profiles.paths, 1): lb.insert("end", f"{n}. {profile_name(path)}")
+        if profiles.active in profiles.paths: lb.selection_set(profiles.paths.index(profiles.active))
+        ms = self.app.profile_switch_ms
+        switch = f"switch {ms:.1f} ms\n" if ms is not None else ""
+        self.profile_label.configure(text=switch + profiles.summary())
+
     def toggle_rapid(self):
         self.app.rapid_mode = not self.app.rapid_mode
         txt = "Mode: SLIDE 〰️" if self.app.rapid_mode else "Mode: TYPE ⌨️"
         self.btn_slide.configure(text=txt)
+        self.app.engine.release_all()
         self.app.update_input_bindings()
+
+    def toggle_hold(self):
+        """HOLD for the selected cells, or for every cell when nothing is selected."""
+        hold_all = self.app.toggle_hold()
+        self.btn_hold.configure(text="Hold: ALL" if hold_all else "Hold: OFF")
     
+    def toggle_renderer(self):
+        """Switch the play-mode renderer for this layout (design mode always uses buttons)."""
+        self.app.renderer = "canvas" if self.app.renderer == "buttons" else "buttons"
+        self.update_renderer_label()
+
+    def update_renderer_label(self):
+        txt = "Render: CANVAS 🖼️" if self.app.renderer == "canvas" else "Render: BUTTONS 🔲"
+        self.btn_renderer.configure(text=txt)
+
     def toggle_visual_feedback(self):
         self.app.visual_feedback_enabled = not self.app.visual_feedback_enabled
         txt = "Feedback: ON" if self.app.visual_feedback_enabled else "Feedback: OFF"
@@ -288,9 +286,34 @@ class ControlPanel(tk.Toplevel):
         # Update bindings to apply/remove hover effects
         self.app.update_input_bindings()
     
+    def toggle_latency_probes(self):
+        enabled = self.app.probes is None
+        self.app.set_latency_probes(enabled)
+        self.btn_probes.configure(text="Probes: ON" if enabled else "Probes: OFF")
+        if self.latency_job:
+            self.after_cancel(self.latency_job)
+            self.latency_job = None
+        if enabled: self.update_latency_summary()
+        else: self.latency_label.configure(text="")
+
+    def toggle_recording(self):
+        recording = self.app.toggle_recording()
+        self.btn_record.configure(text="Stop Recording ⏹" if recording else "Record Input ⏺")
+
+    def update_latency_summary(self):
+        """Live p50/p95/p99/max per stage while probes are on."""
+        probes = self.app.probes
+        if probes is None: return
+        self.latency_label.configure(text=probes.format_summary())
+        self.latency_job = self.after(500, self.update_latency_summary)
+
     def set_debounce_time(self, value):
         """Update global debounce threshold."""
-        self.app.key_press_threshold = int(float(value))
+        self.app.engine.debouncer.threshold_ms = int(float(value))
+
+    def set_repeat_interval(self, value):
+        """Repeat rate for the selected cells, or the global default when nothing is selected."""
+        self.app.set_repeat_interval(int(float(value)))
 
     def mk_btn(self, parent, text, cmd, special_color=None):
         b = tk.Button(parent, text=text, command=cmd, font=("Segoe UI", 9))
@@ -302,12 +325,14 @@ class ControlPanel(tk.Toplevel):
         self.tool_buttons.append(b)
         return b
 
+    def mk_label(self, text, font=("Segoe UI", 8), **kw):
+        l = tk.Label(self.btn_container, text=text, font=font, **kw)
+        self.labels.append(l)
+        return l
+
     def on_hover(self, btn, hovering):
-        t = self.app.current_theme
-        if hasattr(btn, 'special_color'): return 
-        bg = t['btn_hover'] if hovering else t['btn_bg']
-        fg = "#ffffff" if hovering else t['btn_fg']
-        btn.configure(bg=bg, fg=fg)
+        if hasattr(btn, 'special_color') or self.styles is None: return 
+        btn.configure(**options(self.styles.hover if hovering else self.styles.panel_button))
 
     def start_move(self, event):
         self.drag_data["x"] = event.x
@@ -336,31 +361,36 @@ class ControlPanel(tk.Toplevel):
         if self.expanded:
             self.frame_mini.pack_forget()
             self.frame_full.pack(fill="both", expand=True)
-            self.geometry(f"220x440+{current_x}+{current_y}")
+            # As tall as its controls need, moved up if it would run off the bottom of the screen
+            self.update_idletasks()
+            height = min(self.frame_full.winfo_reqheight(), self.winfo_screenheight())
+            self.geometry(f"220x{height}+{current_x}+{max(0, min(current_y, self.winfo_screenheight() - height))}")
         else:
             self.frame_full.pack_forget()
             self.frame_mini.pack(fill="both", expand=True)
             self.geometry(f"40x40+{current_x}+{current_y}")
 
-    def update_theme(self, t):
-        self.configure(bg=t['bg'])
-        self.frame_full.configure(bg=t['bg'])
-        self.btn_container.configure(bg=t['bg'])
-        self.drag_bar.configure(bg=t['accent'], fg="#ffffff")
-        for s in self.separators: s.configure(bg=t['separator'])
-        for b in self.tool_buttons:
-            relief = t['relief']
-            bd = t['border']
-            if b == self.btn_lock:
-                b.special_color = t['accent']
-                b.configure(bg=t['accent'], fg="white", relief=relief, bd=bd)
-            elif hasattr(b, 'special_color'):
-                b.configure(bg=b.special_color, fg="white", relief=relief, bd=bd)
-            else:
-                b.configure(bg=t['btn_bg'], fg=t['btn_fg'], relief=relief, bd=bd)
-        for w in self.btn_container.winfo_children():
-            if isinstance(w, tk.Label): w.configure(bg=t['bg'], fg=t['fg'])
-        self.opacity_slider.configure(bg=t['slider_bg'], troughcolor=t['slider_trough'], activebackground=t['slider_active'], fg=t['fg'])
+    def update_theme(self, styles):
+        """Restyle from keypad.theme records; widget groups whose record did not change are skipped."""
+        diff = styles_changed(self.styles, styles)
+        self.styles = styles
+        if 'panel' in diff:
+            for w in (self, self.frame_full, self.btn_container): w.configure(**options(styles.panel))
+        if 'panel_bar' in diff: self.drag_bar.configure(**options(styles.panel_bar))
+        if 'panel_separator' in diff:
+            for s in self.separators: s.configure(**options(styles.panel_separator))
+        if diff & {'panel_button', 'panel_accent'}:
+            button, accent = options(styles.panel_button), options(styles.panel_accent)
+            for b in self.tool_buttons:
+                if b is self.btn_lock:
+                    b.special_color = accent['bg']
+                    b.configure(**accent)
+                elif hasattr(b, 'special_color'): b.configure(accent, bg=b.special_color)
+                else: b.configure(**button)
+        if 'panel_label' in diff:
+            for l in self.labels: l.configure(**options(styles.panel_label))
+        if 'panel_list' in diff: self.profile_list.configure(**options(styles.panel_list))
+        if 'panel_slider' in diff: self.opacity_slider.configure(**options(styles.panel_slider))
 
 class VirtualKeyboardApp(tk.Tk):
 
@@ -372,17 +402,30 @@ class VirtualKeyboardApp(tk.Tk):
 
         self.mode = "design"
         self.design_geometry = None
-        self.grid_data = {}
-        self.row_sizes = [40] * DEFAULT_ROWS
-        self.col_sizes = [60] * DEFAULT_COLS
+        self.grid_data = GridModel.blank(DEFAULT_ROWS, DEFAULT_COLS)
         self.selected_cells = set()
         self.selected_rows_indices = set()
         self.selected_cols_indices = set()
         self.rapid_mode = False
         self.current_theme = THEMES["Modern Light"]
+        self.styles = None  # keypad.theme.ThemeStyles of current_theme, as last applied
+        self.theme_name = None
+        self._system_theme = None  # (mode, accent) Follow System last applied
+        self._system_theme_job = None
         self.active_entry = None
         self.button_refs = {}
+        self._grid_widgets = {}  # widget id ('cell', r, c) / ('col', c) / ... -> widget
+        self._grid_specs = {}  # widget id -> WidgetSpec last applied
+        self._grid_tracks = {}  # (axis, grid index) -> minsize last applied
+        self._grid_mode = None
+        self.renderer = "buttons"  # play-mode renderer, saved per layout: "buttons" or "canvas"
+        self.canvas_grid = None
+        self._canvas_press_cell = None
+        self._canvas_hover_cell = None
         self.drag_data = {"x": 0, "y": 0}
+        self._hit_index = None  # GridHitIndex, rebuilt lazily after layout/window changes
+        self._snapshot_pending = False
+        self.status_job = None
 
         # Visual feedback toggle
         self.visual_feedback_enabled = True
@@ -391,20 +434,35 @@ class VirtualKeyboardApp(tk.Tk):
         self.active_touches = {}
         self.next_touch_id = 0
 
-        # Event throttling
-        self.last_motion_event = 0
-        self.motion_pending = False
-        self.pending_render = False
-        self.render_batch_job = None
+        # Mouse slide motion: a sample entering another cell is handled at once; the rest ride along on the next one
+        self.motion = MotionCoalescer(self._process_motion, self.after, self.after_cancel,
+                                      lambda x, y: self.get_hit_index().lookup(x, y), MOTION_TICK_MS, MOTION_BUDGET_MS)
 
         # High-speed input tracking
-        self.active_keys = {}  # key -> timestamp of last press
-        self.pressed_buttons = {}  # button widget id -> (key, time, is_pressed)
-        self.button_states = {}  # button widget id -> {"feedback_job": id, "orig_color": color}
-        self.button_pressed_state = {}  # Track if button is physically pressed (not released yet)
-        self.last_button_hit = None  # Track last button to distinguish new presses
-        self.key_press_threshold = 0  # ms between same-button presses (0 = no debounce, user configurable)
-        self.input_lock = threading.Lock()  # Thread-safe key tracking
+        # Cell flashes, applied once per display frame from one scheduled job
+        self.feedback = FeedbackCompositor(self.after, self.after_cancel)
+        self.repeat_interval = REPEAT_INTERVAL  # ms between repeats of a held touch (cells may override)
+        # Debounce, dispatch, repeat and key-ups; one SendInput per input frame from prebuilt INPUT structs
+        self.engine = InputEngine(SendInputBackend(codes=SCAN_CODES.values()),
+                                  release_ms=KEY_PRESS_DELAY, repeat_ms=REPEAT_INTERVAL)
+        self.engine.send_text = self._type_text
+        self.engine.on_touch_hit = self._touch_hit
+        self.engine.on_finger = self._touch_changed
+        self.engine.repeat_ms_for = self.cell_repeat_ms
+        self.engine.hold_for = self.cell_holds
+        self._hold_window = None  # foreground window while HOLD keys are down
+        self.key_actions = self.engine.actions  # cell key string -> compiled KeyAction (None for empty/invalid)
+        self.key_errors = self.engine.errors  # cell key string -> parse error shown in design mode
+        self.probes = None  # LatencyProbes while latency measurement is on
+        self.recorder = None  # TraceRecorder while an input trace is being recorded
+        # What the input path decided, always on; kept in memory only if the trace folder is not writable
+        try: self.trace = EventTrace(TRACE_DIR)
+        except OSError: self.trace = EventTrace()
+        self.engine.set_trace(self.trace)
+        self.feedback.trace = self.trace
+        # Layouts kept loaded, compiled and hit-indexed for instant switching
+        self.profiles = ProfileCache(self.compile_cell_key, gap=self.current_theme['gap'])
+        self.profile_switch_ms = None
 
         self.mouse_pressed = False
         self.active_key = None
@@ -413,10 +471,6 @@ class VirtualKeyboardApp(tk.Tk):
         self.paint_value = None
         self.interaction_type = None
 
-        for r in range(DEFAULT_ROWS):
-            for c in range(DEFAULT_COLS):
-                self.grid_data[(r, c)] = {'key': '', 'span_r': 1, 'span_c': 1}
-
         self.main_frame = tk.Frame(self, bg="gray")
         self.main_frame.pack(fill="both", expand=True)
 
@@ -427,140 +481,205 @@ class VirtualKeyboardApp(tk.Tk):
 
         self.grid_frame = tk.Frame(self.main_frame)
         self.grid_frame.pack(fill="both", expand=True)
+        self._bind_design_events()
+        self._design_pressed = None  # widget id a design-mode button press started on
+        self._grid_inset = (0, 0)  # grid_frame offset of the first cell: the header strips in design mode
 
-        self.panel = ControlPanel(self, self)
+        self._panel = None  # ControlPanel, built on first use (see panel)
         self.bind_all("<Button-1>", self.global_click_handler)
+        self.bind("<Configure>", self._on_window_configure)
+        self.bind("<Unmap>", self._on_window_lost)
 
+        # apply_theme builds the grid; the keypad is drawn before anything else is set up
         self.apply_theme("Modern Light")
-        self.refresh_grid()
         self.fit_window_to_content()
         self.center_window()
-
-        self.update_idletasks()
-        x, y = self.winfo_x(), self.winfo_y()
-        self.panel.geometry(f"+{x+300}+{y}")
+        # Idle handlers queued so far draw the first frame; the panel comes on the next turn after them
+        self.after_idle(lambda: self.after(0, self._after_first_frame))
 
         # --- Register for Windows Touch events ---
+        # The wndproc only parks raw records in touch_ring; the touch input thread
+        # hit-tests and sends keys; the Tk thread just polls for visual feedback.
         self.after(100, self._register_touch_window)
         self._orig_wndproc = None
+        self._hotkeys = []  # RegisterHotKey ids held by the window
         self._touch_id_map = {}  # Windows touch ID -> our touch_id
-        self._touch_down_widgets = {}  # touch_id -> widget
+        self._touch_inputs = (TOUCHINPUT * MAX_TOUCH_INPUTS)()  # GetTouchInputInfo scratch
+        # Input thread and window proc -> Tk thread: ('flash', w) / ('finger', id, w) / ('profile', n)
+        self._touch_queue = deque()
+        self.touch_ring = TouchRing()
+        # Held fingers repeat on absolute deadlines, served by the touch input thread
+        self.touch_thread = TouchInputThread(self.touch_ring, self.engine.processor, self.engine.repeater)
+        self.touch_thread.start()
+        self._publish_touch_snapshot()
+        self._poll_touch_queue()
         self._setup_touch_wndproc()
 
-    def _register_touch_window(self):
-        hwnd = self.winfo_id()
-        RegisterTouchWindow(hwnd, 0)
+    def _after_first_frame(self):
+        if self._panel is None: self._build_panel()
+        self._register_profile_hotkeys()
+
+    @property
+    def panel(self):
+        """The ControlPanel, built the first time it is needed."""
+        return self._panel if self._panel is not None else self._build_panel()
+
+    def _build_panel(self):
+        # Beside the keypad and in the app's current state
+        panel = self._panel = ControlPanel(self, self)
+        panel.update_theme(self.styles)
+        panel.update_renderer_label()
+        panel.update_profiles()
+        if self.mode != "design": panel.set_mode(self.mode)
+        self.update_idletasks()
+        panel.geometry(f"+{self.winfo_x() + 300}+{self.winfo_y()}")
+        return panel
 
+    def _register_touch_window(self):
+        touch_api().RegisterTouchWindow(self.winfo_id(), 0)
 
     def _setup_touch_wndproc(self):
         # Subclass the window proc to intercept WM_TOUCH
-        import sys
         if sys.platform != "win32":
             return
-        hwnd = self.winfo_id()
-        GWL_WNDPROC = -4
-        WNDPROC = ctypes.WINFUNCTYPE(ctypes.c_long, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
-        user32 = ctypes.windll.user32
-        # Set argtypes/restype for pointer safety
-        user32.GetWindowLongPtrW.restype = ctypes.c_void_p
-        user32.GetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int]
-        user32.SetWindowLongPtrW.restype = ctypes.c_void_p
-        user32.SetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, ctypes.c_void_p]
-        user32.DefWindowProcW.restype = ctypes.c_long
-        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
-
-        old_wndproc = user32.GetWindowLongPtrW(hwnd, GWL_WNDPROC)
-
-
-        def py_wndproc(hWnd, msg, wParam, lParam):
-            if msg == WM_TOUCH:
-                self._handle_wm_touch(wParam, lParam)
-                # Explicitly call CloseTouchInputHandle and return TRUE to suppress feedback
-                return 1  # TRUE: message handled
-            return user32.DefWindowProcW(hWnd, msg, wParam, lParam)
-
-        self._orig_wndproc = WNDPROC(py_wndproc)
-        user32.SetWindowLongPtrW(hwnd, GWL_WNDPROC, ctypes.cast(self._orig_wndproc, ctypes.c_void_p))
+        self._orig_wndproc = subclass_touch_wndproc(self.winfo_id(), self._handle_wm_touch, self._handle_wm_hotkey)
 
     def _handle_wm_touch(self, wParam, lParam):
-        cInputs = wParam & 0xffff
-        hTouchInput = lParam
-        inputs = (TOUCHINPUT * cInputs)()
-        if not GetTouchInputInfo(hTouchInput, cInputs, inputs, ctypes.sizeof(TOUCHINPUT)):
+        """Runs inside the window procedure: copy the records into the ring and return."""
+        api = touch_api()
+        n = min(wParam & 0xffff, MAX_TOUCH_INPUTS)
+        if api.GetTouchInputInfo(lParam, n, self._touch_inputs, ctypes.sizeof(TOUCHINPUT)):
+            probes = self.probes
+            if probes is not None: probes.stamp(self._touch_inputs, n, api.GetTickCount())
+            recorder = self.recorder
+            if recorder is not None: recorder.touch(self._touch_inputs, n)
+            self.touch_ring.push(self._touch_inputs, n)
+        api.CloseTouchInputHandle(lParam)
+
+    def _touch_hit(self, widget):
+        # Touch input thread, after the key went out: leave the flash to the Tk thread
+        if self.visual_feedback_enabled:
+            self._touch_queue.append(('flash', widget))
+
+    def _touch_changed(self, finger, widget):
+        # Touch input thread: a finger landed on, moved to, or lifted off a cell
+        self._touch_queue.append(('finger', finger, widget))
+
+    def set_latency_probes(self, enabled):
+        """Start (fresh histograms) or stop latency measurement on the touch path."""
+        self.probes = LatencyProbes(self._describe_cell) if enabled else None
+        self.engine.set_probes(self.probes)
+
+    @staticmethod
+    def _describe_cell(widget):
+        action = widget.action
+        return widget.meta_key, (action.codes if action is not None else ())
+
+    def toggle_recording(self):
+        """Start or stop recording raw touch and slide input to a trace file; returns True while recording."""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+            return False
+        from tkinter import filedialog
+        f = filedialog.asksaveasfilename(defaultextension=".ktrace", filetypes=[("Input trace", "*.ktrace")])
+        if not f: return False
+        index = self.get_hit_index()
+        self.recorder = TraceRecorder(f, layout_from_grid(
+            self.row_sizes, self.col_sizes, self.grid_data, index.gap, (index.origin_x, index.origin_y),
+            self.repeat_interval, self.engine.debouncer.threshold_ms, KEY_PRESS_DELAY, self.engine.hold_all))
+        return True
+
+    def _record_mouse(self, kind, event):
+        recorder = self.recorder
+        if recorder is not None: recorder.mouse(kind, event.x_root, event.y_root)
+
+    def export_latency(self):
+        if self.probes is None: return
+        from tkinter import filedialog
+        f = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not f: return
+        if f.lower().endswith(".csv"): self.probes.export_csv(f)
+        else: self.probes.export_json(f)
+
+    def set_repeat_interval(self, ms):
+        if self.selected_cells:
+            for pos in self.selected_cells: self.grid_data[pos]['repeat_ms'] = ms
+        else:
+            self.repeat_interval = ms
+
+    def cell_repeat_ms(self, widget):
+        """Repeat interval for a cell: its own 'repeat_ms' or the global default (RepeatScheduler clamps both)."""
+        cell = self.grid_data.get(widget.grid_pos)
+        ms = cell.get('repeat_ms') if cell else None
+        return self.repeat_interval if ms is None else ms
+
+    def toggle_hold(self):
+        """Flip HOLD on the selected cells (saved with the layout), or globally; returns the global setting."""
+        self.engine.release_holds()
+        if self.selected_cells:
+            hold = not all(self.grid_data[pos].get('hold') for pos in self.selected_cells)
+            for pos in self.selected_cells:
+                if hold: self.grid_data[pos]['hold'] = True
+                else: self.grid_data[pos].pop('hold', None)
+        else:
+            self.engine.hold_all = not self.engine.hold_all
+        return self.engine.hold_all
+
+    def cell_holds(self, widget):
+        """Does a cell hold its key down while touched (its own 'hold' flag)?"""
+        cell = self.grid_data.get(widget.grid_pos)
+        return bool(cell and cell.get('hold'))
+
+    def _check_hold_window(self):
+        """Force held keys up when the window they were going to loses the foreground."""
+        if not self.engine.holding:
+            self._hold_window = None
             return
-        if not hasattr(self, '_touch_repeat_jobs'):
-            self._touch_repeat_jobs = {}
-        for ti in inputs:
-            x = ti.x // 100  # Touch coordinates are in 1/100 of a pixel
-            y = ti.y // 100
-            touch_id = ti.dwID
-            flags = ti.dwFlags
-            # Map Windows touch ID to our own
-            if flags & TOUCHEVENTF_DOWN:
-                widget = self.get_touch_at_position(x, y)
-                if widget:
-                    self._touch_id_map[touch_id] = self.register_touch(widget)
-                    self._touch_down_widgets[self._touch_id_map[touch_id]] = widget
-                    # Immediately send key signal for this finger
-                    self.check_input_hit(widget, force=True)
-                    # Start repeat loop for this finger
-                    self._start_touch_repeat(self._touch_id_map[touch_id], widget)
-            elif flags & TOUCHEVENTF_UP:
-                if touch_id in self._touch_id_map:
-                    our_touch_id = self._touch_id_map[touch_id]
-                    self._stop_touch_repeat(our_touch_id)
+        import win32gui
+        fg = win32gui.GetForegroundWindow()
+        if self._hold_window is None: self._hold_window = fg
+        elif fg != self._hold_window:
+            self.engine.release_holds()
+            self._hold_window = None
+
+    def _poll_touch_queue(self):
+        """Tk side of the touch pipeline: hand flashes to the compositor, do touch bookkeeping."""
+        queue = self._touch_queue
+        while queue:
+            item = queue.popleft()
+            if item[0] == 'flash':
+                self.show_hit_feedback(item[1])
+                continue
+            if item[0] == 'profile':
+                self.switch_profile_slot(item[1])
+                continue
+            _, finger, widget = item
+            our_touch_id = self._touch_id_map.get(finger)
+            if widget is None:
+                if our_touch_id is not None:
                     self.unregister_touch(our_touch_id)
-                    self._touch_down_widgets.pop(our_touch_id, None)
-                    self._touch_id_map.pop(touch_id, None)
-            elif flags & TOUCHEVENTF_MOVE:
-                # On move, check if finger is still on the same widget, if so, send signal
-                widget = self.get_touch_at_position(x, y)
-                if touch_id in self._touch_id_map:
-                    our_touch_id = self._touch_id_map[touch_id]
-                    prev_widget = self._touch_down_widgets.get(our_touch_id)
-                    if widget and widget == prev_widget:
-                        self.check_input_hit(widget, force=True)
-                    elif widget and widget != prev_widget:
-                        # Finger moved to a new button: stop old repeat, start new
-                        self._stop_touch_repeat(our_touch_id)
-                        self._touch_down_widgets[our_touch_id] = widget
-                        self.check_input_hit(widget, force=True)
-                        self._start_touch_repeat(our_touch_id, widget)
-        CloseTouchInputHandle(lParam)
-
-    def _start_touch_repeat(self, touch_id, widget):
-        # Schedule next repeat for this finger
-        def repeat():
-            if touch_id in self._touch_down_widgets:
-                self.check_input_hit(widget, force=True)
-                self._touch_repeat_jobs[touch_id] = self.after(REPEAT_INTERVAL, repeat)
-        self._touch_repeat_jobs[touch_id] = self.after(REPEAT_INTERVAL, repeat)
-
-    def _stop_touch_repeat(self, touch_id):
-        if hasattr(self, '_touch_repeat_jobs') and touch_id in self._touch_repeat_jobs:
-            self.after_cancel(self._touch_repeat_jobs[touch_id])
-            del self._touch_repeat_jobs[touch_id]
-
-    def _start_touch_repeat(self, touch_id, widget):
-        # Immediately send key and start repeat
-        self._touch_repeat_now(touch_id, widget)
-        # Schedule next repeat
-        if not hasattr(self, '_touch_repeat_jobs'):
-            self._touch_repeat_jobs = {}
-        def repeat():
-            if touch_id in self._touch_down_widgets:
-                self._touch_repeat_now(touch_id, widget)
-                self._touch_repeat_jobs[touch_id] = self.after(REPEAT_INTERVAL, repeat)
-        self._touch_repeat_jobs[touch_id] = self.after(REPEAT_INTERVAL, repeat)
-
-    def _stop_touch_repeat(self, touch_id):
-        if hasattr(self, '_touch_repeat_jobs') and touch_id in self._touch_repeat_jobs:
-            self.after_cancel(self._touch_repeat_jobs[touch_id])
-            del self._touch_repeat_jobs[touch_id]
-
-    def _touch_repeat_now(self, touch_id, widget):
-        # Send key signal for this widget
-        self.check_input_hit(widget, force=True)
+                    del self._touch_id_map[finger]
+            elif our_touch_id is None:
+                self._touch_id_map[finger] = self.register_touch(widget)
+            else:
+                self.active_touches[our_touch_id].update(widget=widget, key=widget.meta_key)
+        self._check_hold_window()
+        self.after(RENDER_BATCH_INTERVAL, self._poll_touch_queue)
+
+    def invalidate_hit_index(self):
+        """Layout or window origin changed: rebuild the index and re-publish the touch snapshot."""
+        self._hit_index = None
+        if not self._snapshot_pending:
+            self._snapshot_pending = True
+            self.after_idle(self._publish_touch_snapshot)
+
+    def _publish_touch_snapshot(self):
+        self._snapshot_pending = False
+        # Swapped in as one immutable pair; the input thread never sees a half-built one
+        index = self.get_hit_index()
+        self.engine.set_targets(index, dict(self.button_refs))
+        if self.recorder is not None: self.recorder.origin(index.origin_x, index.origin_y)
 
     def start_window_move(self, event):
         self.drag_data["x"] = event.x
@@ -570,7 +689,21 @@ class VirtualKeyboardApp(tk.Tk):
         y = self.winfo_y() + (event.y - self.drag_data["y"])
         self.geometry(f"+{x}+{y}")
 
-    def quit_app(self): self.destroy()
+    def _on_window_configure(self, event):
+        # Window moved or resized: hit-test origin is stale
+        if event.widget is self: self.invalidate_hit_index()
+
+    def _on_window_lost(self, event):
+        # Minimized or hidden: nothing can lift the fingers that held keys down
+        if event.widget is self: self.engine.release_all()
+
+    def quit_app(self):
+        if self.recorder is not None: self.recorder.close()
+        if self._hotkeys: unregister_hotkeys(self.winfo_id(), self._hotkeys)
+        self.touch_thread.stop()
+        self.engine.stop()
+        self.trace.close()
+        self.destroy()
 
     def safe_commit_entry(self):
         if self.active_entry:
@@ -597,88 +730,152 @@ class VirtualKeyboardApp(tk.Tk):
         title_h = 30 
         if self.mode == "play": self.geometry(f"{grid_w}x{grid_h}")
         else: self.geometry(f"{grid_w+30}x{grid_h+20+title_h}")
+        self.invalidate_hit_index()
+
+    def get_hit_index(self):
+        """Hit-test index for the current layout and window origin."""
+        if self._hit_index is None:
+            offset = 1 if self.mode == "design" else 0
+            bx, by, _, _ = self.grid_frame.grid_bbox(offset, offset)
+            self._grid_inset = (bx, by)
+            origin = (self.grid_frame.winfo_rootx() + bx, self.grid_frame.winfo_rooty() + by)
+            # Tables are cached on the grid model; only the origin is new here
+            self._hit_index = self.grid_data.hit_index(self.current_theme['gap'], origin)
+        return self._hit_index
 
     def refresh_grid(self):
+        """Bring the grid widgets in line with the layout, touching only what changed."""
+        self.invalidate_hit_index()
+        design = self.mode == "design"
+        use_canvas = not design and self.renderer == "canvas"
+        if self._grid_mode != (self.mode, use_canvas):
+            # Bindings and header offset differ per mode: start from scratch
+            for w in self.grid_frame.winfo_children(): w.destroy()
+            self._grid_widgets, self._grid_specs = {}, {}
+            self.canvas_grid = None
+            self.feedback.clear()
+            self._grid_mode = (self.mode, use_canvas)
+        for cell in self.grid_data.values(): self.compile_cell_key(cell.get('key', ''))
+        if use_canvas:
+            self._refresh_canvas()
+            return
+        specs, tracks = build_grid_specs(
+            self.row_sizes, self.col_sizes, self.grid_data, self.current_theme, design, BASE_UNIT,
+            self.selected_cells, self.selected_rows_indices, self.selected_cols_indices, self.key_errors)
+        plan = diff_specs(self._grid_specs, specs)
+        widgets = self._grid_widgets
+
+        for wid in plan.destroy: widgets.pop(wid).destroy()
+        for (axis, idx), minsize in diff_tracks(self._grid_tracks, tracks).items():
+            if axis == 'row': self.grid_frame.rowconfigure(idx, minsize=minsize, weight=0)
+            else: self.grid_frame.columnconfigure(idx, minsize=minsize, weight=0)
+        for wid in plan.create: widgets[wid] = self._create_grid_widget(wid, specs[wid])
+        for wid in plan.regrid: widgets[wid].grid(**dict(specs[wid].grid))
+        for wid, changes in plan.restyle: widgets[wid].configure(**changes)
+        self._grid_specs, self._grid_tracks = specs, tracks
+
         self.button_refs = {}
-        for w in self.grid_frame.winfo_children(): w.destroy()
-        t = self.current_theme
-        rows, cols = len(self.row_sizes), len(self.col_sizes)
-        offset = 1 if self.mode == "design" else 0
-        
-        if self.mode == "design":
-            self.grid_frame.columnconfigure(0, minsize=30, weight=0) 
-            self.grid_frame.rowconfigure(0, minsize=20, weight=0)    
-            tk.Label(self.grid_frame, bg=t['bg']).grid(row=0, column=0, sticky="nsew")
-
-            for c in range(cols):
-                val = self.col_sizes[c]//BASE_UNIT
-                bg = t['accent'] if c in self.selected_cols_indices else t['header_bg']
-                fg = "#ffffff" if c in self.selected_cols_indices else t['header_fg']
-                lbl = tk.Label(self.grid_frame, text=str(val), bg=bg, fg=fg, relief="flat", bd=0)
-                lbl.grid(row=0, column=c+offset, sticky="nsew", padx=1, pady=1)
-                lbl.bind("<ButtonPress-1>", lambda e, c=c, v=val: self.on_header_press(e, 'col', c, v))
-                lbl.bind("<B1-Motion>", lambda e: self.on_header_drag(e, 'col'))
-                lbl.bind("<ButtonRelease-1>", lambda e, c=c, l=lbl, v=val: self.on_header_release(e, 'col', c, l, str(v)))
-                lbl.bind("<ButtonPress-3>", lambda e, c=c: self.on_header_select_start(e, 'col', c))
-                lbl.bind("<B3-Motion>", lambda e: self.on_header_select_drag(e, 'col'))
-
-            for r in range(rows):
-                val = self.row_sizes[r]//BASE_UNIT
-                bg = t['accent'] if r in self.selected_rows_indices else t['header_bg']
-                fg = "#ffffff" if r in self.selected_rows_indices else t['header_fg']
-                lbl = tk.Label(self.grid_frame, text=str(val), bg=bg, fg=fg, relief="flat", bd=0)
-                lbl.grid(row=r+offset, column=0, sticky="nsew", padx=1, pady=1)
-                lbl.bind("<ButtonPress-1>", lambda e, r=r, v=val: self.on_header_press(e, 'row', r, v))
-                lbl.bind("<B1-Motion>", lambda e: self.on_header_drag(e, 'row'))
-                lbl.bind("<ButtonRelease-1>", lambda e, r=r, l=lbl, v=val: self.on_header_release(e, 'row', r, l, str(v)))
-                lbl.bind("<ButtonPress-3>", lambda e, r=r: self.on_header_select_start(e, 'row', r))
-                lbl.bind("<B3-Motion>", lambda e: self.on_header_select_drag(e, 'row'))
-
-        for r in range(rows): self.grid_frame.rowconfigure(r + offset, minsize=self.row_sizes[r], weight=0)
-        for c in range(cols): self.grid_frame.columnconfigure(c + offset, minsize=self.col_sizes[c], weight=0)
-
-        skip = set()
-        for r in range(rows):
-            for c in range(cols):
-                if (r, c) in skip: continue
-                cell = self.grid_data.get((r,c), {})
-                span_r, span_c = cell.get('span_r', 1), cell.get('span_c', 1)
-                
-                if span_r > 1 or span_c > 1:
-                    for sr in range(span_r):
-                        for sc in range(span_c):
-                            if sr==0 and sc==0: continue
-                            skip.add((r+sr, c+sc))
-
-                is_sel = (r, c) in self.selected_cells
-                bg = t['accent'] if is_sel else t['btn_bg']
-                fg = "#ffffff" if is_sel else t['btn_fg']
-                
-                if r >= rows or c >= cols: continue
-
-                btn = tk.Button(self.grid_frame, text=cell.get('key',''), bg=bg, fg=fg,
-                                relief=t['relief'], bd=t['border'], highlightthickness=0,
-                                activebackground=t.get('btn_active', bg), activeforeground=fg)
-                btn.grid_pos = (r, c) 
-                btn.meta_key = cell.get('key','')
-                self.button_refs[(r,c)] = btn 
-                
-                px, py = t['gap'], t['gap']
-                btn.grid(row=r+offset, column=c+offset, rowspan=span_r, columnspan=span_c, sticky="nsew", padx=(0, px), pady=(0, py))
-                
-                if self.mode == "design":
-                    btn.bind("<Enter>", lambda e, b=btn: self.on_btn_hover(b, True))
-                    btn.bind("<Leave>", lambda e, b=btn: self.on_btn_hover(b, False))
-                    btn.bind("<ButtonPress-1>", lambda e, r=r, c=c: self.on_cell_press(e, r, c))
-                    btn.bind("<B1-Motion>", self.on_cell_paint_drag)
-                    btn.bind("<ButtonRelease-1>", lambda e, r=r, c=c, b=btn: self.on_cell_release(e, r, c, b))
-                    
-                    btn.bind("<ButtonPress-3>", lambda e, r=r, c=c: self.start_drag_select(r, c))
-                    btn.bind("<B3-Motion>", lambda e: self.do_drag_select(e))
-                    btn.bind("<ButtonRelease-3>", lambda e: self.end_drag_select())
-        
+        cols = len(self.col_sizes)
+        for wid, w in widgets.items():
+            if wid[0] != 'cell': continue
+            key = self.grid_data.get(wid[1:], {}).get('key', '')
+            w.meta_key = key
+            w.action = self.key_actions.get(key)
+            # Stable index into the engine's per-cell state (set_targets stamps it again on publish)
+            w.cell_index = wid[1] * cols + wid[2]
+            self.button_refs[wid[1:]] = w
+        self.update_input_bindings()
+
+    def _refresh_canvas(self):
+        # No grid tracks in canvas mode; the canvas sizes itself from the layout
+        for (axis, idx), minsize in diff_tracks(self._grid_tracks, {}).items():
+            if axis == 'row': self.grid_frame.rowconfigure(idx, minsize=minsize, weight=0)
+            else: self.grid_frame.columnconfigure(idx, minsize=minsize, weight=0)
+        self._grid_tracks = {}
+        if self.canvas_grid is None:
+            self.canvas_grid = CanvasGrid(self.grid_frame)
+            self.canvas_grid.canvas.grid(row=0, column=0, sticky="nw")
+        index = self.grid_data.hit_index(self.current_theme['gap'])
+        self.button_refs = self.canvas_grid.render(index, self.grid_data, self.current_theme, self.key_actions)
+        self._canvas_press_cell = self._canvas_hover_cell = None
         self.update_input_bindings()
 
+    def _create_grid_widget(self, wid, spec):
+        style = dict(spec.style)
+        if spec.kind == 'corner':
+            w = tk.Label(self.grid_frame, **style)
+        elif spec.kind == 'header':
+            w = tk.Label(self.grid_frame, relief="flat", bd=0, **style)
+            w.bindtags((DESIGN_TAG,) + w.bindtags())
+        else:
+            w = tk.Button(self.grid_frame, highlightthickness=0, **style)
+            w.grid_pos = wid[1:]
+            if self.mode == "design": w.bindtags((DESIGN_TAG,) + w.bindtags())
+        w.grid(sticky="nsew", **dict(spec.grid))
+        return w
+
+    # ===== Design-mode input: one set of handlers for every cell and header =====
+    def _bind_design_events(self):
+        b = lambda seq, fn: self.bind_class(DESIGN_TAG, seq, fn)
+        b("<Enter>", lambda e: self._design_hover(e, True))
+        b("<Leave>", lambda e: self._design_hover(e, False))
+        b("<ButtonPress-1>", self._design_press)
+        b("<B1-Motion>", self._design_drag)
+        b("<ButtonRelease-1>", self._design_release)
+        b("<ButtonPress-3>", self._design_select_press)
+        b("<B3-Motion>", self._design_select_drag)
+        b("<ButtonRelease-3>", self._design_select_release)
+
+    def design_widget_at(self, x_root, y_root):
+        """Widget id under a screen point in design mode, from the layout geometry (no Tk round trip)."""
+        return design_widget_at(self.get_hit_index(), x_root, y_root, *self._grid_inset)
+
+    def _header_value(self, axis, idx):
+        return (self.col_sizes if axis == 'col' else self.row_sizes)[idx] // BASE_UNIT
+
+    def _design_hover(self, event, hovering):
+        if hasattr(event.widget, 'grid_pos'): self.on_btn_hover(event.widget, hovering)
+
+    def _design_press(self, event):
+        wid = self._design_pressed = self.design_widget_at(event.x_root, event.y_root)
+        if wid is None or wid[0] == 'corner': return
+        if wid[0] == 'cell': self.on_cell_press(event, *wid[1:])
+        else: self.on_header_press(event, wid[0], wid[1], self._header_value(*wid))
+
+    def _design_drag(self, event):
+        wid = self._design_pressed
+        if wid is None or wid[0] == 'corner': return
+        if wid[0] == 'cell': self.on_cell_paint_drag(event)
+        else: self.on_header_drag(event, wid[0])
+
+    def _design_release(self, event):
+        wid, self._design_pressed = self._design_pressed, None
+        widget = self._grid_widgets.get(wid) if wid is not None else None
+        if widget is None or wid[0] == 'corner': return
+        if wid[0] == 'cell': self.on_cell_release(event, wid[1], wid[2], widget)
+        else: self.on_header_release(event, wid[0], wid[1], widget, str(self._header_value(*wid)))
+
+    def _design_select_press(self, event):
+        wid = self._design_pressed = self.design_widget_at(event.x_root, event.y_root)
+        if wid is None or wid[0] == 'corner': return
+        if wid[0] == 'cell': self.start_drag_select(*wid[1:])
+        else: self.on_header_select_start(event, *wid)
+
+    def _design_select_drag(self, event):
+        wid = self._design_pressed
+        if wid is None or wid[0] == 'corner': return
+        if wid[0] == 'cell': self.do_drag_select(event)
+        else: self.on_header_select_drag(event, wid[0])
+
+    def _design_select_release(self, event):
+        wid, self._design_pressed = self._design_pressed, None
+        if wid is not None and wid[0] == 'cell': self.end_drag_select()
+
+    def mark_restyled(self, wid):
+        """A widget was reconfigured outside refresh_grid; force a full restyle next time."""
+        spec = self._grid_specs.get(wid)
+        if spec is not None: self._grid_specs[wid] = spec._replace(style=None)
+
     def on_header_press(self, event, axis, idx, val):
         self.drag_start_pos = (event.x_root, event.y_root)
         self.paint_value = val 
@@ -690,29 +887,20 @@ class VirtualKeyboardApp(tk.Tk):
             if dist > DRAG_THRESHOLD:
                 self.interaction_type = 'paint'
         if self.interaction_type == 'paint':
-            x, y = event.x_root, event.y_root
-            widget = self.winfo_containing(x, y)
-            if widget and widget.master == self.grid_frame:
-                info = widget.grid_info()
-                if 'column' in info and 'row' in info:
-                    c, r = int(info['column']), int(info['row'])
-                    offset = 1 
-                    target_idx = -1
-                    if axis == 'col' and r == 0 and c >= offset: target_idx = c - offset
-                    elif axis == 'row' and c == 0 and r >= offset: target_idx = r - offset
-                    if target_idx != -1:
-                        try:
-                            new_size = int(self.paint_value * BASE_UNIT)
-                            changed = False
-                            if axis == 'col' and self.col_sizes[target_idx] != new_size:
-                                self.col_sizes[target_idx] = new_size; changed = True
-                            elif axis == 'row' and self.row_sizes[target_idx] != new_size:
-                                self.row_sizes[target_idx] = new_size; changed = True
-                            if changed:
-                                widget.configure(text=str(self.paint_value))
-                                self.fit_window_to_content()
-                                self.after(10, self.fit_window_to_content)
-                        except: pass
+            wid = self.design_widget_at(event.x_root, event.y_root)
+            if wid is not None and wid[0] == axis:
+                target_idx = wid[1]
+                try:
+                    new_size = int(self.paint_value * BASE_UNIT)
+                    sizes = self.col_sizes if axis == 'col' else self.row_sizes
+                    if sizes[target_idx] != new_size:
+                        self.grid_data.set_size(axis, target_idx, new_size)
+                        self._grid_widgets[wid].configure(text=str(self.paint_value))
+                        self.mark_restyled(wid)
+                        # Also drops the hit index: later drag events see the new track sizes
+                        self.fit_window_to_content()
+                        self.after(10, self.fit_window_to_content)
+                except: pass
 
     def on_header_release(self, event, axis, idx, widget, current_val):
         if self.interaction_type == 'edit_wait':
@@ -735,30 +923,21 @@ class VirtualKeyboardApp(tk.Tk):
 
     def on_header_select_drag(self, event, axis):
         if self.interaction_type == 'select':
-            x, y = event.x_root, event.y_root
-            widget = self.winfo_containing(x, y)
-            if widget and widget.master == self.grid_frame:
-                info = widget.grid_info()
-                offset = 1
-                if 'column' in info:
-                    if axis == 'col' and int(info['row']) == 0:
-                        c = int(info['column']) - offset
-                        if 0 <= c < len(self.col_sizes):
-                            self.selected_cols_indices.add(c); self.refresh_grid()
-                    elif axis == 'row' and int(info['column']) == 0:
-                        r = int(info['row']) - offset
-                        if 0 <= r < len(self.row_sizes):
-                            self.selected_rows_indices.add(r); self.refresh_grid()
+            wid = self.design_widget_at(event.x_root, event.y_root)
+            if wid is not None and wid[0] == axis:
+                selected = self.selected_cols_indices if axis == 'col' else self.selected_rows_indices
+                if wid[1] not in selected:
+                    selected.add(wid[1]); self.refresh_grid()
 
     def finish_header_resize(self, axis, idx, val):
         try:
             new_size = int(float(val) * BASE_UNIT)
             indices = self.selected_cols_indices if axis == 'col' else self.selected_rows_indices
-            target_list = self.col_sizes if axis == 'col' else self.row_sizes
+            count = len(self.col_sizes if axis == 'col' else self.row_sizes)
             if idx in indices:
                 for i in indices:
-                    if 0 <= i < len(target_list): target_list[i] = new_size
-            else: target_list[idx] = new_size
+                    if 0 <= i < count: self.grid_data.set_size(axis, i, new_size)
+            else: self.grid_data.set_size(axis, idx, new_size)
             self.refresh_grid(); self.fit_window_to_content()
         except: pass
 
@@ -772,14 +951,16 @@ class VirtualKeyboardApp(tk.Tk):
             dist = math.hypot(event.x_root - self.drag_start_pos[0], event.y_root - self.drag_start_pos[1])
             if dist > DRAG_THRESHOLD: self.interaction_type = 'paint'
         if self.interaction_type == 'paint':
-            x, y = event.x_root, event.y_root
-            widget = self.winfo_containing(x, y)
-            if widget and isinstance(widget, tk.Button) and hasattr(widget, 'grid_pos'):
-                r, c = widget.grid_pos
+            wid = self.design_widget_at(event.x_root, event.y_root)
+            widget = self.button_refs.get(wid[1:]) if wid is not None and wid[0] == 'cell' else None
+            if widget is not None:
+                r, c = wid[1:]
                 if self.grid_data[(r,c)]['key'] != self.paint_value:
                     self.grid_data[(r,c)]['key'] = self.paint_value
                     widget.configure(text=self.paint_value)
+                    self.mark_restyled(('cell', r, c))
                     widget.meta_key = self.paint_value
+                    widget.action = self.compile_cell_key(self.paint_value)
 
     def on_cell_release(self, event, r, c, widget):
         if self.interaction_type == 'edit_wait':
@@ -820,24 +1001,17 @@ class VirtualKeyboardApp(tk.Tk):
         self.active_entry = entry
 
     def goto_next_editable(self, ctx):
-        next_widget = None
         if ctx['type'] == 'col':
             idx = ctx['idx'] + 1
             if idx < len(self.col_sizes):
-                for w in self.grid_frame.winfo_children():
-                    info = w.grid_info()
-                    if int(info['row']) == 0 and int(info['column']) == idx + 1:
-                        next_widget = w; break
+                next_widget = self._grid_widgets.get(('col', idx))
                 if next_widget:
                     val = str(self.col_sizes[idx]//BASE_UNIT)
                     self.start_inline_edit(next_widget, val, lambda v: self.finish_header_resize('col', idx, v), {'type':'col', 'idx':idx})
         elif ctx['type'] == 'row':
             idx = ctx['idx'] + 1
             if idx < len(self.row_sizes):
-                for w in self.grid_frame.winfo_children():
-                    info = w.grid_info()
-                    if int(info['column']) == 0 and int(info['row']) == idx + 1:
-                        next_widget = w; break
+                next_widget = self._grid_widgets.get(('row', idx))
                 if next_widget:
                     val = str(self.row_sizes[idx]//BASE_UNIT)
                     self.start_inline_edit(next_widget, val, lambda v: self.finish_header_resize('row', idx, v), {'type':'row', 'idx':idx})
@@ -858,14 +1032,29 @@ class VirtualKeyboardApp(tk.Tk):
         # Skip hover effect if visual feedback is disabled
         if not self.visual_feedback_enabled:
             return
-        t = self.current_theme
-        bg = t['btn_hover'] if hovering else t['btn_bg']
-        fg = "#ffffff" if hovering else t['btn_fg']
-        btn.configure(bg=bg, fg=fg)
+        btn.configure(**options(self.styles.hover if hovering else self.cell_style(btn.meta_key)))
+        self.mark_restyled(('cell', r, c))
+
+    def cell_style(self, key):
+        """Style record of an unselected cell; keys that failed to compile are flagged red in design mode."""
+        if self.mode == "design" and key in self.key_errors: return self.styles.cell_error
+        return self.styles.cell
+
+    def cell_fg(self, key):
+        return options(self.cell_style(key))['fg']
 
     def update_input_bindings(self):
         if self.mode != "play": return
         rapid = self.rapid_mode
+        if self.canvas_grid is not None:
+            cv = self.canvas_grid.canvas
+            cv.bind("<ButtonPress-1>", self.on_canvas_press)
+            cv.bind("<ButtonRelease-1>", self.on_canvas_release)
+            cv.bind("<B1-Motion>", self.on_motion if rapid else "")
+            hover = not rapid and self.visual_feedback_enabled
+            cv.bind("<Motion>", self.on_canvas_hover if hover else "")
+            cv.bind("<Leave>", self.on_canvas_hover if hover else "")
+            return
         for btn in self.button_refs.values():
             btn.unbind("<ButtonPress-1>")
             btn.unbind("<ButtonRelease-1>")
@@ -883,102 +1072,92 @@ class VirtualKeyboardApp(tk.Tk):
                 btn.bind("<B1-Motion>", self.on_motion)
                 btn.configure(command=lambda: None) 
             else:
-                btn.configure(command=lambda k=btn.meta_key, b=btn: self.play_key_pulse(k, b))
+                btn.configure(command=lambda b=btn: self.play_key_pulse(b))
 
     def update_visuals(self):
-        t = self.current_theme
         for (r,c), widget in self.button_refs.items():
             try:
                 if not widget.winfo_exists(): continue
-                is_sel = (r, c) in self.selected_cells
-                target_bg = t['accent'] if is_sel else t['btn_bg']
-                target_fg = "#ffffff" if is_sel else t['btn_fg']
-                if widget.cget('bg') != target_bg and widget.cget('bg') != "#aaaaaa":
-                    widget.configure(bg=target_bg, fg=target_fg, relief=t['relief'], bd=t['border'])
+                style = options(self.styles.cell_selected if (r, c) in self.selected_cells
+                                else self.cell_style(widget.meta_key))
+                if not self.feedback.lit(widget) and widget.cget('bg') != style['bg']:
+                    widget.configure(**style)
+                    self.mark_restyled(('cell', r, c))
             except: pass
 
     def on_press(self, event):
         w = event.widget
         if not isinstance(w, tk.Button) or not hasattr(w, "meta_key"): 
             return
+        self._record_mouse(MOUSE_DOWN, event)
+        self.motion.begin(MOUSE_POINTER, event.x_root, event.y_root)
+        self.press_cell(w)
+
+    def press_cell(self, w):
         self.mouse_pressed = True
-        self.last_button_hit = id(w)  # Track this press start
-        self.check_input_hit(w, force=True)  # Force register on initial press
+        # Force register on initial press; the engine tracks the cell for slide re-entry
+        if self.engine.pointer_down(w) and self.visual_feedback_enabled:
+            self.show_hit_feedback(w)
 
     def on_release(self, event):
+        self._record_mouse(MOUSE_UP, event)
+        self.release_cell(event.widget)
+
+    def release_cell(self, widget):
+        # Moves still pending fire before the release
+        self.motion.end(MOUSE_POINTER)
         self.mouse_pressed = False
-        self.last_button_hit = None  # Reset button tracking on release
+        # Marks the pressed cell released (allows its next press to register)
+        self.engine.pointer_up()
         if self.repeat_job:
             self.after_cancel(self.repeat_job)
             self.repeat_job = None
         self.active_key = None
-        # Clear tracking for this widget release
-        try:
-            widget_id = id(event.widget)
-            with self.input_lock:
-                # Mark button as released (allows next press to register)
-                self.button_pressed_state[widget_id] = False
-                
-                self.pressed_buttons.pop(widget_id, None)
-                # Cancel pending feedback job if exists
-                if widget_id in self.button_states:
-                    old_job = self.button_states[widget_id].get("feedback_job")
-                    if old_job:
-                        try:
-                            self.after_cancel(old_job)
-                        except:
-                            pass
-                    # Force reset to original color on release
-                    orig_color = self.button_states[widget_id].get("orig_color")
-                    try:
-                        if event.widget.winfo_exists() and orig_color:
-                            event.widget.config(bg=orig_color)
-                    except:
-                        pass
-                    del self.button_states[widget_id]
-        except:
-            pass
+        # Reset to the original color on the next frame
+        self.feedback.end(widget)
+
+    def on_canvas_press(self, event):
+        cell = self.canvas_grid.cell_at(event.x, event.y)
+        self._canvas_press_cell = cell
+        if self.rapid_mode: self._record_mouse(MOUSE_DOWN, event)
+        self.motion.begin(MOUSE_POINTER, event.x_root, event.y_root)
+        if cell is not None and self.rapid_mode: self.press_cell(cell)
+
+    def on_canvas_release(self, event):
+        pressed, self._canvas_press_cell = self._canvas_press_cell, None
+        if self.rapid_mode:
+            self._record_mouse(MOUSE_UP, event)
+            if pressed is not None: self.release_cell(pressed)
+            else: self.mouse_pressed = False
+        elif pressed is not None and pressed is self.canvas_grid.cell_at(event.x, event.y):
+            # Button semantics: fire on release over the cell that was pressed
+            self.play_key_pulse(pressed)
+
+    def on_canvas_hover(self, event):
+        cell = None if str(event.type) == "Leave" else self.canvas_grid.cell_at(event.x, event.y)
+        prev = self._canvas_hover_cell
+        if cell is prev: return
+        if prev is not None: self.on_btn_hover(prev, False)
+        if cell is not None: self.on_btn_hover(cell, True)
+        self._canvas_hover_cell = cell
 
     def on_motion(self, event):
         if not self.mouse_pressed:
             return
+        self._record_mouse(MOUSE_MOVE, event)
         
-        current_time = time.time() * 1000
-        # Use tight throttle for faster response
-        if current_time - self.last_motion_event < EVENT_THROTTLE_MS:
-            if not self.motion_pending:
-                self.motion_pending = True
-                self.after(1, lambda: self._process_motion(event))  # Minimal delay
-            return
-        
-        self.last_motion_event = current_time
-        self._process_motion(event)
-    
-    def _process_motion(self, event):
-        """Process motion with minimal overhead - direct widget lookup."""
-        self.motion_pending = False
-        # Fast widget lookup at pointer position
-        x, y = event.x_root, event.y_root
-        w = self.winfo_containing(x, y)
-        
-        if not w:
-            return
-        
-        # Traverse up to find button efficiently
-        widget = None
-        current = w
-        while current and current != self.grid_frame:
-            if isinstance(current, tk.Button) and hasattr(current, "meta_key"):
-                widget = current
-                break
-            current = current.master
-        
-        if widget and hasattr(widget, "meta_key"):
-            # Check if we switched buttons
-            widget_id = id(widget)
-            if widget_id != self.last_button_hit:
-                self.last_button_hit = widget_id
-                self.check_input_hit(widget, force=True)
+        # Handled now if it entered another cell, else with the next one (or at the end of the tick)
+        self.motion.add(MOUSE_POINTER, event.x_root, event.y_root)
+
+    def _process_motion(self, pointer, path):
+        """Fire the cells along a mouse slide path - geometry hit-test, no Tk round trip."""
+        # Every cell on the way from the last handled sample, in order; the one already under the pointer is skipped
+        refs, index = self.button_refs, self.get_hit_index()
+        crossed = [refs.get(cell) for cell in index.lookup_path(path)]
+        # Ended in a gap or off the keypad: the engine lets go of a HOLD cell (as keypad.replay does)
+        if index.lookup(*path[-1]) is None: crossed.append(None)
+        for widget in self.engine.pointer_path(crossed):
+            if self.visual_feedback_enabled: self.show_hit_feedback(widget)
     
     def _get_widgets_at_pointer(self):
         """Get widget(s) at current pointer position(s)."""
@@ -1000,124 +1179,49 @@ class VirtualKeyboardApp(tk.Tk):
         
         return result
 
-    def check_input_hit(self, widget, force=False):
-        key = widget.meta_key
-        if not key:
-            return
-        
-        widget_id = id(widget)
-        current_time = time.time() * 1000  # milliseconds
-        
-        with self.input_lock:
-            # Get button state - track if THIS button is currently pressed
-            was_pressed = self.button_pressed_state.get(widget_id, False)
-            
-            # If not currently pressed, always allow new press (different fingers on different buttons)
-            if not was_pressed:
-                self.button_pressed_state[widget_id] = True
-                self.pressed_buttons[widget_id] = (key, current_time, True)
-                self.active_keys[key] = current_time
-                
-                # Cancel any pending feedback for this button
-                if widget_id in self.button_states:
-                    old_job = self.button_states[widget_id].get("feedback_job")
-                    if old_job:
-                        try:
-                            self.after_cancel(old_job)
-                        except:
-                            pass
-            else:
-                # Button already pressed - check debounce for repeated presses on SAME button
-                if not force:
-                    last_press_time = self.pressed_buttons.get(widget_id, (key, 0, False))[1]
-                    time_since_last = current_time - last_press_time
-                    
-                    # Only skip if debounce is enabled AND threshold not met
-                    if self.key_press_threshold > 0 and time_since_last < self.key_press_threshold:
-                        return  # Debounce active - ignore repeat press
-                
-                # Update timestamp for this repeated press
-                self.pressed_buttons[widget_id] = (key, current_time, True)
-                self.active_keys[key] = current_time
-        
-        # Send key immediately on press
-        self.send_key(key)
-        
-        # Visual feedback ONLY if enabled (completely skip if disabled)
-        if not self.visual_feedback_enabled:
-            return  # Early exit - no visual feedback at all
-        
-        try:
-            if not widget.winfo_exists():
-                return
-            orig = widget.cget("bg")
-            widget.config(bg="#aaaaaa")
-            # Schedule reset
-            feedback_job = self.after(50, lambda: self._reset_widget_color_tracked(widget, orig, widget_id))
-            with self.input_lock:
-                self.button_states[widget_id] = {"feedback_job": feedback_job, "orig_color": orig}
-        except tk.TclError:
-            pass
-    
-    def _reset_widget_color_tracked(self, widget, orig_color, widget_id):
-        """Reset widget color and clear state tracking."""
-        try:
-            if widget.winfo_exists():
-                widget.config(bg=orig_color)
-        except tk.TclError:
-            pass
-        finally:
-            with self.input_lock:
-                if widget_id in self.button_states:
-                    del self.button_states[widget_id]
-    
-    def _reset_widget_color(self, widget, orig_color):
-        """Safely reset widget color with existence check."""
-        try:
-            if widget.winfo_exists():
-                widget.config(bg=orig_color)
-        except tk.TclError:
-            pass
+    def show_hit_feedback(self, widget):
+        """Flash a cell after a hit (Tk thread only); drawn on the next feedback frame."""
+        self.feedback.flash(widget, HIT_FLASH_MS)
 
     def repeat_loop(self, key):
         """Deprecated - keys are now sent on press instead of repeat loop."""
         pass
 
-    def send_key(self, key):
-        # DirectInput Handling - SEND ON PRESS IMMEDIATELY
-        key_lower = key.lower().strip()
-        if key_lower in SCAN_CODES:
-            code = SCAN_CODES[key_lower]
-            PressKey(code)
-            # Release asynchronously to not block input thread
-            threading.Thread(target=self._release_key_async, args=(code,), daemon=True).start()
-        else:
-            # Fallback for keys not in scan list
-            try: keyboard.write(key)
-            except: pass
-    
-    def _release_key_async(self, code):
-        """Release key asynchronously with minimal delay."""
-        time.sleep(KEY_PRESS_DELAY / 1000.0)
+    def _type_text(self, text):
+        # Fallback for text that is not a key or combo
         try:
-            ReleaseKey(code)
-        except:
-            pass
+            import keyboard
+            keyboard.write(text)
+        except: pass
 
-    def play_key_pulse(self, key_str, btn):
-        if not key_str: return
-        orig = btn.cget('bg')
-        btn.configure(bg="#aaaaaa")
-        self.after(100, lambda: btn.configure(bg=orig))
-        self.send_key(key_str)
+    def compile_cell_key(self, key):
+        """Compiled action for a cell key string, cached; parse errors land in key_errors."""
+        return self.engine.compile(key)
+
+    def show_status(self, text, ms=3000):
+        """Show a message in the design-mode title bar for a few seconds."""
+        if self.status_job: self.after_cancel(self.status_job)
+        self.title_bar.configure(text=text)
+        def restore():
+            self.status_job = None
+            self.title_bar.configure(text="::: Grid Editor :::")
+        self.status_job = self.after(ms, restore)
+    
+    def play_key_pulse(self, btn):
+        if self.engine.click(btn): self.feedback.flash(btn, PULSE_FLASH_MS)
 
     def finish_key_edit(self, r, c, val):
         self.grid_data[(r,c)]['key'] = val
+        action = self.compile_cell_key(val)
+        error = self.key_errors.get(val)
+        if error: self.show_status(f"⚠ {error}")
         if (r,c) in self.button_refs:
             btn = self.button_refs[(r,c)]
             if btn.winfo_exists():
-                btn.configure(text=val)
+                btn.configure(text=val, fg=self.cell_fg(val))
+                self.mark_restyled(('cell', r, c))
                 btn.meta_key = val 
+                btn.action = action
 
     def finish_col_resize(self, c, val): pass
     def finish_row_resize(self, r, val): pass
@@ -1132,10 +1236,9 @@ class VirtualKeyboardApp(tk.Tk):
         self.update_visuals()
 
     def do_drag_select(self, event):
-        x, y = self.grid_frame.winfo_pointerx(), self.grid_frame.winfo_pointery()
-        widget = self.grid_frame.winfo_containing(x, y)
-        if widget and isinstance(widget, tk.Button) and hasattr(widget, 'grid_pos'):
-            r, c = widget.grid_pos
+        wid = self.design_widget_at(event.x_root, event.y_root)
+        if wid is not None and wid[0] == 'cell':
+            r, c = wid[1:]
             if self.drag_start_state == "select": 
                 if (r,c) not in self.selected_cells:
                     self.selected_cells.add((r,c)); self.update_visuals()
@@ -1165,9 +1268,11 @@ class VirtualKeyboardApp(tk.Tk):
         self.geometry(f"+{rx}+{ry + y_offset}")
 
     def enter_design_mode(self):
+        self.engine.release_all()
         self.mode = "design"
         self.panel.set_mode("design")
         self.attributes("-topmost", False)
+        import win32gui, win32con
         hwnd = win32gui.GetParent(self.winfo_id()) or self.winfo_id()
         style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
         style = style & ~win32con.WS_EX_NOACTIVATE & ~win32con.WS_EX_TOPMOST
@@ -1180,6 +1285,7 @@ class VirtualKeyboardApp(tk.Tk):
         if self.design_geometry: self.geometry(self.design_geometry)
 
     def apply_click_through_style(self):
+        import win32gui, win32con
         hwnd = win32gui.GetParent(self.winfo_id()) or self.winfo_id()
         style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
         style = style | win32con.WS_EX_NOACTIVATE | win32con.WS_EX_TOPMOST
@@ -1193,6 +1299,7 @@ class VirtualKeyboardApp(tk.Tk):
         m.tk_popup(self.winfo_pointerx(), self.winfo_pointery())
 
     def pick_accent_color(self):
+        from tkinter import colorchooser
         color = colorchooser.askcolor(title="Choose Accent Color")[1]
         if color:
             self.current_theme['accent'] = color
@@ -1201,32 +1308,63 @@ class VirtualKeyboardApp(tk.Tk):
             self.apply_theme_to_ui()
 
     def apply_theme(self, name):
+        self.theme_name = name
+        if self._system_theme_job is not None:
+            self.after_cancel(self._system_theme_job)
+            self._system_theme_job = None
         if name == "Follow System":
-            mode = get_system_mode() 
-            accent = get_system_accent()
+            mode, accent = self._system_theme = get_system_mode(), get_system_accent()
             base_theme = THEMES["Modern Dark"] if mode == "Dark" else THEMES["Modern Light"]
             self.current_theme = base_theme.copy()
             self.current_theme["accent"] = accent
             self.current_theme["btn_hover"] = accent
             self.current_theme["slider_active"] = accent
+            self._system_theme_job = self.after(SYSTEM_THEME_POLL_MS, self._poll_system_theme)
         else:
             self.current_theme = THEMES[name].copy()
         self.apply_theme_to_ui()
 
+    def _poll_system_theme(self):
+        """Follow System: re-read the Windows theme now and then; re-theme only when it changed."""
+        self._system_theme_job = None
+        if self.theme_name != "Follow System": return
+        if (get_system_mode(), get_system_accent()) != self._system_theme: self.apply_theme("Follow System")
+        else: self._system_theme_job = self.after(SYSTEM_THEME_POLL_MS, self._poll_system_theme)
+
     def apply_theme_to_ui(self):
+        """Restyle the existing widgets in one pass from the theme's style records, skipping unchanged ones."""
         t = self.current_theme
-        self.configure(bg=t['bg'])
-        self.main_frame.configure(bg=t['bg'])
-        self.grid_frame.configure(bg=t['grid_bg']) 
-        self.title_bar.configure(bg=t['accent'], fg="#ffffff")
-        self.panel.update_theme(t)
-        self.refresh_grid()
+        styles = theme_styles(t)
+        diff = styles_changed(self.styles, styles)
+        self.styles = styles
+        if 'window' in diff:
+            self.configure(**options(styles.window))
+            self.main_frame.configure(**options(styles.window))
+        if 'grid' in diff: self.grid_frame.configure(**options(styles.grid))
+        if 'title' in diff: self.title_bar.configure(**options(styles.title))
+        self.feedback.color = options(styles.pressed)['bg']
+        if self._panel is not None: self._panel.update_theme(styles)
+        self.profiles.set_gap(t['gap'])
+        cg = self.canvas_grid
+        if cg is not None and cg.index is not None and cg.index.gap == t['gap']:
+            # Same geometry: recolor the canvas items by tag instead of redrawing them
+            cg.restyle(t)
+        else:
+            # Buttons are reconciled: only widgets whose style record changed are configured
+            self.refresh_grid()
 
     def update_opacity(self, val):
         v = float(val)
         self.attributes("-alpha", v)
         self.panel.attributes("-alpha", v)
 
+    # Track sizes live in the grid model; resize through grid_data.set_size
+    @property
+    def row_sizes(self): return self.grid_data.row_sizes
+
+    @property
+    def col_sizes(self): return self.grid_data.col_sizes
+
     def get_context_indices(self):
         if not self.selected_cells: return len(self.row_sizes)-1, len(self.col_sizes)-1
         rows = [r for r,c in self.selected_cells]; cols = [c for r,c in self.selected_cells]
@@ -1234,80 +1372,35 @@ class VirtualKeyboardApp(tk.Tk):
 
     def add_row_at_selection(self):
         r_idx, _ = self.get_context_indices()
-        new_row_idx = r_idx + 1
-        self.row_sizes.insert(new_row_idx, 40)
-        new_data = {}
-        for (r, c), v in self.grid_data.items():
-            if r >= new_row_idx: new_data[(r + 1, c)] = v
-            else: new_data[(r, c)] = v
-        for c in range(len(self.col_sizes)):
-            new_data[(new_row_idx, c)] = {'key': '', 'span_r': 1, 'span_c': 1}
-        self.grid_data = new_data
+        self.grid_data.insert_row(r_idx + 1)
         self.refresh_grid(); self.fit_window_to_content()
 
     def add_col_at_selection(self):
         _, c_idx = self.get_context_indices()
-        new_col_idx = c_idx + 1
-        self.col_sizes.insert(new_col_idx, 60)
-        new_data = {}
-        for (r, c), v in self.grid_data.items():
-            if c >= new_col_idx: new_data[(r, c + 1)] = v
-            else: new_data[(r, c)] = v
-        for r in range(len(self.row_sizes)):
-            new_data[(r, new_col_idx)] = {'key': '', 'span_r': 1, 'span_c': 1}
-        self.grid_data = new_data
+        self.grid_data.insert_col(c_idx + 1)
         self.refresh_grid(); self.fit_window_to_content()
 
     def del_row_at_selection(self):
         if len(self.row_sizes) <= 1: return
         r_idx, _ = self.get_context_indices()
-        self.row_sizes.pop(r_idx)
-        new_data = {}
-        for (r, c), v in self.grid_data.items():
-            span_r = v.get('span_r', 1)
-            if r == r_idx: pass
-            elif r > r_idx: new_data[(r - 1, c)] = v
-            else:
-                if r + span_r - 1 >= r_idx: v['span_r'] = max(1, span_r - 1)
-                new_data[(r, c)] = v
-        self.grid_data = new_data
+        self.grid_data.delete_row(r_idx)
         self.selected_cells.clear(); self.refresh_grid(); self.fit_window_to_content()
 
     def del_col_at_selection(self):
         if len(self.col_sizes) <= 1: return
         _, c_idx = self.get_context_indices()
-        self.col_sizes.pop(c_idx)
-        new_data = {}
-        for (r, c), v in self.grid_data.items():
-            span_c = v.get('span_c', 1)
-            if c == c_idx: pass
-            elif c > c_idx: new_data[(r, c - 1)] = v
-            else:
-                if c + span_c - 1 >= c_idx: v['span_c'] = max(1, span_c - 1)
-                new_data[(r, c)] = v
-        self.grid_data = new_data
+        self.grid_data.delete_col(c_idx)
         self.selected_cells.clear(); self.refresh_grid(); self.fit_window_to_content()
 
     def merge_cells(self):
         if not self.selected_cells: return
-        min_r, min_c = float('inf'), float('inf')
-        max_r, max_c = float('-inf'), float('-inf')
-        for r, c in self.selected_cells:
-            cell = self.grid_data.get((r,c), {})
-            sr = cell.get('span_r', 1); sc = cell.get('span_c', 1)
-            min_r, min_c = min(min_r, r), min(min_c, c)
-            max_r, max_c = max(max_r, r + sr - 1), max(max_c, c + sc - 1)
-        min_r, min_c = int(min_r), int(min_c)
-        max_r, max_c = int(max_r), int(max_c)
-        base = (min_r, min_c)
-        self.grid_data[base].update({'span_r': max_r - min_r + 1, 'span_c': max_c - min_c + 1})
-        for r in range(min_r, max_r + 1):
-            for c in range(min_c, max_c + 1):
-                if (r,c) != base: self.grid_data[(r,c)].update({'span_r': 1, 'span_c': 1})
+        rows = [r for r, c in self.selected_cells]; cols = [c for r, c in self.selected_cells]
+        # Merges the selection overlaps are taken in whole
+        self.grid_data.merge(min(rows), min(cols), max(rows), max(cols))
         self.selected_cells.clear(); self.refresh_grid()
 
     def unmerge_cells(self):
-        for r, c in self.selected_cells: self.grid_data[(r,c)].update({'span_r': 1, 'span_c': 1})
+        for r, c in self.selected_cells: self.grid_data.split(r, c)
         self.selected_cells.clear(); self.refresh_grid()
 
     # ===== Multi-Touch Optimization Methods =====
@@ -1330,42 +1423,77 @@ class VirtualKeyboardApp(tk.Tk):
             del self.active_touches[touch_id]
     
     def get_touch_at_position(self, x_root, y_root):
-        """Find widget at given position efficiently."""
-        w = self.winfo_containing(x_root, y_root)
-        if not w: return None
-        while w and not (isinstance(w, tk.Button) and hasattr(w, "meta_key")):
-            w = w.master
-            if w == self: break
-        return w if isinstance(w, tk.Button) and hasattr(w, "meta_key") else None
-    
-    def batch_render_update(self):
-        """Batch visual updates to reduce latency."""
-        if self.render_batch_job:
-            self.after_cancel(self.render_batch_job)
-        self.pending_render = True
-        self.render_batch_job = self.after(RENDER_BATCH_INTERVAL, self._flush_render)
+        """Find the cell button at a screen position via the hit-test index."""
+        cell = self.get_hit_index().lookup(x_root, y_root)
+        return self.button_refs.get(cell) if cell else None
     
-    def _flush_render(self):
-        """Execute pending render updates."""
-        if self.pending_render:
-            self.update_visuals()
-            self.pending_render = False
-        self.render_batch_job = None
-
     def save_layout(self):
-        f = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
-        if f: 
-            with open(f, 'w') as o: json.dump({"row_sizes": self.row_sizes, "col_sizes": self.col_sizes, "cells": {str(k): v for k, v in self.grid_data.items()}}, o)
-    
+        from tkinter import filedialog
+        f = filedialog.asksaveasfilename(defaultextension=".json",
+                                         filetypes=[("Layout", "*.json"), ("Binary layout", "*.kpl")])
+        if not f: return
+        meta = {"renderer": self.renderer}
+        try: layoutfile.save_layout(f, self.grid_data, meta, binary=f.endswith(".kpl"))
+        except (OSError, layoutfile.LayoutError) as e:
+            self.show_status(f"Save failed: {e}")
+            return
+        self.profiles.saved(f, self.grid_data, meta)
+
     def load_layout(self):
-        f = filedialog.askopenfilename(filetypes=[("JSON", "*.json")])
-        if f: 
-            with open(f, 'r') as i:
-                d = json.load(i)
-                self.row_sizes, self.col_sizes = d["row_sizes"], d["col_sizes"]
-                self.grid_data = {eval(k): v for k, v in d["cells"].items()}
-                self.refresh_grid(); self.fit_window_to_content()
+        """Load a layout file; it joins the profile list, so switching back to it is instant."""
+        from tkinter import filedialog
+        f = filedialog.askopenfilename(filetypes=[("Layouts", "*.json *.kpl"), ("All files", "*.*")])
+        if f: self.add_profile(f, reload=True)
+
+    # ===== Profiles =====
+    def add_profile(self, path=None, reload=False):
+        """Preload a layout into the profile cache (keys are validated and compiled while it is read) and show it."""
+        if path is None:
+            from tkinter import filedialog
+            path = filedialog.askopenfilename(filetypes=[("Layouts", "*.json *.kpl"), ("All files", "*.*")])
+            if not path: return
+        try: self.profiles.add(path, reload)
+        except (OSError, layoutfile.LayoutError) as e:
+            self.show_status(f"Load failed: {e}")
+            return
+        self.switch_profile(path)
+
+    def remove_profile(self, path):
+        self.profiles.remove(path)
+        self.panel.update_profiles()
+
+    def switch_profile_slot(self, n):
+        """Hotkey Ctrl+Alt+n: the n-th profile in the list."""
+        if 1 <= n <= len(self.profiles.paths): self.switch_profile(self.profiles.paths[n - 1])
+
+    def switch_profile(self, path):
+        """Show a profile: swap in its prebuilt model, diff the widgets against it, time the whole switch."""
+        t0 = time.perf_counter()
+        self.safe_commit_entry()
+        try: profile = self.profiles.activate(path)
+        except (OSError, layoutfile.LayoutError) as e:
+            self.show_status(f"Load failed: {e}")
+            return
+        self.engine.release_all()
+        self.selected_cells.clear(); self.selected_rows_indices.clear(); self.selected_cols_indices.clear()
+        # The editor works on a copy: the cached profile stays as loaded (or last saved)
+        self.grid_data = profile.grid.copy()
+        self.renderer = profile.meta.get("renderer", "buttons")
+        if self._panel is not None: self._panel.update_renderer_label()
+        self.refresh_grid(); self.fit_window_to_content()
+        self.profile_switch_ms = (time.perf_counter() - t0) * 1000
+        if self._panel is not None: self._panel.update_profiles()
+
+    def _register_profile_hotkeys(self):
+        # Ctrl+Alt+1..9 as hotkey ids 1..9, delivered as WM_HOTKEY to the subclassed window proc
+        if sys.platform != "win32": return
+        self._hotkeys = register_hotkeys(self.winfo_id(), [(n, MOD_CONTROL | MOD_ALT, ord(str(n))) for n in range(1, 10)])
+
+    def _handle_wm_hotkey(self, hotkey_id):
+        # Inside the window procedure: queue the switch for the Tk thread's next poll
+        if 1 <= hotkey_id <= 9: self._touch_queue.append(('profile', hotkey_id))
 
 if __name__ == "__main__":
+    raise_process_priority()  # HIGH priority for maximum responsiveness
     app = VirtualKeyboardApp()
     app.mainloop()
\ No newline at end of file